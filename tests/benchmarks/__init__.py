@@ -0,0 +1 @@
+"""Benchmarks, run with python -m tests.benchmarks.<name>."""
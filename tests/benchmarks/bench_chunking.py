@@ -0,0 +1,137 @@
+"""Benchmark sending synthesized audio as audio-chunk events.
+
+Compares the old chunk loop (bytes slices, one event and one drain per
+chunk) against AudioChunkWriter (memoryview slices, cached headers, batched
+writes).
+
+    python -m tests.benchmarks.bench_chunking --seconds 60
+"""
+
+import argparse
+import asyncio
+import math
+import time
+import tracemalloc
+
+from wyoming.audio import AudioChunk
+from wyoming.event import async_write_event
+
+from wyoming_microsoft_tts.audio import AudioChunkWriter
+
+RATE = 24000
+WIDTH = 2
+CHANNELS = 1
+
+
+class NullWriter:
+    """Stream writer that only counts what is written."""
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self.bytes_written = 0
+        self.bytes_copied = 0
+        self.writes = 0
+        self.drains = 0
+
+    def _count(self, data) -> None:
+        self.bytes_written += len(data)
+        if not isinstance(data, memoryview):
+            # Audio passed as bytes was sliced (copied) out of the buffer
+            self.bytes_copied += len(data)
+
+    def write(self, data) -> None:
+        """Count data."""
+        self._count(data)
+        self.writes += 1
+
+    def writelines(self, lines) -> None:
+        """Count several pieces of data."""
+        for line in lines:
+            self._count(line)
+
+        self.writes += 1
+
+    async def drain(self) -> None:
+        """Count drains."""
+        self.drains += 1
+
+
+async def send_sliced(writer, audio: bytes, samples_per_chunk: int) -> None:
+    """Chunk audio the way the handler used to."""
+    bytes_per_chunk = WIDTH * CHANNELS * samples_per_chunk
+    num_chunks = int(math.ceil(len(audio) / bytes_per_chunk))
+    for i in range(num_chunks):
+        offset = i * bytes_per_chunk
+        chunk = audio[offset : offset + bytes_per_chunk]
+        await async_write_event(
+            AudioChunk(audio=chunk, rate=RATE, width=WIDTH, channels=CHANNELS).event(),
+            writer,
+        )
+
+
+async def send_chunk_writer(writer, audio: bytes, samples_per_chunk: int) -> None:
+    """Chunk audio with AudioChunkWriter."""
+    chunk_writer = AudioChunkWriter(
+        writer,
+        rate=RATE,
+        width=WIDTH,
+        channels=CHANNELS,
+        samples_per_chunk=samples_per_chunk,
+    )
+    await chunk_writer.write(audio)
+
+
+def measure(send, audio: bytes, samples_per_chunk: int, repeat: int) -> dict:
+    """Time send and trace its memory use."""
+    writer = NullWriter()
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        asyncio.run(send(writer, audio, samples_per_chunk))
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    asyncio.run(send(NullWriter(), audio, samples_per_chunk))
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    megabytes = len(audio) / 1e6
+    return {
+        "mb_per_sec": megabytes * repeat / elapsed,
+        "copied_mb_per_mb": writer.bytes_copied / repeat / 1e6 / megabytes,
+        "peak_kb_per_mb": peak / 1e3 / megabytes,
+        "writes_per_mb": writer.writes / repeat / megabytes,
+        "drains_per_mb": writer.drains / repeat / megabytes,
+    }
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--seconds", type=float, default=30.0, help="Seconds of audio per run"
+    )
+    parser.add_argument("--samples-per-chunk", type=int, default=1024)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    audio = bytes(int(args.seconds * RATE) * WIDTH * CHANNELS)
+    print(  # noqa: T201
+        f"{len(audio) / 1e6:.2f} MB of audio, {args.samples_per_chunk} samples per chunk"
+    )
+    for name, send in (
+        ("bytes slices", send_sliced),
+        ("AudioChunkWriter", send_chunk_writer),
+    ):
+        result = measure(send, audio, args.samples_per_chunk, args.repeat)
+        print(  # noqa: T201
+            f"{name:>18}: {result['mb_per_sec']:8.1f} MB/s, "
+            f"{result['copied_mb_per_mb']:5.2f} MB copied/MB, "
+            f"peak {result['peak_kb_per_mb']:5.1f} kB allocated/MB, "
+            f"{result['writes_per_mb']:6.1f} writes/MB, "
+            f"{result['drains_per_mb']:6.1f} drains/MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Benchmark converting synthesized audio to the formats of different clients.
+
+Converts audio in Azure's default format (24 kHz 16-bit mono) in the blocks
+that streamed synthesis delivers and reports how many times faster than real
+time each conversion runs. Needs NumPy.
+
+    python -m tests.benchmarks.bench_convert --seconds 60
+"""
+
+import argparse
+import time
+
+import numpy as np
+from wyoming.audio import AudioFormat
+
+from wyoming_microsoft_tts.convert import AudioConverter
+
+SOURCE = AudioFormat(rate=24000, width=2, channels=1)
+
+TARGETS = {
+    "16 kHz mono (satellite)": AudioFormat(rate=16000, width=2, channels=1),
+    "22.05 kHz mono": AudioFormat(rate=22050, width=2, channels=1),
+    "48 kHz stereo (speaker)": AudioFormat(rate=48000, width=2, channels=2),
+    "24 kHz 8-bit mono": AudioFormat(rate=24000, width=1, channels=1),
+}
+
+# Every conversion must at least run this many times faster than real time
+TARGET_REAL_TIME_FACTOR = 100.0
+
+
+def make_audio(seconds: float) -> bytes:
+    """Return seconds of noisy speech-like audio in the source format."""
+    rng = np.random.default_rng(0)
+    num_samples = int(SOURCE.rate * seconds)
+    times = np.arange(num_samples) / SOURCE.rate
+    samples = 6000 * np.sin(2 * np.pi * 220 * times) + rng.normal(0, 2000, num_samples)
+    return np.clip(samples, -32768, 32767).astype("<i2").tobytes()
+
+
+def measure(target: AudioFormat, audio: bytes, block_bytes: int) -> float:
+    """Return the seconds taken to convert audio in blocks."""
+    converter = AudioConverter(SOURCE, target)
+    start = time.perf_counter()
+    for offset in range(0, len(audio), block_bytes):
+        converter.convert(audio[offset : offset + block_bytes])
+
+    converter.flush()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=60.0)
+    parser.add_argument(
+        "--block-ms",
+        type=float,
+        default=50.0,
+        help="Milliseconds of audio per streamed block",
+    )
+    args = parser.parse_args()
+
+    audio = make_audio(args.seconds)
+    bytes_per_frame = SOURCE.width * SOURCE.channels
+    block_bytes = int(SOURCE.rate * args.block_ms / 1000) * bytes_per_frame
+
+    is_on_target = True
+    for name, target in TARGETS.items():
+        seconds = measure(target, audio, block_bytes)
+        real_time_factor = args.seconds / seconds
+        print(  # noqa: T201
+            f"{name:>24}: {args.seconds:.0f} s of audio in {seconds:7.3f} s, "
+            f"{real_time_factor:8.0f}x real time"
+        )
+        is_on_target = is_on_target and (real_time_factor >= TARGET_REAL_TIME_FACTOR)
+
+    print(  # noqa: T201
+        f"Target of {TARGET_REAL_TIME_FACTOR:.0f}x real time "
+        + ("reached" if is_on_target else "NOT reached")
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,449 @@
+"""Benchmark the whole server under load from concurrent Wyoming clients.
+
+Starts the server with the fake backend, so only the server's own overhead
+and the configured fake latency are measured, and runs --clients clients at
+once. Each client sends --requests requests one after another, each on a new
+connection, alternating between a single synthesize event and a
+synthesize-start/chunk/stop text stream (see --mode). Every text has --sentences sentences and is unique, so
+the audio cache never answers a request.
+
+Reports time to first audio and total latency percentiles, sentences per
+second and the server's memory use. --output saves the results as JSON and
+--compare prints the change against results saved earlier, e.g. on another
+commit:
+
+    python -m tests.benchmarks.bench_load --clients 20 --output before.json
+    python -m tests.benchmarks.bench_load --clients 20 --compare before.json
+
+Arguments after -- are passed to the server.
+"""
+
+import argparse
+import asyncio
+import json
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any
+
+from wyoming.audio import AudioChunk, AudioStop
+from wyoming.client import AsyncTcpClient
+from wyoming.error import Error
+from wyoming.info import Describe, Info
+from wyoming.tts import (
+    Synthesize,
+    SynthesizeChunk,
+    SynthesizeStart,
+    SynthesizeStop,
+    SynthesizeStopped,
+)
+
+HOST = "127.0.0.1"
+
+# Seconds to wait for the server to answer its first describe
+STARTUP_TIMEOUT = 30.0
+
+# Seconds between samples of the server's memory use
+RSS_INTERVAL = 0.1
+
+SENTENCES = (
+    "The kitchen lights are now on.",
+    "It will be sunny this afternoon with a high of 21 degrees.",
+    "Your timer for the pasta is done.",
+    "The front door was locked at half past ten.",
+    "Tomorrow starts with a meeting at nine in the morning.",
+)
+
+# Results compared by --compare, and whether higher is better
+COMPARED = (
+    ("first_audio_ms", "p50", False),
+    ("first_audio_ms", "p95", False),
+    ("first_audio_ms", "p99", False),
+    ("latency_ms", "p50", False),
+    ("latency_ms", "p95", False),
+    ("latency_ms", "p99", False),
+    ("sentences_per_second", None, True),
+    ("server_rss_mb", "peak", False),
+)
+
+
+class RequestResult:
+    """Timing of a single request, in seconds since it was sent."""
+
+    def __init__(self, mode: str, num_sentences: int) -> None:
+        """Initialize."""
+        self.mode = mode
+        self.num_sentences = num_sentences
+        self.first_audio: float | None = None
+        self.latency: float | None = None
+        self.error: str | None = None
+
+
+def make_text(client_id: int, request_id: int, num_sentences: int) -> str:
+    """Return a text no other request uses."""
+    sentences = [
+        SENTENCES[(request_id + index) % len(SENTENCES)]
+        for index in range(num_sentences)
+    ]
+    sentences[0] = f"Client {client_id}, request {request_id}. " + sentences[0]
+    return " ".join(sentences)
+
+
+async def read_audio(
+    client: AsyncTcpClient, result: RequestResult, start_time: float, end_type: str
+) -> None:
+    """Read events until end_type, recording the first audio and the end."""
+    while True:
+        event = await client.read_event()
+        if event is None:
+            result.error = "disconnected"
+            return
+
+        if AudioChunk.is_type(event.type) and (result.first_audio is None):
+            result.first_audio = time.perf_counter() - start_time
+        elif Error.is_type(event.type):
+            result.error = Error.from_event(event).text
+            return
+        elif event.type == end_type:
+            result.latency = time.perf_counter() - start_time
+            return
+
+
+async def send_stream(client: AsyncTcpClient, text: str, chunk_delay: float) -> None:
+    """Send text word by word as a text stream."""
+    await client.write_event(SynthesizeStart().event())
+    for word in text.split(" "):
+        await client.write_event(SynthesizeChunk(text=word + " ").event())
+        if chunk_delay > 0:
+            await asyncio.sleep(chunk_delay)
+
+    await client.write_event(SynthesizeStop().event())
+
+
+async def run_request(
+    client: AsyncTcpClient, text: str, mode: str, args: argparse.Namespace
+) -> RequestResult:
+    """Send one request and time its audio."""
+    result = RequestResult(mode, args.sentences)
+    sending: asyncio.Task | None = None
+    start_time = time.perf_counter()
+    if mode == "synthesize":
+        await client.write_event(Synthesize(text=text).event())
+        reading = read_audio(client, result, start_time, AudioStop().event().type)
+    else:
+        sending = asyncio.create_task(
+            send_stream(client, text, args.chunk_delay_ms / 1000)
+        )
+        reading = read_audio(
+            client, result, start_time, SynthesizeStopped().event().type
+        )
+
+    try:
+        await asyncio.wait_for(reading, args.timeout)
+    except TimeoutError:
+        result.error = "timeout"
+
+    if sending is not None:
+        sending.cancel()
+
+    return result
+
+
+async def run_client(
+    client_id: int, port: int, args: argparse.Namespace
+) -> list[RequestResult]:
+    """Send all requests of one client, each on a new connection.
+
+    Like Home Assistant, every request gets its own connection, since the
+    server ignores synthesize events on a connection that streamed text.
+    """
+    results = []
+    for request_id in range(args.requests):
+        mode = args.mode
+        if mode == "mixed":
+            mode = ("synthesize", "stream")[(client_id + request_id) % 2]
+
+        text = make_text(client_id, request_id, args.sentences)
+        async with AsyncTcpClient(HOST, port) as client:
+            results.append(await run_request(client, text, mode, args))
+
+    return results
+
+
+def read_rss_mb(pid: int) -> float | None:
+    """Return the resident memory of a process in MiB, if known."""
+    try:
+        with open(f"/proc/{pid}/status", encoding="utf-8") as status_file:
+            for line in status_file:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+
+    return None
+
+
+async def sample_rss(pid: int, samples: list[float]) -> None:
+    """Sample the resident memory of a process until cancelled."""
+    while True:
+        rss = read_rss_mb(pid)
+        if rss is not None:
+            samples.append(rss)
+
+        await asyncio.sleep(RSS_INTERVAL)
+
+
+def free_port() -> int:
+    """Return a TCP port nobody listens on."""
+    with socket.socket() as sock:
+        sock.bind((HOST, 0))
+        return sock.getsockname()[1]
+
+
+async def wait_for_server(port: int, server: subprocess.Popen) -> None:
+    """Wait until the server describes itself."""
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"Server exited with {server.returncode}")
+
+        try:
+            async with AsyncTcpClient(HOST, port) as client:
+                await client.write_event(Describe().event())
+                event = await client.read_event()
+                if (event is not None) and Info.is_type(event.type):
+                    return
+        except OSError:
+            await asyncio.sleep(0.1)
+
+    raise TimeoutError("Server did not start")
+
+
+def start_server(
+    port: int, download_dir: str, args: argparse.Namespace
+) -> subprocess.Popen:
+    """Start the server with the fake backend."""
+    command = [
+        sys.executable,
+        "-m",
+        "wyoming_microsoft_tts",
+        "--backend",
+        "fake",
+        "--uri",
+        f"tcp://{HOST}:{port}",
+        "--download-dir",
+        download_dir,
+        "--fake-latency-ms",
+        str(args.latency_ms),
+        "--fake-jitter-ms",
+        str(args.jitter_ms),
+        "--max-concurrent-synthesis",
+        str(args.clients),
+        "--max-queued-synthesis",
+        str(args.clients * args.sentences),
+        "--stream-audio",
+        *args.server_args,
+    ]
+    return subprocess.Popen(
+        command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+
+def percentiles(values: list[float]) -> dict[str, float | None]:
+    """Return the 50th, 95th and 99th percentile of values in milliseconds."""
+    if len(values) < 2:
+        value = round(values[0] * 1000, 2) if values else None
+        return {"p50": value, "p95": value, "p99": value}
+
+    cuts = statistics.quantiles(values, n=100, method="inclusive")
+    return {
+        "p50": round(cuts[49] * 1000, 2),
+        "p95": round(cuts[94] * 1000, 2),
+        "p99": round(cuts[98] * 1000, 2),
+    }
+
+
+def summarize(
+    results: list[RequestResult], duration: float, rss: list[float]
+) -> dict[str, Any]:
+    """Return the results of a run as JSON-compatible values."""
+    completed = [result for result in results if result.error is None]
+    num_sentences = sum(result.num_sentences for result in completed)
+    return {
+        "requests": len(results),
+        "failed": len(results) - len(completed),
+        "errors": dict(Counter(r.error for r in results if r.error is not None)),
+        "duration_s": round(duration, 3),
+        "sentences_per_second": round(num_sentences / duration, 2),
+        "first_audio_ms": percentiles(
+            [r.first_audio for r in completed if r.first_audio is not None]
+        ),
+        "latency_ms": percentiles([r.latency for r in completed if r.latency]),
+        "server_rss_mb": {
+            "start": round(rss[0], 1) if rss else None,
+            "peak": round(max(rss), 1) if rss else None,
+            "end": round(rss[-1], 1) if rss else None,
+        },
+    }
+
+
+async def run_benchmark(args: argparse.Namespace) -> dict[str, Any]:
+    """Start the server, run all clients and return the summary."""
+    port = free_port()
+    with tempfile.TemporaryDirectory() as download_dir:
+        server = start_server(port, download_dir, args)
+        try:
+            await wait_for_server(port, server)
+            rss: list[float] = []
+            rss_task = asyncio.create_task(sample_rss(server.pid, rss))
+            start_time = time.perf_counter()
+            client_results = await asyncio.gather(
+                *(
+                    run_client(client_id, port, args)
+                    for client_id in range(args.clients)
+                )
+            )
+            duration = time.perf_counter() - start_time
+            rss_task.cancel()
+        finally:
+            server.terminate()
+            try:
+                server.wait(5)
+            except subprocess.TimeoutExpired:
+                server.kill()
+                server.wait()
+
+    results = [result for results in client_results for result in results]
+    return summarize(results, duration, rss)
+
+
+def git_commit() -> str | None:
+    """Return the commit of the working tree, if in a git repository."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def get_value(results: dict[str, Any], name: str, key: str | None) -> Any:
+    """Return a compared value from results."""
+    value = results.get(name)
+    if (key is not None) and isinstance(value, dict):
+        value = value.get(key)
+
+    return value
+
+
+def print_comparison(baseline: dict[str, Any], results: dict[str, Any]) -> None:
+    """Print how results changed compared to baseline."""
+    print(f"Compared to {baseline.get('commit') or 'baseline'}:")  # noqa: T201
+    for name, key, higher_is_better in COMPARED:
+        old = get_value(baseline, name, key)
+        new = get_value(results, name, key)
+        label = f"{name} {key}" if key else name
+        if not old or (new is None):
+            print(f"{label:>28}: n/a")  # noqa: T201
+            continue
+
+        change = (new - old) / old
+        is_better = (change > 0) == higher_is_better
+        print(  # noqa: T201
+            f"{label:>28}: {old:10.2f} -> {new:10.2f} ({change:+.1%}, "
+            + ("better" if is_better or change == 0 else "worse")
+            + ")"
+        )
+
+
+def print_results(results: dict[str, Any]) -> None:
+    """Print the summary of a run."""
+    config = results["config"]
+    print(  # noqa: T201
+        f"{config['clients']} clients x {config['requests']} {config['mode']} requests"
+        f" of {config['sentences']} sentences, {config['latency_ms']:g} ms latency"
+    )
+    print(  # noqa: T201
+        f"{results['requests']} requests, {results['failed']} failed {results['errors']}"
+        f" in {results['duration_s']:.2f} s:"
+        f" {results['sentences_per_second']:.1f} sentences/s"
+    )
+    for name in ("first_audio_ms", "latency_ms"):
+        values = results[name]
+        print(  # noqa: T201
+            f"{name:>15}: "
+            + ", ".join(f"{key} {value}" for key, value in values.items())
+        )
+
+    rss = results["server_rss_mb"]
+    print(  # noqa: T201
+        f"{'server RSS MiB':>15}: "
+        + ", ".join(f"{key} {value}" for key, value in rss.items())
+    )
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=10, help="Per client")
+    parser.add_argument(
+        "--mode", choices=("synthesize", "stream", "mixed"), default="mixed"
+    )
+    parser.add_argument("--sentences", type=int, default=3, help="Per request")
+    parser.add_argument(
+        "--chunk-delay-ms",
+        type=float,
+        default=0.0,
+        help="Pause between the words of a text stream",
+    )
+    parser.add_argument("--latency-ms", type=float, default=100.0)
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument(
+        "--timeout", type=float, default=30.0, help="Seconds per request"
+    )
+    parser.add_argument("--output", help="Save the results to this JSON file")
+    parser.add_argument("--compare", help="JSON file of earlier results")
+    parser.add_argument("server_args", nargs="*", help="Passed to the server")
+    args = parser.parse_args()
+
+    results = asyncio.run(run_benchmark(args))
+    results = {
+        "commit": git_commit(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "config": {
+            name: getattr(args, name)
+            for name in (
+                "clients",
+                "requests",
+                "mode",
+                "sentences",
+                "chunk_delay_ms",
+                "latency_ms",
+                "jitter_ms",
+                "server_args",
+            )
+        },
+        **results,
+    }
+    print_results(results)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as baseline_file:
+            print_comparison(json.load(baseline_file), results)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2) + "\n")
+        print(f"Saved results to {args.output}")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
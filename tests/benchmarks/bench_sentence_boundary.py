@@ -0,0 +1,129 @@
+"""Benchmark feeding streamed text to SentenceBoundaryDetector.
+
+Feeds text in 1-character chunks, the way some LLMs stream, and compares the
+old detector (which searched the whole buffer for every chunk) against the
+incremental one. The "paragraph" text has no sentence boundary at all, the
+worst case for the old detector, which takes seconds for a single kilobyte
+of it. The old detector therefore only gets --old-kilobytes of text.
+
+    python -m tests.benchmarks.bench_sentence_boundary --kilobytes 100
+"""
+
+import argparse
+import time
+from collections.abc import Iterable
+
+from wyoming_microsoft_tts.sentence_boundary import (
+    ABBREVIATION_RE,
+    SENTENCE_BOUNDARY_RE,
+    SentenceBoundaryDetector,
+    remove_asterisks,
+)
+
+# Incremental detector must at least reach this on every text
+TARGET_KB_PER_SEC = 200.0
+
+
+class SearchAllDetector:
+    """Sentence boundary detector as it used to be."""
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self.remaining_text = ""
+        self.current_sentence = ""
+
+    def add_chunk(self, chunk: str) -> Iterable[str]:
+        """Add a chunk of text and yield complete sentences."""
+        self.remaining_text += chunk
+        while self.remaining_text:
+            match = SENTENCE_BOUNDARY_RE.search(self.remaining_text)
+            if not match:
+                break
+
+            match_text = match.group(0)
+
+            if not self.current_sentence:
+                self.current_sentence = match_text
+            elif ABBREVIATION_RE.search(self.current_sentence[-5:]):
+                self.current_sentence += match_text
+            else:
+                yield remove_asterisks(self.current_sentence.strip())
+                self.current_sentence = match_text
+
+            if not ABBREVIATION_RE.search(self.current_sentence[-5:]):
+                yield remove_asterisks(self.current_sentence.strip())
+                self.current_sentence = ""
+
+            self.remaining_text = self.remaining_text[match.end() :]
+
+    def finish(self) -> str:
+        """Return the remaining text as a single item."""
+        text = (self.current_sentence + self.remaining_text).strip()
+        self.remaining_text = ""
+        self.current_sentence = ""
+
+        return remove_asterisks(text)
+
+
+def make_text(kind: str, size: int) -> str:
+    """Return size characters of text."""
+    if kind == "paragraph":
+        unit = "and the lights in the kitchen are on, "
+    else:
+        unit = "The lights are on. Dr. Smith is home! Is the door locked? "
+
+    return (unit * (size // len(unit) + 1))[:size]
+
+
+def measure(detector_class, text: str) -> tuple[float, int]:
+    """Return the seconds taken and number of sentences found."""
+    detector = detector_class()
+    num_sentences = 0
+    start = time.perf_counter()
+    for char in text:
+        for _sentence in detector.add_chunk(char):
+            num_sentences += 1
+
+    if detector.finish():
+        num_sentences += 1
+
+    return time.perf_counter() - start, num_sentences
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--kilobytes", type=float, default=100.0)
+    parser.add_argument(
+        "--old-kilobytes",
+        type=float,
+        default=0.25,
+        help="Text for the old detector (0 to skip it)",
+    )
+    args = parser.parse_args()
+
+    detectors = [("incremental", SentenceBoundaryDetector, args.kilobytes)]
+    if args.old_kilobytes > 0:
+        detectors.insert(0, ("search all", SearchAllDetector, args.old_kilobytes))
+
+    is_on_target = True
+    for kind in ("paragraph", "sentences"):
+        for name, detector_class, kilobytes in detectors:
+            size = int(kilobytes * 1000)
+            seconds, num_sentences = measure(detector_class, make_text(kind, size))
+            kb_per_sec = size / 1000 / seconds
+            print(  # noqa: T201
+                f"{kind:>10} {name:>12}: {kilobytes:6.2f} kB in {seconds:7.3f} s, "
+                f"{kb_per_sec:9.1f} kB/s, {num_sentences} sentence(s)"
+            )
+            if detector_class is SentenceBoundaryDetector:
+                is_on_target = is_on_target and (kb_per_sec >= TARGET_KB_PER_SEC)
+
+    print(  # noqa: T201
+        f"Target of {TARGET_KB_PER_SEC:.0f} kB/s "
+        + ("reached" if is_on_target else "NOT reached")
+    )
+
+
+if __name__ == "__main__":
+    main()
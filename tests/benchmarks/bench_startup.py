@@ -0,0 +1,91 @@
+"""Benchmark loading the voice catalog during startup.
+
+Loads the embedded voices (parsed and transformed) and a downloaded
+voices.json (parsed), each without and with a compiled catalog, and builds
+the Wyoming info for all voices, the other large startup cost.
+
+    python -m tests.benchmarks.bench_startup --repeat 20
+"""
+
+import argparse
+import json
+import logging
+import statistics
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+from types import SimpleNamespace
+
+from wyoming_microsoft_tts.__main__ import get_aliases, get_wyoming_info
+from wyoming_microsoft_tts.download import _get_country, get_voices
+
+# Loading from a compiled catalog must at least be this many times faster
+TARGET_SPEEDUP = 2.0
+
+
+def measure(run: Callable[[], object], repeat: int) -> float:
+    """Return the median seconds taken by run."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+
+    return statistics.median(times)
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    # Unknown countries are logged for every load
+    logging.disable(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        download_dir = Path(temp_dir)
+
+        def load_uncompiled(catalog_name: str) -> None:
+            (download_dir / catalog_name).unlink(missing_ok=True)
+            _get_country.cache_clear()
+            get_voices(download_dir)
+
+        embedded_parse = measure(
+            lambda: load_uncompiled("voices-embedded.catalog"), args.repeat
+        )
+        embedded_catalog = measure(lambda: get_voices(download_dir), args.repeat)
+
+        voices = get_voices(download_dir)
+        with open(download_dir / "voices.json", "w", encoding="utf-8") as voices_file:
+            json.dump(voices, voices_file, indent=4)
+
+        download_parse = measure(lambda: load_uncompiled("voices.catalog"), args.repeat)
+        download_catalog = measure(lambda: get_voices(download_dir), args.repeat)
+
+    voices.update(get_aliases(voices))
+    info_args = SimpleNamespace(
+        voice="en-GB-SoniaNeural", voice_filter=None, no_streaming=False
+    )
+    wyoming_info = measure(lambda: get_wyoming_info(info_args, voices), args.repeat)
+
+    print(f"{len(voices)} voices, median of {args.repeat} runs")  # noqa: T201
+    for name, seconds in (
+        ("embedded, parsed", embedded_parse),
+        ("embedded, catalog", embedded_catalog),
+        ("downloaded, parsed", download_parse),
+        ("downloaded, catalog", download_catalog),
+        ("wyoming info", wyoming_info),
+    ):
+        print(f"{name:>20}: {seconds * 1000:7.1f} ms")  # noqa: T201
+
+    speedup = min(embedded_parse / embedded_catalog, download_parse / download_catalog)
+    print(  # noqa: T201
+        f"Catalog speedup {speedup:.1f}x, target of {TARGET_SPEEDUP:.0f}x "
+        + ("reached" if speedup >= TARGET_SPEEDUP else "NOT reached")
+    )
+
+
+if __name__ == "__main__":
+    main()
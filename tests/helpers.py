@@ -0,0 +1,133 @@
+"""Helpers for tests that run the event handler."""
+
+import asyncio
+import io
+from types import SimpleNamespace
+
+from wyoming.event import read_event
+from wyoming.info import Info
+
+from wyoming_microsoft_tts.catalog import VoiceCatalog
+from wyoming_microsoft_tts.executor import SynthesisExecutor
+from wyoming_microsoft_tts.fake_backend import FakeBackend
+from wyoming_microsoft_tts.handler import MicrosoftEventHandler
+
+VOICES = {
+    "en-GB-SoniaNeural": {"key": "en-GB-SoniaNeural", "styles": ["cheerful", "sad"]},
+    "en-US-JennyNeural": {"key": "en-US-JennyNeural", "styles": []},
+}
+
+
+class FakeWriter:
+    """Collect everything the handler writes."""
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self.buffer = io.BytesIO()
+
+    def write(self, data) -> None:
+        """Write data."""
+        self.buffer.write(data)
+
+    def writelines(self, lines) -> None:
+        """Write several pieces of data."""
+        for line in lines:
+            self.buffer.write(line)
+
+    async def drain(self) -> None:
+        """Pretend to flush."""
+
+    def events(self):
+        """Parse the written data back into events."""
+        reader = io.BytesIO(self.buffer.getvalue())
+        events = []
+        while (event := read_event(reader)) is not None:
+            events.append(event)
+
+        return events
+
+
+class RecordingBackend(FakeBackend):
+    """Fake backend that remembers what it was asked to synthesize."""
+
+    def __init__(self, *args, **kwargs) -> None:
+        """Initialize."""
+        super().__init__(*args, **kwargs)
+        self.texts: list[str] = []
+        self.prosodies: list = []
+
+    def synthesize(self, text, voice=None, prosody=None):
+        """Record the request and return silence."""
+        self.texts.append(text)
+        self.prosodies.append(prosody)
+        return super().synthesize(text, voice=voice, prosody=prosody)
+
+    def synthesize_stream(self, text, on_audio, voice=None, prosody=None) -> bool:
+        """Record the request and pass silence to on_audio."""
+        self.texts.append(text)
+        self.prosodies.append(prosody)
+        return super().synthesize_stream(text, on_audio, voice=voice, prosody=prosody)
+
+
+def make_backend(**kwargs) -> RecordingBackend:
+    """Return a recording fake backend without latency."""
+    args = SimpleNamespace(
+        voice="en-GB-SoniaNeural",
+        rate=None,
+        pitch=None,
+        volume=None,
+        style=None,
+        style_degree=None,
+    )
+    kwargs.setdefault("voices", VOICES)
+    kwargs.setdefault("latency", 0.0)
+    kwargs.setdefault("stream_speed", 1000.0)
+    return RecordingBackend(args, **kwargs)
+
+
+def make_args(**kwargs) -> SimpleNamespace:
+    """Return handler arguments."""
+    args = {
+        "voice": "en-GB-SoniaNeural",
+        "auto_punctuation": ".?!",
+        "samples_per_chunk": 1024,
+        "no_streaming": False,
+        "stream_audio": True,
+        "stream_prefetch": 2,
+        "stream_batch_chars": 0,
+        "first_clause_chars": 0,
+        "first_clause_ms": 0.0,
+    }
+    args.update(kwargs)
+    return SimpleNamespace(**args)
+
+
+def run_handler(
+    events, backend, executor=None, audio_cache=None, phrase_store=None, **kwargs
+):
+    """Feed events to a handler and return what it wrote."""
+    writer = FakeWriter()
+
+    async def run():
+        nonlocal executor
+        if executor is None:
+            executor = SynthesisExecutor(max_workers=2, max_queued=2)
+
+        handler = MicrosoftEventHandler(
+            VoiceCatalog(backend.voices, Info()),
+            make_args(**kwargs),
+            backend,
+            executor,
+            asyncio.StreamReader(),
+            writer,
+            audio_cache=audio_cache,
+            phrase_store=phrase_store,
+        )
+        try:
+            for event in events:
+                await handler.handle_event(event)
+        finally:
+            executor.shutdown()
+
+    asyncio.run(run())
+    return writer.events()
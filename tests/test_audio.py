@@ -0,0 +1,50 @@
+"""Tests for sending audio chunks."""
+
+import asyncio
+
+from wyoming.audio import AudioChunk
+from wyoming.event import async_write_event
+
+from wyoming_microsoft_tts.audio import AudioChunkWriter, iter_chunks
+
+from .helpers import FakeWriter
+
+
+def test_iter_chunks_does_not_copy():
+    """Test that chunks are views of the original audio."""
+    audio = bytes(range(10))
+    chunks = list(iter_chunks(audio, 4))
+
+    assert [bytes(chunk) for chunk in chunks] == [
+        bytes([0, 1, 2, 3]),
+        bytes([4, 5, 6, 7]),
+        bytes([8, 9]),
+    ]
+    assert all(chunk.obj is audio for chunk in chunks)
+
+
+def test_chunk_writer_matches_wyoming_events():
+    """Test that the written bytes are the same as wyoming's own events."""
+    audio = bytes(range(256)) * 40
+    expected = FakeWriter()
+    actual = FakeWriter()
+
+    async def run():
+        for chunk in iter_chunks(audio, 2 * 100):
+            await async_write_event(
+                AudioChunk(rate=16000, width=2, channels=1, audio=chunk).event(),
+                expected,
+            )
+
+        chunk_writer = AudioChunkWriter(
+            actual, rate=16000, width=2, channels=1, samples_per_chunk=100
+        )
+        await chunk_writer.write(audio)
+
+    asyncio.run(run())
+
+    assert actual.buffer.getvalue() == expected.buffer.getvalue()
+
+    chunks = [AudioChunk.from_event(event) for event in actual.events()]
+    assert b"".join(chunk.audio for chunk in chunks) == audio
+    assert all(chunk.rate == 16000 for chunk in chunks)
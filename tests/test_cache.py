@@ -0,0 +1,95 @@
+"""Tests for the synthesized audio cache."""
+
+import asyncio
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from wyoming_microsoft_tts.cache import AudioCache, make_cache_key
+from wyoming_microsoft_tts.metrics import METRICS
+
+
+def test_cache_key_normalizes_whitespace():
+    """Test that whitespace differences share a key but parameters don't."""
+    key = make_cache_key("Timer done.", "en-GB-SoniaNeural", None)
+
+    assert make_cache_key("  Timer \n done. ", "en-GB-SoniaNeural", None) == key
+    assert make_cache_key("Timer done.", "en-US-JennyNeural", None) != key
+    assert make_cache_key("Timer done.", "en-GB-SoniaNeural", "+10%") != key
+
+
+def test_memory_tier_evicts_least_recently_used():
+    """Test that the memory tier stays within its byte budget."""
+
+    hits = METRICS.cache_hits.get()
+    misses = METRICS.cache_misses.get()
+
+    async def run():
+        cache = AudioCache(max_memory_bytes=250)
+        cache.put("a", bytes(100))
+        cache.put("b", bytes(100))
+        assert await cache.get("a") is not None
+
+        # "b" is now the least recently used
+        cache.put("c", bytes(100))
+        assert cache.memory_bytes == 200
+        assert await cache.get("b") is None
+        assert await cache.get("a") is not None
+        assert await cache.get("c") is not None
+
+        # Too big to cache at all
+        cache.put("d", bytes(300))
+        assert await cache.get("d") is None
+
+        assert cache.hits == 3
+        assert cache.misses == 2
+
+    asyncio.run(run())
+
+    assert METRICS.cache_hits.get() == hits + 3
+    assert METRICS.cache_misses.get() == misses + 2
+
+
+def test_disk_tier_survives_restart():
+    """Test that audio on disk is found by a new cache instance."""
+
+    async def store(disk_dir):
+        cache = AudioCache(max_memory_bytes=0, disk_dir=disk_dir, max_disk_bytes=1000)
+        cache.put("a", b"audio")
+        await asyncio.gather(*cache._background_tasks)
+
+    async def load(disk_dir):
+        cache = AudioCache(
+            max_memory_bytes=1000, disk_dir=disk_dir, max_disk_bytes=1000
+        )
+        assert cache.disk_bytes == 5
+        return await cache.get("a")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        asyncio.run(store(temp_dir))
+        assert asyncio.run(load(temp_dir)) == b"audio"
+
+
+def test_disk_tier_size_cap_and_ttl():
+    """Test that the disk tier drops old and expired entries."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache = AudioCache(
+            max_memory_bytes=0, disk_dir=temp_dir, max_disk_bytes=250, disk_ttl=60
+        )
+        cache._save("a", bytes(100))
+        cache._save("b", bytes(100))
+        cache._save("c", bytes(100))
+
+        assert cache.disk_bytes == 200
+        assert cache._load("a") is None
+        assert sorted(path.stem for path in Path(temp_dir).iterdir()) == ["b", "c"]
+
+        # Expired by age
+        old = time.time() - 120
+        os.utime(Path(temp_dir) / "b.pcm", (old, old))
+        cache = AudioCache(
+            max_memory_bytes=0, disk_dir=temp_dir, max_disk_bytes=250, disk_ttl=60
+        )
+        assert cache._load("b") is None
+        assert cache._load("c") == bytes(100)
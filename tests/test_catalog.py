@@ -0,0 +1,110 @@
+"""Tests for refreshing the voice catalog."""
+
+import asyncio
+from unittest.mock import patch
+
+from wyoming.event import async_write_event
+from wyoming.info import Attribution, Describe, Info, TtsProgram
+
+from wyoming_microsoft_tts.catalog import VoiceCatalog, refresh_voices
+from wyoming_microsoft_tts.executor import SynthesisExecutor
+from wyoming_microsoft_tts.handler import MicrosoftEventHandler
+
+from .helpers import FakeWriter, make_args, make_backend
+
+
+def make_info(name: str) -> Info:
+    """Return info with a single program."""
+    return Info(
+        tts=[
+            TtsProgram(
+                name=name,
+                description=None,
+                attribution=Attribution(name="", url=""),
+                installed=True,
+                version=None,
+                voices=[],
+            )
+        ]
+    )
+
+
+def test_refresh_swaps_voices_and_info():
+    """Test that a changed voice list replaces the voices and info clients see."""
+    catalog = VoiceCatalog({"old": {}}, make_info("old"))
+    writer = FakeWriter()
+
+    async def run():
+        updated = asyncio.Event()
+        executor = SynthesisExecutor(max_workers=1, max_queued=1)
+        handler = MicrosoftEventHandler(
+            catalog,
+            make_args(),
+            make_backend(),
+            executor,
+            asyncio.StreamReader(),
+            writer,
+        )
+        await handler.handle_event(Describe().event())
+        with patch(
+            "wyoming_microsoft_tts.catalog.download_voices",
+            side_effect=[False, True, False],
+        ):
+            refresh_task = asyncio.create_task(
+                refresh_voices(
+                    catalog,
+                    "/tmp",
+                    region="westus",
+                    key="",
+                    load=lambda: ({"new": {}}, make_info("new")),
+                    interval=0,
+                    on_update=lambda _voices: updated.set(),
+                )
+            )
+            await updated.wait()
+            await handler.handle_event(Describe().event())
+            refresh_task.cancel()
+
+        executor.shutdown()
+
+    asyncio.run(run())
+
+    assert catalog.voices == {"new": {}}
+    infos = [Info.from_event(event) for event in writer.events()]
+    assert [info.tts[0].name for info in infos] == ["old", "new"]
+
+
+def test_refresh_keeps_voices_on_invalid_list():
+    """Test that a voice list without the default voice is not used."""
+    catalog = VoiceCatalog({"old": {}}, make_info("old"))
+
+    async def run():
+        loaded = asyncio.Event()
+
+        def load():
+            loaded.set()
+            raise ValueError("Default voice missing")
+
+        with patch("wyoming_microsoft_tts.catalog.download_voices", return_value=True):
+            refresh_task = asyncio.create_task(
+                refresh_voices(
+                    catalog, "/tmp", region="westus", key="", load=load, interval=0
+                )
+            )
+            await loaded.wait()
+            await asyncio.sleep(0)
+            refresh_task.cancel()
+
+    asyncio.run(run())
+
+    assert catalog.voices == {"old": {}}
+    assert catalog.info.tts[0].name == "old"
+
+
+def test_info_bytes_match_wyoming():
+    """Test that the serialized info is what wyoming would write."""
+    info = make_info("microsoft")
+    writer = FakeWriter()
+    asyncio.run(async_write_event(info.event(), writer))
+
+    assert VoiceCatalog({}, info).info_bytes == writer.buffer.getvalue()
@@ -0,0 +1,104 @@
+"""Tests for coalescing identical synthesis requests."""
+
+import asyncio
+
+from wyoming_microsoft_tts.coalesce import SynthesisCoalescer
+
+
+def drain(queue: asyncio.Queue) -> list[bytes]:
+    """Return everything on a queue."""
+    items = []
+    while not queue.empty():
+        items.append(queue.get_nowait())
+
+    return items
+
+
+def test_identical_requests_share_one_synthesis():
+    """Test that a request joining late still gets all audio."""
+
+    async def run():
+        coalescer = SynthesisCoalescer()
+        release = asyncio.Event()
+        calls = 0
+
+        async def synthesize(on_audio):
+            nonlocal calls
+            calls += 1
+            on_audio(b"a")
+            await release.wait()
+            on_audio(b"b")
+            return True
+
+        first_queue: asyncio.Queue = asyncio.Queue()
+        second_queue: asyncio.Queue = asyncio.Queue()
+        first = asyncio.create_task(coalescer.run("key", first_queue, synthesize))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(coalescer.run("key", second_queue, synthesize))
+        await asyncio.sleep(0)
+        assert "key" in coalescer
+
+        release.set()
+        assert await first
+        assert await second
+        assert calls == 1
+        assert coalescer.coalesced == 1
+        assert "key" not in coalescer
+        assert drain(first_queue) == [b"a", b"b"]
+        assert drain(second_queue) == [b"a", b"b"]
+
+        # Nothing in flight, so synthesize again
+        assert await coalescer.run("key", asyncio.Queue(), synthesize)
+        assert calls == 2
+
+    asyncio.run(run())
+
+
+def test_cancelled_request_does_not_stop_others():
+    """Test that the synthesis keeps going when one client goes away."""
+
+    async def run():
+        coalescer = SynthesisCoalescer()
+        release = asyncio.Event()
+
+        async def synthesize(on_audio):
+            await release.wait()
+            on_audio(b"a")
+            return True
+
+        first_queue: asyncio.Queue = asyncio.Queue()
+        second_queue: asyncio.Queue = asyncio.Queue()
+        first = asyncio.create_task(coalescer.run("key", first_queue, synthesize))
+        second = asyncio.create_task(coalescer.run("key", second_queue, synthesize))
+        await asyncio.sleep(0)
+
+        first.cancel()
+        await asyncio.sleep(0)
+        release.set()
+
+        assert await second
+        assert first.cancelled()
+        assert drain(first_queue) == []
+        assert drain(second_queue) == [b"a"]
+
+    asyncio.run(run())
+
+
+def test_failure_reaches_every_request():
+    """Test that all requests see the error of a shared synthesis."""
+
+    async def run():
+        coalescer = SynthesisCoalescer()
+
+        async def synthesize(on_audio):
+            await asyncio.sleep(0)
+            raise RuntimeError("Synthesis failed")
+
+        results = await asyncio.gather(
+            coalescer.run("key", asyncio.Queue(), synthesize),
+            coalescer.run("key", asyncio.Queue(), synthesize),
+            return_exceptions=True,
+        )
+        assert [str(result) for result in results] == ["Synthesis failed"] * 2
+
+    asyncio.run(run())
@@ -0,0 +1,93 @@
+"""Tests for converting audio between formats."""
+
+import pytest
+from wyoming.audio import AudioFormat
+
+from wyoming_microsoft_tts.convert import AudioConverter
+
+np = pytest.importorskip("numpy")
+
+SOURCE = AudioFormat(rate=24000, width=2, channels=1)
+
+
+def make_tone(frequency: float, rate: int, seconds: float = 1.0):
+    """Return a sine tone as 16-bit samples."""
+    times = np.arange(int(rate * seconds)) / rate
+    return np.rint(np.sin(2 * np.pi * frequency * times) * 10000)
+
+
+def convert_all(converter: AudioConverter, audio: bytes, block_size: int) -> bytes:
+    """Convert audio in blocks of block_size bytes, then flush."""
+    converted = [
+        converter.convert(audio[offset : offset + block_size])
+        for offset in range(0, len(audio), block_size)
+    ]
+    return b"".join(converted) + converter.flush()
+
+
+def test_resample_keeps_tone():
+    """Test that a lower rate keeps the length and shape of a tone."""
+    audio = make_tone(440, 24000).astype("<i2").tobytes()
+    target = AudioFormat(rate=16000, width=2, channels=1)
+    converted = np.frombuffer(
+        convert_all(AudioConverter(SOURCE, target), audio, len(audio)), "<i2"
+    )
+
+    assert len(converted) == 16000
+    expected = make_tone(440, 16000)
+    assert np.abs(converted[100:-100] - expected[100:-100]).max() < 100
+
+
+def test_lower_rate_removes_high_frequencies():
+    """Test that tones above the new Nyquist frequency don't alias."""
+    audio = make_tone(10000, 24000).astype("<i2").tobytes()
+    target = AudioFormat(rate=16000, width=2, channels=1)
+    converted = np.frombuffer(
+        convert_all(AudioConverter(SOURCE, target), audio, len(audio)), "<i2"
+    )
+
+    assert np.abs(converted[100:-100]).max() < 100
+
+
+@pytest.mark.parametrize(
+    "target",
+    [
+        AudioFormat(rate=16000, width=2, channels=1),
+        AudioFormat(rate=22050, width=1, channels=1),
+        AudioFormat(rate=48000, width=4, channels=2),
+    ],
+)
+def test_blocks_convert_like_whole_audio(target):
+    """Test that converting in odd-sized blocks gives the same audio."""
+    audio = make_tone(440, 24000, seconds=0.1).astype("<i2").tobytes()
+    whole = convert_all(AudioConverter(SOURCE, target), audio, len(audio))
+    blocks = convert_all(AudioConverter(SOURCE, target), audio, 777)
+
+    assert blocks == whole
+
+
+def test_width_and_channels():
+    """Test converting sample width and channels at the same rate."""
+    audio = np.array([0, 16384, -32768], dtype="<i2").tobytes()
+    converter = AudioConverter(SOURCE, AudioFormat(rate=24000, width=1, channels=2))
+
+    assert converter.convert(audio) == bytes([128, 128, 192, 192, 0, 0])
+
+    stereo = np.array([100, 300, -200, 0], dtype="<i2").tobytes()
+    converter = AudioConverter(
+        AudioFormat(rate=24000, width=2, channels=2),
+        AudioFormat(rate=24000, width=2, channels=1),
+    )
+    assert np.frombuffer(converter.convert(stereo), "<i2").tolist() == [200, -100]
+
+
+def test_invalid_format():
+    """Test that unsupported formats are rejected up front."""
+    with pytest.raises(ValueError):
+        AudioConverter(SOURCE, AudioFormat(rate=24000, width=3, channels=1))
+
+    with pytest.raises(ValueError):
+        AudioConverter(SOURCE, AudioFormat(rate=24000, width=2, channels=6))
+
+    with pytest.raises(ValueError):
+        AudioConverter(SOURCE, AudioFormat(rate=1000, width=2, channels=1))
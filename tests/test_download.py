@@ -1,11 +1,15 @@
 """Tests for download functionality."""
 
+import io
+import json
 import logging
 import tempfile
+from email.message import Message
 from pathlib import Path
 from unittest.mock import patch
+from urllib.error import HTTPError
 
-from wyoming_microsoft_tts.download import get_voices
+from wyoming_microsoft_tts.download import download_voices, get_voices, read_catalog
 
 
 def test_get_voices_download_failure_logs_error(caplog):
@@ -73,3 +77,100 @@ def test_get_voices_without_update_uses_embedded():
         # Should return voices from embedded file
         assert isinstance(voices, dict)
         assert len(voices) > 0
+
+
+def test_get_voices_uses_compiled_catalog():
+    """Test that voices are compiled once and then loaded from the catalog."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        voices = get_voices(download_dir=temp_dir)
+        assert (Path(temp_dir) / "voices-embedded.catalog").exists()
+
+        with patch(
+            "wyoming_microsoft_tts.download.transform_voices_files"
+        ) as mock_transform:
+            assert get_voices(download_dir=temp_dir) == voices
+
+        mock_transform.assert_not_called()
+
+
+def test_compiled_catalog_follows_source():
+    """Test that a changed voices.json replaces its compiled catalog."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        voices_path = Path(temp_dir) / "voices.json"
+        voices_path.write_text(json.dumps({"a": {"key": "a"}}), encoding="utf-8")
+        assert get_voices(download_dir=temp_dir) == {"a": {"key": "a"}}
+
+        voices_path.write_text(
+            json.dumps({"b": {"key": "b"}, "c": {"key": "c"}}), encoding="utf-8"
+        )
+        assert set(get_voices(download_dir=temp_dir)) == {"b", "c"}
+
+        # Unreadable catalogs are compiled again
+        catalog_path = Path(temp_dir) / "voices.catalog"
+        catalog_path.write_bytes(b"\xff" * 10)
+        assert set(get_voices(download_dir=temp_dir)) == {"b", "c"}
+        assert read_catalog(catalog_path, voices_path) == {
+            "b": {"key": "b"},
+            "c": {"key": "c"},
+        }
+
+
+def test_shared_catalog_is_ignored():
+    """Test that a catalog others could have written is not loaded."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        voices_path = Path(temp_dir) / "voices.json"
+        voices_path.write_text(json.dumps({"a": {"key": "a"}}), encoding="utf-8")
+        get_voices(download_dir=temp_dir)
+
+        catalog_path = Path(temp_dir) / "voices.catalog"
+        assert catalog_path.stat().st_mode & 0o777 == 0o600
+        assert read_catalog(catalog_path, voices_path) == {"a": {"key": "a"}}
+
+        catalog_path.chmod(0o666)
+        assert read_catalog(catalog_path, voices_path) is None
+
+
+class FakeResponse(io.BytesIO):
+    """Response of the voice list API."""
+
+    def __init__(self, voices, headers) -> None:
+        """Initialize."""
+        super().__init__(json.dumps(voices).encode())
+        self.headers = headers
+
+
+def test_download_voices_is_conditional():
+    """Test that the voice list is only written again when it changed."""
+    voices = [
+        {
+            "ShortName": "en-US-JennyNeural",
+            "Locale": "en-US",
+            "LocalName": "Jenny",
+            "LocaleName": "English (United States)",
+            "VoiceType": "Neural",
+        }
+    ]
+    with (
+        tempfile.TemporaryDirectory() as temp_dir,
+        patch("wyoming_microsoft_tts.download.urlopen") as mock_urlopen,
+    ):
+        mock_urlopen.return_value = FakeResponse(voices, {"ETag": '"1"'})
+        assert download_voices(temp_dir)
+        assert "en-US-JennyNeural" in get_voices(temp_dir)
+
+        # Not modified since the last download
+        mock_urlopen.side_effect = HTTPError("", 304, "Not Modified", Message(), None)
+        assert not download_voices(temp_dir)
+        request = mock_urlopen.call_args.args[0]
+        assert request.get_header("If-none-match") == '"1"'
+
+        # Same list without an ETag
+        mock_urlopen.side_effect = None
+        mock_urlopen.return_value = FakeResponse(voices, {})
+        assert not download_voices(temp_dir)
+
+        # Failed downloads keep the previous list
+        mock_urlopen.side_effect = Exception("Network error")
+        assert not download_voices(temp_dir)
+        assert "en-US-JennyNeural" in get_voices(temp_dir)
+        assert [path.name for path in Path(temp_dir).glob("*.tmp")] == []
@@ -0,0 +1,61 @@
+"""Tests for the bounded synthesis executor."""
+
+import asyncio
+import threading
+
+import pytest
+
+from wyoming_microsoft_tts.executor import SynthesisExecutor, SynthesisQueueFullError
+
+
+def test_run_returns_result_from_worker_thread():
+    """Test that calls run outside the event loop thread."""
+
+    async def run():
+        executor = SynthesisExecutor(max_workers=2, max_queued=0)
+        try:
+            return await executor.run(threading.get_ident), threading.get_ident()
+        finally:
+            executor.shutdown()
+
+    worker_ident, loop_ident = asyncio.run(run())
+    assert worker_ident != loop_ident
+
+
+def test_run_rejects_when_queue_is_full():
+    """Test that requests beyond workers + queue are rejected."""
+    release = threading.Event()
+
+    async def run():
+        executor = SynthesisExecutor(max_workers=1, max_queued=1)
+        try:
+            blocked = [
+                asyncio.ensure_future(executor.run(release.wait)) for _ in range(2)
+            ]
+            await asyncio.sleep(0)
+            assert executor.pending == 2
+
+            with pytest.raises(SynthesisQueueFullError):
+                await executor.run(release.wait)
+
+            release.set()
+            await asyncio.gather(*blocked)
+
+            # Slots are released once the workers finish
+            await asyncio.sleep(0)
+            assert executor.pending == 0
+            assert await executor.run(lambda: 42) == 42
+        finally:
+            release.set()
+            executor.shutdown()
+
+    asyncio.run(run())
+
+
+def test_invalid_limits():
+    """Test that invalid limits are refused."""
+    with pytest.raises(ValueError):
+        SynthesisExecutor(max_workers=0, max_queued=0)
+
+    with pytest.raises(ValueError):
+        SynthesisExecutor(max_workers=1, max_queued=-1)
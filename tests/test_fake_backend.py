@@ -0,0 +1,92 @@
+"""Tests for the offline fake synthesis backend."""
+
+from types import SimpleNamespace
+
+import pytest
+
+from wyoming.audio import AudioChunk
+from wyoming.tts import Synthesize
+
+from wyoming_microsoft_tts.fake_backend import FakeBackend
+
+from .helpers import run_handler
+
+VOICES = {"en-GB-SoniaNeural": {"key": "en-GB-SoniaNeural"}}
+
+
+def make_backend(**kwargs) -> FakeBackend:
+    """Return a fake backend without latency."""
+    args = SimpleNamespace(
+        voice="en-GB-SoniaNeural",
+        rate=None,
+        pitch=None,
+        volume=None,
+        style=None,
+        style_degree=None,
+    )
+    kwargs.setdefault("latency", 0.0)
+    return FakeBackend(args, voices=VOICES, **kwargs)
+
+
+def test_audio_length_follows_text():
+    """Test that longer texts give proportionally longer audio."""
+    backend = make_backend()
+
+    # 15 characters per second of 24 kHz 16-bit mono audio
+    assert len(backend.synthesize("x" * 15)) == 48000
+    assert len(backend.synthesize("x" * 30)) == 96000
+
+
+def test_stream_passes_audio_in_blocks():
+    """Test that streamed audio adds up to the whole audio."""
+    backend = make_backend(stream_speed=1000)
+    blocks: list[bytes] = []
+
+    assert backend.synthesize_stream("x" * 30, blocks.append)
+    assert len(blocks) == 20
+    assert sum(len(block) for block in blocks) == 96000
+
+
+def test_failures_are_reproducible():
+    """Test that the same seed fails the same syntheses."""
+
+    def outcomes(seed: int) -> list[bool]:
+        backend = make_backend(failure_rate=0.5, seed=seed)
+        return [backend.synthesize("Hello.") is not None for _ in range(20)]
+
+    assert outcomes(1) == outcomes(1)
+    assert outcomes(1) != outcomes(2)
+    assert not make_backend(failure_rate=1).synthesize_stream(
+        "Hello.", lambda audio: None
+    )
+
+
+def test_overrides_for_unknown_voice_are_rejected():
+    """Test that prosody overrides for an unknown voice raise ValueError."""
+    backend = make_backend()
+
+    with pytest.raises(ValueError):
+        backend.get_prosody("xx-XX-UnknownNeural", {"rate": "+10%"})
+
+    assert backend.get_prosody("xx-XX-UnknownNeural") == backend.prosody
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [{"latency": -1}, {"jitter": -1}, {"failure_rate": 2}, {"stream_speed": 0}],
+)
+def test_invalid_settings(kwargs):
+    """Test that invalid settings are rejected."""
+    with pytest.raises(ValueError):
+        make_backend(**kwargs)
+
+
+def test_handler_uses_fake_backend():
+    """Test that the handler sends the audio of the fake backend."""
+    events = run_handler(
+        [Synthesize(text="Hello world").event()],
+        make_backend(stream_speed=1000),
+    )
+
+    chunks = [AudioChunk.from_event(event) for event in events[1:-1]]
+    assert sum(len(chunk.audio) for chunk in chunks) == len("Hello world.") * 3200
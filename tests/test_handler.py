@@ -0,0 +1,248 @@
+"""Tests for the Wyoming event handler."""
+
+import pytest
+
+from wyoming.audio import AudioChunk, AudioStart, AudioStop
+from wyoming.error import Error
+from wyoming.tts import (
+    Synthesize,
+    SynthesizeChunk,
+    SynthesizeStart,
+    SynthesizeStop,
+    SynthesizeStopped,
+    SynthesizeVoice,
+)
+
+from wyoming_microsoft_tts.cache import AudioCache
+from wyoming_microsoft_tts.executor import SynthesisExecutor, SynthesisQueueFullError
+from wyoming_microsoft_tts.ssml import Prosody
+
+from .helpers import make_backend, run_handler
+
+
+def test_stream_audio_sends_chunks_as_they_arrive():
+    """Test that streamed audio is forwarded between AudioStart and AudioStop."""
+    backend = make_backend()
+    events = run_handler([Synthesize(text="Hello world").event()], backend)
+
+    assert backend.texts == ["Hello world."]
+    assert AudioStart.is_type(events[0].type)
+    assert AudioStop.is_type(events[-1].type)
+
+    # Blocks of 0.1 seconds are split into chunks of samples_per_chunk
+    chunks = [AudioChunk.from_event(event) for event in events[1:-1]]
+    assert all(len(chunk.audio) <= 1024 * 2 for chunk in chunks)
+    assert all(chunk.rate == 24000 for chunk in chunks)
+    assert sum(len(chunk.audio) for chunk in chunks) == backend.audio_size(
+        "Hello world."
+    )
+
+
+def test_synthesize_sends_audio_in_chunks():
+    """Test that in-memory audio is split into samples_per_chunk chunks."""
+    backend = make_backend()
+    events = run_handler(
+        [Synthesize(text="Hello world").event()],
+        backend,
+        stream_audio=False,
+        samples_per_chunk=8000,
+    )
+
+    assert backend.texts == ["Hello world."]
+    assert AudioStart.is_type(events[0].type)
+    assert AudioStop.is_type(events[-1].type)
+
+    # 38400 bytes of 16-bit audio in chunks of 8000 samples
+    chunks = [AudioChunk.from_event(event) for event in events[1:-1]]
+    assert [len(chunk.audio) for chunk in chunks] == [16000, 16000, 6400]
+
+
+def test_audio_format_comes_from_output_format():
+    """Test that AudioStart and chunks describe the configured output format."""
+    backend = make_backend(output_format="raw-16khz-16bit-mono-pcm")
+    events = run_handler([Synthesize(text="Hello world").event()], backend)
+
+    audio_start = AudioStart.from_event(events[0])
+    assert (audio_start.rate, audio_start.width, audio_start.channels) == (16000, 2, 1)
+    assert AudioChunk.from_event(events[1]).rate == 16000
+
+
+def test_text_stream_sends_sentences_in_order():
+    """Test that streamed sentences are synthesized and sent in order."""
+    backend = make_backend()
+    events = run_handler(
+        [
+            SynthesizeStart().event(),
+            SynthesizeChunk(text="First sentence. Second ").event(),
+            SynthesizeChunk(text="sentence. Third").event(),
+            SynthesizeStop().event(),
+        ],
+        backend,
+    )
+
+    # Sentences are synthesized concurrently, so only check what was requested
+    assert sorted(backend.texts) == [
+        "First sentence.",
+        "Second sentence.",
+        "Third.",
+    ]
+    assert [event.type for event in events if not AudioChunk.is_type(event.type)] == [
+        *(["audio-start", "audio-stop"] * 3),
+        SynthesizeStopped().event().type,
+    ]
+
+    # Each sentence has audio of a different length
+    audio_sizes: list[int] = []
+    for event in events:
+        if AudioStart.is_type(event.type):
+            audio_sizes.append(0)
+        elif AudioChunk.is_type(event.type):
+            audio_sizes[-1] += len(AudioChunk.from_event(event).audio)
+
+    assert audio_sizes == [
+        backend.audio_size(text)
+        for text in ("First sentence.", "Second sentence.", "Third.")
+    ]
+
+
+def test_text_stream_sends_first_clause_early():
+    """Test that the first clause of a long sentence is synthesized on its own."""
+    backend = make_backend()
+    run_handler(
+        [
+            SynthesizeStart().event(),
+            SynthesizeChunk(text="Sure, the lights in the kitchen ").event(),
+            SynthesizeChunk(text="are shining. Done").event(),
+            SynthesizeStop().event(),
+        ],
+        backend,
+        first_clause_chars=10,
+    )
+
+    assert sorted(backend.texts) == [
+        "Done.",
+        "Sure,",
+        "the lights in the kitchen are shining.",
+    ]
+
+
+def test_cached_audio_is_not_synthesized_again():
+    """Test that repeated text is served from the audio cache."""
+    backend = make_backend()
+    audio_cache = AudioCache(max_memory_bytes=100_000)
+    for stream_audio in (False, True):
+        events = run_handler(
+            [
+                Synthesize(text="Timer done").event(),
+                Synthesize(text="Timer done").event(),
+            ],
+            backend,
+            audio_cache=audio_cache,
+            stream_audio=stream_audio,
+        )
+
+        audio = b"".join(
+            AudioChunk.from_event(event).audio
+            for event in events
+            if AudioChunk.is_type(event.type)
+        )
+        assert len(audio) == 2 * backend.audio_size("Timer done.")
+
+    assert backend.texts == ["Timer done."]
+    assert audio_cache.hits == 3
+    assert audio_cache.misses == 1
+
+
+class BusyExecutor(SynthesisExecutor):
+    """Executor that is always full."""
+
+    async def run(self, func, *args, **kwargs):
+        """Reject every call."""
+        raise SynthesisQueueFullError("busy")
+
+
+def test_rejected_request_sends_error():
+    """Test that a full synthesis queue is reported to the client."""
+    events = run_handler(
+        [Synthesize(text="Hello").event()],
+        make_backend(),
+        executor=BusyExecutor(max_workers=1, max_queued=0),
+    )
+
+    assert len(events) == 1
+    error = Error.from_event(events[0])
+    assert error.code == "SynthesisQueueFullError"
+
+
+def test_unknown_voice_sends_error():
+    """Test that a voice the server doesn't offer is reported to the client."""
+    backend = make_backend()
+    events = run_handler(
+        [
+            Synthesize(
+                text="Hello", voice=SynthesizeVoice(name="xx-XX-UnknownNeural")
+            ).event(),
+            Synthesize(text="Bye").event(),
+        ],
+        backend,
+    )
+
+    error = Error.from_event(events[0])
+    assert error.code == "UnknownVoiceError"
+    assert backend.texts == ["Bye."]
+    assert AudioStart.is_type(events[1].type)
+    assert AudioStop.is_type(events[-1].type)
+
+
+def test_prosody_overrides_from_context():
+    """Test that the request context overrides the prosody of a voice."""
+    backend = make_backend()
+    run_handler(
+        [
+            Synthesize(
+                text="Hello", context={"prosody": {"style": "cheerful"}}
+            ).event(),
+            # Overrides the voice doesn't support are ignored
+            Synthesize(text="Bye", context={"prosody": {"style": "angry"}}).event(),
+            SynthesizeStart(context={"prosody": {"rate": "+10%"}}).event(),
+            SynthesizeChunk(text="Streamed sentence. Next").event(),
+            SynthesizeStop().event(),
+        ],
+        backend,
+    )
+
+    assert dict(zip(backend.texts, backend.prosodies, strict=True)) == {
+        "Hello.": Prosody(style="cheerful"),
+        "Streamed sentence.": Prosody(rate="+10%"),
+        "Next.": Prosody(rate="+10%"),
+        "Bye.": Prosody(),
+    }
+
+
+def test_audio_format_from_context():
+    """Test that audio is converted to the format the request context asks for."""
+    pytest.importorskip("numpy")
+    backend = make_backend()
+    events = run_handler(
+        [
+            Synthesize(text="Hello", context={"audio_format": {"rate": 12000}}).event(),
+            # Formats that can't be converted to are ignored
+            Synthesize(text="Bye", context={"audio_format": {"channels": 6}}).event(),
+        ],
+        backend,
+    )
+
+    audio_starts = [
+        AudioStart.from_event(event)
+        for event in events
+        if AudioStart.is_type(event.type)
+    ]
+    assert [audio_start.rate for audio_start in audio_starts] == [12000, 24000]
+
+    # Half as many samples of 16-bit audio at half the rate
+    hello_stop = next(i for i, e in enumerate(events) if AudioStop.is_type(e.type))
+    chunks = [AudioChunk.from_event(event) for event in events[1:hello_stop]]
+    assert all(chunk.rate == 12000 for chunk in chunks)
+    assert (
+        sum(len(chunk.audio) for chunk in chunks) == backend.audio_size("Hello.") // 2
+    )
@@ -0,0 +1,77 @@
+"""Tests for describing the server."""
+
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from wyoming_microsoft_tts.__main__ import (
+    get_wyoming_info,
+    parse_arguments,
+    prepare_voices,
+    validate_args,
+)
+
+
+def make_voice(key: str, locale: str) -> dict:
+    """Return voice info for a voice."""
+    return {
+        "key": key,
+        "name": key.split("-")[-1],
+        "language": {"code": locale, "family": locale.split("-")[0]},
+        "quality": "Neural",
+        "aliases": [f"{key}-alias"],
+    }
+
+
+def test_voice_filter():
+    """Test that only voices matching the filter and the default voice are described."""
+    voices_info = {
+        key: make_voice(key, locale)
+        for key, locale in (
+            ("en-GB-SoniaNeural", "en-GB"),
+            ("en-US-JennyNeural", "en-US"),
+            ("de-DE-ConradNeural", "de-DE"),
+            ("de-CH-JanNeural", "de-CH"),
+            ("fr-FR-DeniseNeural", "fr-FR"),
+        )
+    }
+    args = SimpleNamespace(
+        voice="fr-FR-DeniseNeural", voice_filter=None, no_streaming=False
+    )
+    voices_info, _info = prepare_voices(args, voices_info)
+
+    def described_voices(voice_filter):
+        args.voice_filter = voice_filter
+        info = get_wyoming_info(args, voices_info)
+        return [voice.name for voice in info.tts[0].voices]
+
+    assert len(described_voices(None)) == 5
+    assert described_voices("EN, de-ch") == [
+        "de-CH-JanNeural",
+        "en-GB-SoniaNeural",
+        "en-US-JennyNeural",
+        "fr-FR-DeniseNeural",
+    ]
+    assert described_voices("de-DE-ConradNeural") == [
+        "de-DE-ConradNeural",
+        "fr-FR-DeniseNeural",
+    ]
+
+
+@pytest.mark.parametrize(
+    "argv",
+    [
+        ["--fake-latency-ms", "-1"],
+        ["--fake-jitter-ms", "-1"],
+        ["--fake-failure-rate", "1.5"],
+        ["--fake-failure-rate", "-0.1"],
+    ],
+)
+def test_invalid_fake_backend_settings(argv):
+    """Test that fake backend settings out of range are rejected."""
+    with patch("sys.argv", ["wyoming-microsoft-tts", "--backend", "fake", *argv]):
+        args = parse_arguments()
+
+    with pytest.raises(ValueError, match=argv[0]):
+        validate_args(args)
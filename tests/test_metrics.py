@@ -0,0 +1,131 @@
+"""Tests for the metrics of the TTS pipeline."""
+
+import asyncio
+
+import pytest
+
+from wyoming.tts import (
+    Synthesize,
+    SynthesizeChunk,
+    SynthesizeStart,
+    SynthesizeStop,
+    SynthesizeVoice,
+)
+
+from wyoming_microsoft_tts.metrics import (
+    METRICS,
+    Counter,
+    Histogram,
+    start_metrics_server,
+)
+
+from .helpers import make_backend, run_handler
+
+
+def test_histogram_renders_cumulative_buckets():
+    """Test that buckets count every value up to their bound."""
+    histogram = Histogram("test_seconds", "Test.", (0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(value)
+
+    assert histogram.render() == [
+        "# HELP test_seconds Test.",
+        "# TYPE test_seconds histogram",
+        'test_seconds_bucket{le="0.1"} 2',
+        'test_seconds_bucket{le="1"} 3',
+        'test_seconds_bucket{le="+Inf"} 4',
+        "test_seconds_sum 2.65",
+        "test_seconds_count 4",
+    ]
+
+
+def test_counter_renders_labels():
+    """Test that counters have a sample per label value, escaped."""
+    counter = Counter("test_total", "Test.", labelnames=("voice",))
+    counter.inc(labels=("b",))
+    counter.inc(2, labels=('a"1',))
+
+    assert counter.render()[2:] == [
+        'test_total{voice="a\\"1"} 2',
+        'test_total{voice="b"} 1',
+    ]
+
+
+def test_handler_records_request_metrics():
+    """Test that a synthesis updates the request and audio metrics."""
+    voice = "en-US-JennyNeural"
+    requests = METRICS.requests.get((voice,))
+    first_audio = METRICS.first_audio_seconds.count
+    audio_sent = METRICS.audio_sent_bytes.sum
+    backend = make_backend()
+    run_handler(
+        [Synthesize(text="Hello world", voice=SynthesizeVoice(name=voice)).event()],
+        backend,
+    )
+
+    assert METRICS.requests.get((voice,)) == requests + 1
+    assert METRICS.first_audio_seconds.count == first_audio + 1
+    assert METRICS.audio_sent_bytes.sum == audio_sent + backend.audio_size(
+        "Hello world."
+    )
+
+
+def test_handler_labels_unknown_voices():
+    """Test that voices the server doesn't know share one label."""
+    requests = METRICS.requests.get(("unknown",))
+    run_handler(
+        [
+            Synthesize(text="Hello", voice=SynthesizeVoice(name=name)).event()
+            for name in ("xx-XX-FirstNeural", "xx-XX-SecondNeural")
+        ],
+        make_backend(),
+    )
+
+    assert METRICS.requests.get(("unknown",)) == requests + 2
+    assert METRICS.requests.get(("xx-XX-FirstNeural",)) == 0
+
+
+def test_handler_records_sentence_lengths():
+    """Test that sentences found in streamed text are measured."""
+    sentences = METRICS.sentence_chars.count
+    run_handler(
+        [
+            SynthesizeStart().event(),
+            SynthesizeChunk(text="Hello world. How are").event(),
+            SynthesizeChunk(text=" you?").event(),
+            SynthesizeStop().event(),
+        ],
+        make_backend(),
+    )
+
+    assert METRICS.sentence_chars.count == sentences + 2
+
+
+def test_metrics_server():
+    """Test that metrics are served over HTTP."""
+
+    async def get(path: str) -> bytes:
+        server = await start_metrics_server("tcp://127.0.0.1:0")
+        port = server.sockets[0].getsockname()[1]
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+            response = await reader.read()
+            writer.close()
+        finally:
+            server.close()
+            await server.wait_closed()
+
+        return response
+
+    response = asyncio.run(get("/metrics"))
+    assert response.startswith(b"HTTP/1.1 200 OK\r\n")
+    assert b"# TYPE microsoft_tts_synthesis_seconds histogram" in response
+
+    assert asyncio.run(get("/other")).startswith(b"HTTP/1.1 404 Not Found\r\n")
+
+
+def test_metrics_server_rejects_bad_uri():
+    """Test that the metrics URI needs a port and a known scheme."""
+    with pytest.raises(ValueError):
+        asyncio.run(start_metrics_server("unix:///tmp/metrics"))
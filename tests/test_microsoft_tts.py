@@ -1,7 +1,9 @@
 """Tests for the MicrosoftTTS class."""
 
 from types import SimpleNamespace
+from xml.etree import ElementTree as ET
 import os
+import azure.cognitiveservices.speech as speechsdk
 import pytest
 from wyoming_microsoft_tts.microsoft_tts import MicrosoftTTS
 
@@ -10,7 +12,7 @@ def test_initialize(microsoft_tts, configuration):
     """Test initialization."""
     assert microsoft_tts.args.voice == configuration["voice"]
     assert microsoft_tts.speech_config is not None
-    assert microsoft_tts.output_dir is not None
+    assert microsoft_tts.debug_audio_dir is None
 
 
 @pytest.mark.skipif(
@@ -23,7 +25,8 @@ def test_synthesize(microsoft_tts):
     voice = "en-US-JennyNeural"
 
     result = microsoft_tts.synthesize(text, voice)
-    assert result.endswith(".wav")
+    assert isinstance(result, bytes)
+    assert len(result) > 0
 
 
 # SSML Building Tests
@@ -205,6 +208,26 @@ def test_build_ssml_voice_key_and_lang():
     assert '<voice name="en-GB-SoniaNeural">' in ssml
 
 
+def test_build_ssml_escapes_text():
+    """Test that XML special characters in text don't break the SSML."""
+    args = SimpleNamespace(
+        subscription_key=os.environ.get("SPEECH_KEY"),
+        service_region=os.environ.get("SPEECH_REGION"),
+        download_dir="/tmp/",
+        voice="en-US-JennyNeural",
+        rate="+10%",
+        pitch=None,
+        volume=None,
+        style=None,
+        style_degree=None,
+    )
+    tts = MicrosoftTTS(args)
+    ssml = tts._build_ssml("Tom & Jerry <3 </voice>", "en-US-JennyNeural")
+
+    assert ">Tom &amp; Jerry &lt;3 &lt;/voice&gt;</prosody>" in ssml
+    ET.fromstring(ssml.encode("utf-8"))
+
+
 # Integration Tests with Synthesize
 
 
@@ -229,7 +252,7 @@ def test_synthesize_with_rate():
     result = tts.synthesize("Testing rate parameter", "en-US-JennyNeural")
 
     assert result is not None
-    assert result.endswith(".wav")
+    assert len(result) > 0
 
 
 @pytest.mark.skipif(
@@ -253,7 +276,7 @@ def test_synthesize_with_pitch():
     result = tts.synthesize("Testing pitch parameter", "en-US-JennyNeural")
 
     assert result is not None
-    assert result.endswith(".wav")
+    assert len(result) > 0
 
 
 @pytest.mark.skipif(
@@ -277,7 +300,7 @@ def test_synthesize_with_volume():
     result = tts.synthesize("Testing volume parameter", "en-US-JennyNeural")
 
     assert result is not None
-    assert result.endswith(".wav")
+    assert len(result) > 0
 
 
 @pytest.mark.skipif(
@@ -301,7 +324,7 @@ def test_synthesize_with_style():
     result = tts.synthesize("Testing style parameter", "en-US-JennyNeural")
 
     assert result is not None
-    assert result.endswith(".wav")
+    assert len(result) > 0
 
 
 @pytest.mark.skipif(
@@ -325,7 +348,7 @@ def test_synthesize_with_combined_parameters():
     result = tts.synthesize("Testing all parameters together", "en-US-JennyNeural")
 
     assert result is not None
-    assert result.endswith(".wav")
+    assert len(result) > 0
 
 
 @pytest.mark.skipif(
@@ -349,4 +372,65 @@ def test_synthesize_without_parameters_still_works():
     result = tts.synthesize("Testing without parameters", "en-US-JennyNeural")
 
     assert result is not None
-    assert result.endswith(".wav")
+    assert len(result) > 0
+
+
+# Shared Engine Tests
+
+
+def test_initialize_with_preloaded_voices():
+    """Test that preloaded voices are used instead of reading voices.json."""
+    args = SimpleNamespace(
+        subscription_key=os.environ.get("SPEECH_KEY"),
+        service_region=os.environ.get("SPEECH_REGION"),
+        download_dir="/tmp/",
+        voice="en-GB-SoniaNeural",
+        rate=None,
+        pitch=None,
+        volume=None,
+        style=None,
+        style_degree=None,
+    )
+    voices = {"en-GB-SoniaNeural": {"key": "en-GB-SoniaNeural"}}
+    tts = MicrosoftTTS(args, voices=voices)
+
+    assert tts.voices is voices
+
+
+def test_speech_config_per_voice(microsoft_tts):
+    """Test that each voice gets its own, reused speech config."""
+    sonia = microsoft_tts._get_speech_config("en-GB-SoniaNeural")
+    jenny = microsoft_tts._get_speech_config("en-US-JennyNeural")
+
+    assert sonia is not jenny
+    assert sonia is microsoft_tts._get_speech_config("en-GB-SoniaNeural")
+    assert sonia.speech_synthesis_voice_name == "en-GB-SoniaNeural"
+    assert jenny.speech_synthesis_voice_name == "en-US-JennyNeural"
+
+
+def test_output_format():
+    """Test that the configured output format is requested from Azure."""
+    args = SimpleNamespace(
+        subscription_key=os.environ.get("SPEECH_KEY"),
+        service_region=os.environ.get("SPEECH_REGION"),
+        download_dir="/tmp/",
+        voice="en-GB-SoniaNeural",
+        rate=None,
+        pitch=None,
+        volume=None,
+        style=None,
+        style_degree=None,
+    )
+    voices = {"en-GB-SoniaNeural": {"key": "en-GB-SoniaNeural"}}
+    tts = MicrosoftTTS(args, voices=voices, output_format="raw-16khz-16bit-mono-pcm")
+    speech_config = tts._get_speech_config(
+        "en-GB-SoniaNeural", tts.output_format.sdk_format
+    )
+
+    assert tts.output_format.rate == 16000
+    assert (
+        speech_config.get_property(
+            speechsdk.PropertyId.SpeechServiceConnection_SynthOutputFormat
+        )
+        == "raw-16khz-16bit-mono-pcm"
+    )
@@ -0,0 +1,112 @@
+"""Tests for pre-synthesized phrases."""
+
+import asyncio
+import json
+import tempfile
+from pathlib import Path
+
+from wyoming.audio import AudioChunk
+from wyoming.tts import Synthesize
+
+from wyoming_microsoft_tts.executor import SynthesisExecutor
+from wyoming_microsoft_tts.handler import prepare_text
+from wyoming_microsoft_tts.phrases import (
+    Phrase,
+    PhraseStore,
+    load_phrases,
+    warm_phrases,
+)
+
+from .helpers import make_backend, run_handler
+
+
+def warm(phrases, phrase_store, microsoft_tts) -> None:
+    """Pre-synthesize phrases without rate limiting."""
+
+    async def run():
+        executor = SynthesisExecutor(max_workers=1, max_queued=0)
+        try:
+            await warm_phrases(
+                phrases,
+                lambda text: prepare_text(text, ".?!"),
+                phrase_store,
+                microsoft_tts,
+                executor,
+                phrases_per_second=1000.0,
+            )
+        finally:
+            executor.shutdown()
+
+    asyncio.run(run())
+
+
+def test_load_phrases():
+    """Test loading phrases from text and JSON files."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        text_path = Path(temp_dir) / "phrases.txt"
+        text_path.write_text("# Timers\nTimer done\n\nLights on.\n", encoding="utf-8")
+        assert load_phrases(text_path) == [Phrase("Timer done"), Phrase("Lights on.")]
+
+        json_path = Path(temp_dir) / "phrases.json"
+        json_path.write_text(
+            json.dumps(["Timer done", {"text": "Hello", "voice": "en-US-JennyNeural"}]),
+            encoding="utf-8",
+        )
+        assert load_phrases(json_path) == [
+            Phrase("Timer done"),
+            Phrase("Hello", voice="en-US-JennyNeural"),
+        ]
+
+
+def test_warm_phrases_only_synthesizes_missing():
+    """Test that stored phrases survive a restart and stale ones are removed."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        backend = make_backend()
+        phrase_store = PhraseStore(temp_dir)
+        warm(
+            [Phrase("Timer done"), Phrase("Hello", voice="en-US-JennyNeural")],
+            phrase_store,
+            backend,
+        )
+        assert backend.texts == ["Timer done.", "Hello."]
+        assert len(phrase_store) == 2
+
+        # Restart with one phrase changed and one unknown voice
+        backend = make_backend()
+        phrase_store = PhraseStore(temp_dir)
+        warm(
+            [
+                Phrase("Timer done"),
+                Phrase("Lights on"),
+                Phrase("Hola", voice="es-ES-ElviraNeural"),
+            ],
+            phrase_store,
+            backend,
+        )
+        assert backend.texts == ["Lights on."]
+        assert len(phrase_store) == 2
+        assert len(list(Path(temp_dir).glob("*.pcm"))) == 2
+
+
+def test_stored_phrase_skips_synthesis():
+    """Test that the handler serves stored phrases without synthesizing."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        backend = make_backend()
+        phrase_store = PhraseStore(temp_dir)
+        warm([Phrase("Timer done")], phrase_store, backend)
+        backend.texts.clear()
+
+        events = run_handler(
+            [Synthesize(text="Timer done").event()],
+            backend,
+            phrase_store=phrase_store,
+            stream_audio=False,
+        )
+
+        assert backend.texts == []
+        audio = b"".join(
+            AudioChunk.from_event(event).audio
+            for event in events
+            if AudioChunk.is_type(event.type)
+        )
+        assert audio == bytes(backend.audio_size("Timer done."))
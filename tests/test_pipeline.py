@@ -0,0 +1,235 @@
+"""Tests for the sentence synthesis pipeline."""
+
+import asyncio
+
+import pytest
+
+from wyoming_microsoft_tts.pipeline import SentencePipeline, SynthesisJob
+
+
+class FakeSynthesis:
+    """Start jobs that finish when the test says so."""
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self.jobs: dict[str, SynthesisJob] = {}
+        self.sent: list[str] = []
+        self.audio_seconds = 0.0
+
+    def start(self, sentence: str) -> SynthesisJob:
+        """Start a job for sentence."""
+        loop = asyncio.get_running_loop()
+        job = SynthesisJob(sentence, asyncio.Queue(), loop.create_future())
+        self.jobs[sentence] = job
+        return job
+
+    def complete(self, sentence: str, latency: float | None = 0.0) -> None:
+        """Finish the job for sentence, after latency seconds to its audio."""
+        job = self.jobs[sentence]
+        if latency is not None:
+            job.record_latency(latency)
+
+        job.audio.put_nowait(sentence.encode())
+        job.synthesis.set_result(True)
+
+    async def send(self, job: SynthesisJob) -> bool:
+        """Record the sentence once all its audio is there."""
+        while await job.audio.get() is not None:
+            job.audio_sent(self.audio_seconds)
+
+        self.sent.append(job.text)
+        return await job.synthesis
+
+
+async def wait_sent(synthesis: FakeSynthesis, num_sent: int) -> None:
+    """Wait until num_sent sentences have been sent."""
+    while len(synthesis.sent) < num_sent:
+        await asyncio.sleep(0)
+
+
+def test_sentences_are_sent_in_order():
+    """Test that later sentences finishing first are still sent in order."""
+
+    async def run():
+        synthesis = FakeSynthesis()
+        pipeline = SentencePipeline(synthesis.start, synthesis.send, prefetch=2)
+        for sentence in ("One.", "Two.", "Three."):
+            await pipeline.add(sentence)
+
+        # All three are synthesizing at the same time
+        assert set(synthesis.jobs) == {"One.", "Two.", "Three."}
+
+        synthesis.complete("Three.")
+        synthesis.complete("Two.")
+        await asyncio.sleep(0)
+        assert synthesis.sent == []
+
+        synthesis.complete("One.")
+        await pipeline.finish()
+        assert synthesis.sent == ["One.", "Two.", "Three."]
+
+    asyncio.run(run())
+
+
+def test_prefetch_limits_sentences_ahead():
+    """Test that no more than prefetch sentences are started ahead."""
+
+    async def run():
+        synthesis = FakeSynthesis()
+        pipeline = SentencePipeline(synthesis.start, synthesis.send, prefetch=1)
+        await pipeline.add("One.")
+        await pipeline.add("Two.")
+
+        adding = asyncio.ensure_future(pipeline.add("Three."))
+        await asyncio.sleep(0)
+        assert not adding.done()
+        assert "Three." not in synthesis.jobs
+
+        synthesis.complete("One.")
+        await adding
+        assert "Three." in synthesis.jobs
+
+        synthesis.complete("Two.")
+        synthesis.complete("Three.")
+        await pipeline.finish()
+        assert synthesis.sent == ["One.", "Two.", "Three."]
+
+    asyncio.run(run())
+
+
+def test_cancel_abandons_unsent_sentences():
+    """Test that cancelling the pipeline cancels running syntheses."""
+
+    async def run():
+        synthesis = FakeSynthesis()
+        pipeline = SentencePipeline(synthesis.start, synthesis.send, prefetch=2)
+        await pipeline.add("One.")
+        await pipeline.add("Two.")
+
+        pipeline.cancel()
+        await asyncio.sleep(0)
+
+        assert all(job.synthesis.cancelled() for job in synthesis.jobs.values())
+        assert synthesis.sent == []
+
+    asyncio.run(run())
+
+
+def test_send_error_is_raised_by_finish():
+    """Test that a failure while sending drops later sentences."""
+
+    async def run():
+        synthesis = FakeSynthesis()
+
+        async def send(job: SynthesisJob) -> bool:
+            raise ConnectionResetError("client went away")
+
+        pipeline = SentencePipeline(synthesis.start, send, prefetch=2)
+        await pipeline.add("One.")
+        await pipeline.add("Two.")
+
+        with pytest.raises(ConnectionResetError):
+            await pipeline.finish()
+
+        assert synthesis.jobs["Two."].synthesis.cancelled()
+
+    asyncio.run(run())
+
+
+def test_short_sentences_are_batched_while_audio_plays():
+    """Test that sentences are merged while the client has audio to play."""
+
+    async def run():
+        synthesis = FakeSynthesis()
+        pipeline = SentencePipeline(
+            synthesis.start, synthesis.send, prefetch=2, batch_chars=100
+        )
+        pipeline.latency = 0.0
+
+        # Nothing is playing yet, so the first sentence starts right away
+        synthesis.audio_seconds = 10.0
+        await pipeline.add("One.")
+        synthesis.complete("One.")
+        await wait_sent(synthesis, 1)
+
+        await pipeline.add("Two.")
+        await pipeline.add("Three.")
+        assert set(synthesis.jobs) == {"One."}
+
+        finishing = asyncio.ensure_future(pipeline.finish())
+        await asyncio.sleep(0)
+        synthesis.complete("Two. Three.")
+        await finishing
+        assert synthesis.sent == ["One.", "Two. Three."]
+
+    asyncio.run(run())
+
+
+def test_batch_starts_when_long_enough_or_audio_runs_low():
+    """Test that a batch doesn't wait beyond its size or the audio left."""
+
+    async def run():
+        synthesis = FakeSynthesis()
+        pipeline = SentencePipeline(
+            synthesis.start, synthesis.send, prefetch=2, batch_chars=10
+        )
+        pipeline.latency = 0.0
+
+        synthesis.audio_seconds = 0.05
+        await pipeline.add("One.")
+        synthesis.complete("One.")
+        await wait_sent(synthesis, 1)
+
+        # Started once the audio of "One." is about to run out
+        await pipeline.add("Two.")
+        assert "Two." not in synthesis.jobs
+        await asyncio.sleep(0.1)
+        assert "Two." in synthesis.jobs
+
+        synthesis.audio_seconds = 10.0
+        synthesis.complete("Two.")
+        await wait_sent(synthesis, 2)
+
+        # Started once 10 characters are waiting
+        await pipeline.add("Three.")
+        assert "Three." not in synthesis.jobs
+        await pipeline.add("Four.")
+        assert "Three. Four." in synthesis.jobs
+
+        synthesis.complete("Three. Four.")
+        await pipeline.finish()
+        assert synthesis.sent == ["One.", "Two.", "Three. Four."]
+
+    asyncio.run(run())
+
+
+def test_latency_follows_synthesis_time():
+    """Test that the latency estimate moves towards measured syntheses."""
+
+    async def run():
+        synthesis = FakeSynthesis()
+        pipeline = SentencePipeline(synthesis.start, synthesis.send, prefetch=2)
+        initial_latency = pipeline.latency
+
+        await pipeline.add("One.")
+        synthesis.complete("One.")
+        await pipeline.finish()
+        assert pipeline.latency < initial_latency
+
+    asyncio.run(run())
+
+
+def test_latency_ignores_unsynthesized_jobs():
+    """Test that jobs without a synthesis (cache hits) don't change the latency."""
+
+    async def run():
+        synthesis = FakeSynthesis()
+        pipeline = SentencePipeline(synthesis.start, synthesis.send, prefetch=2)
+        initial_latency = pipeline.latency
+
+        await pipeline.add("One.")
+        synthesis.complete("One.", latency=None)
+        await pipeline.finish()
+        assert pipeline.latency == initial_latency
+
+    asyncio.run(run())
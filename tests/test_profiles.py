@@ -0,0 +1,135 @@
+"""Tests for voice profiles."""
+
+import json
+import os
+import tempfile
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from wyoming_microsoft_tts.microsoft_tts import MicrosoftTTS
+from wyoming_microsoft_tts.profiles import VoiceProfiles, apply_prosody, load_profiles
+from wyoming_microsoft_tts.ssml import Prosody
+
+VOICES = {
+    "en-US-JennyNeural": {"key": "en-US-JennyNeural", "styles": ["cheerful", "sad"]},
+    "en-GB-SoniaNeural": {"key": "en-GB-SoniaNeural", "styles": []},
+    # Loaded from an older voices.json
+    "de-DE-KatjaNeural": {"key": "de-DE-KatjaNeural"},
+}
+DEFAULT = Prosody(rate="+5%")
+
+
+def write_profiles(path: Path, profiles) -> None:
+    """Write profiles as JSON and make sure the change is noticed."""
+    path.write_text(json.dumps(profiles), encoding="utf-8")
+    mtime = path.stat().st_mtime + 1
+    os.utime(path, (mtime, mtime))
+
+
+def test_load_profiles():
+    """Test that profiles fall back to the default prosody."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = Path(temp_dir) / "profiles.json"
+        write_profiles(
+            path,
+            {
+                "en-US-JennyNeural": {"style": "cheerful", "style_degree": 1.5},
+                "de-DE-KatjaNeural": {"style": "whispering", "pitch": -5},
+            },
+        )
+
+        assert load_profiles(path, VOICES, DEFAULT) == {
+            "en-US-JennyNeural": Prosody(
+                rate="+5%", style="cheerful", style_degree=1.5
+            ),
+            "de-DE-KatjaNeural": Prosody(rate="+5%", pitch="-5", style="whispering"),
+        }
+
+
+@pytest.mark.parametrize(
+    "profiles",
+    [
+        {"en-AU-NatashaNeural": {"rate": "+10%"}},
+        {"en-US-JennyNeural": {"speed": "+10%"}},
+        {"en-US-JennyNeural": {"style": "angry"}},
+        {"en-GB-SoniaNeural": {"style": "cheerful"}},
+        {"en-US-JennyNeural": {"style": "sad", "style_degree": 3}},
+    ],
+)
+def test_invalid_profiles(profiles):
+    """Test that unknown voices and unsupported settings are rejected."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = Path(temp_dir) / "profiles.json"
+        write_profiles(path, profiles)
+
+        with pytest.raises(ValueError):
+            load_profiles(path, VOICES, DEFAULT)
+
+
+def test_apply_prosody_overrides():
+    """Test that per-request overrides are checked against the voice."""
+    prosody = apply_prosody(DEFAULT, {"style": "sad"}, VOICES["en-US-JennyNeural"])
+    assert prosody == Prosody(rate="+5%", style="sad")
+
+    with pytest.raises(ValueError):
+        apply_prosody(DEFAULT, {"style": "sad"}, VOICES["en-GB-SoniaNeural"])
+
+
+def test_reload_keeps_valid_profiles():
+    """Test that profiles are reloaded, but not replaced by invalid ones."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = Path(temp_dir) / "profiles.json"
+        write_profiles(path, {"en-US-JennyNeural": {"style": "sad"}})
+        profiles = VoiceProfiles(path, VOICES, DEFAULT)
+        assert profiles.get("en-US-JennyNeural").style == "sad"
+        assert profiles.get("en-GB-SoniaNeural") == DEFAULT
+        assert not profiles.reload()
+
+        write_profiles(path, {"en-US-JennyNeural": {"style": "cheerful"}})
+        assert profiles.reload()
+        assert profiles.get("en-US-JennyNeural").style == "cheerful"
+
+        write_profiles(path, {"en-US-JennyNeural": {"style": "angry"}})
+        assert not profiles.reload()
+        assert profiles.get("en-US-JennyNeural").style == "cheerful"
+
+
+@pytest.fixture
+def microsoft_tts(tmp_path):
+    """Return MicrosoftTTS with a dummy key, which works until it synthesizes."""
+    args = SimpleNamespace(
+        subscription_key="dummy",
+        service_region="westus",
+        download_dir=str(tmp_path),
+        voice="en-GB-SoniaNeural",
+        rate=None,
+        pitch=None,
+        volume=None,
+        style=None,
+        style_degree=None,
+    )
+    return MicrosoftTTS(args)
+
+
+def test_microsoft_tts_uses_profiles(microsoft_tts):
+    """Test that a voice's profile ends up in its SSML and cache key."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = Path(temp_dir) / "profiles.json"
+        write_profiles(path, {"en-US-JennyNeural": {"style": "cheerful"}})
+        default_key = microsoft_tts.cache_key("Hello", "en-US-JennyNeural")
+
+        microsoft_tts.profiles = VoiceProfiles(
+            path, microsoft_tts.voices, microsoft_tts.prosody
+        )
+        prosody = microsoft_tts.get_prosody("en-US-JennyNeural")
+        assert prosody.style == "cheerful"
+        assert microsoft_tts.get_prosody("en-GB-SoniaNeural") == Prosody()
+        assert microsoft_tts.cache_key("Hello", "en-US-JennyNeural") != default_key
+
+        ssml = microsoft_tts._build_ssml("Hello", "en-US-JennyNeural")
+        assert '<mstts:express-as style="cheerful">' in ssml
+
+        overridden = microsoft_tts.get_prosody("en-US-JennyNeural", {"rate": "+10%"})
+        assert overridden == Prosody(rate="+10%", style="cheerful")
@@ -0,0 +1,81 @@
+"""Tests for sentence boundary detection."""
+
+from wyoming_microsoft_tts.sentence_boundary import SentenceBoundaryDetector
+
+TEXT = (
+    "Dr. Smith is home. The lights are on! Steps:\n 1. Lock the door. "
+    "Is it **locked**? Yes…  Done"
+)
+SENTENCES = [
+    "Dr. Smith is home.",
+    "The lights are on!",
+    "Steps:\n 1.",
+    "Lock the door.",
+    "Is it locked?",
+    "Yes…",
+    "Done",
+]
+
+
+def split(text: str, chunk_size: int) -> list[str]:
+    """Feed text to a detector in chunks and return all sentences."""
+    detector = SentenceBoundaryDetector()
+    sentences = []
+    for offset in range(0, len(text), chunk_size):
+        sentences.extend(detector.add_chunk(text[offset : offset + chunk_size]))
+
+    sentences.append(detector.finish())
+    return sentences
+
+
+def test_sentences_independent_of_chunk_size():
+    """Test that the same sentences are found however the text is streamed."""
+    for chunk_size in (1, 2, 3, 7, len(TEXT)):
+        assert split(TEXT, chunk_size) == SENTENCES
+
+
+def test_sentence_end_waits_for_next_word():
+    """Test that a sentence is only complete once the next one starts."""
+    detector = SentenceBoundaryDetector()
+    assert list(detector.add_chunk("It is on.")) == []
+    assert list(detector.add_chunk("  ")) == []
+    assert list(detector.add_chunk("it")) == []
+    assert list(detector.add_chunk(" works. It")) == ["It is on.  it works."]
+    assert detector.remaining_text == " It"
+    assert detector.finish() == "It"
+
+
+def test_first_clause_after_enough_characters():
+    """Test that a long first sentence is split at its first clause."""
+    detector = SentenceBoundaryDetector(first_clause_chars=20)
+    sentences = []
+    for char in "Sure, the lights in the kitchen are on, and 1,000 more. It":
+        sentences.extend(detector.add_chunk(char))
+
+    assert sentences == [
+        "Sure,",
+        "the lights in the kitchen are on, and 1,000 more.",
+    ]
+    assert detector.finish() == "It"
+
+
+def test_first_clause_ends_at_first_comma():
+    """Test that a chunk with several clauses is split after the first one."""
+    detector = SentenceBoundaryDetector(first_clause_chars=20)
+    assert list(detector.add_chunk("Sure, the lights in the kitchen are on, and")) == [
+        "Sure,"
+    ]
+    assert detector.remaining_text == " the lights in the kitchen are on, and"
+
+
+def test_first_clause_after_time_budget():
+    """Test that the first clause is sent once the time budget is used up."""
+    now = 0.0
+    detector = SentenceBoundaryDetector(first_clause_seconds=0.4, clock=lambda: now)
+    assert list(detector.add_chunk("Okay, so")) == []
+
+    now = 0.5
+    assert list(detector.add_chunk(" the")) == ["Okay,"]
+    assert list(detector.add_chunk(" lights, are shining. Done")) == [
+        "so the lights, are shining."
+    ]
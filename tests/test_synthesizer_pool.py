@@ -0,0 +1,97 @@
+"""Tests for the speech synthesizer pool."""
+
+import time
+
+import azure.cognitiveservices.speech as speechsdk
+import pytest
+
+from wyoming_microsoft_tts.synthesizer_pool import SynthesizerPool
+
+SONIA = ("en-GB-SoniaNeural", None)
+JENNY = ("en-US-JennyNeural", None)
+
+
+@pytest.fixture
+def pool():
+    """Return a pool creating synthesizers that never connect."""
+    speech_config = speechsdk.SpeechConfig(subscription="dummy", region="westus")
+
+    def create_synthesizer(_key) -> speechsdk.SpeechSynthesizer:
+        return speechsdk.SpeechSynthesizer(
+            speech_config=speech_config, audio_config=None
+        )
+
+    pool = SynthesizerPool(create_synthesizer, max_size=2, idle_timeout=60.0)
+    yield pool
+    pool.close()
+
+
+def test_released_synthesizer_is_reused(pool):
+    """Test that a released synthesizer is handed out again for the same key."""
+    with pool.synthesizer(SONIA) as first:
+        pass
+
+    with pool.synthesizer(SONIA) as second:
+        assert second is first
+
+    with pool.synthesizer(JENNY) as other:
+        assert other is not first
+
+
+def test_pool_size_is_limited(pool):
+    """Test that no more than max_size idle synthesizers are kept per key."""
+    borrowed = [pool.acquire(SONIA) for _ in range(3)]
+    for pooled in borrowed:
+        pool.release(pooled)
+
+    assert pool.idle_count(SONIA) == 2
+
+
+def test_unhealthy_synthesizer_is_discarded(pool):
+    """Test that failed synthesizers are not reused."""
+    with pytest.raises(RuntimeError), pool.synthesizer(SONIA):
+        raise RuntimeError("synthesis failed")
+
+    assert pool.idle_count(SONIA) == 0
+
+    pooled = pool.acquire(SONIA)
+    pooled.healthy = False
+    pool.release(pooled)
+    assert pool.idle_count(SONIA) == 0
+
+
+def test_idle_synthesizers_are_evicted(pool):
+    """Test that synthesizers idle for too long are closed."""
+    with pool.synthesizer(SONIA) as first:
+        pass
+
+    first.last_used = time.monotonic() - 120.0
+
+    with pool.synthesizer(SONIA) as second:
+        assert second is not first
+
+
+def test_evict_idle_closes_expired_synthesizers(pool):
+    """Test that idle synthesizers are closed without another request."""
+    first, second = pool.acquire(SONIA), pool.acquire(SONIA)
+    pool.release(first)
+    pool.release(second)
+
+    first.last_used = time.monotonic() - 120.0
+    pool.evict_idle()
+    assert pool.idle_count(SONIA) == 1
+
+
+def test_disconnected_synthesizer_is_discarded(pool):
+    """Test that a synthesizer whose connection dropped while idle isn't reused."""
+    with pool.synthesizer(SONIA) as first:
+        first._on_connected()
+
+    with pool.synthesizer(SONIA) as second:
+        assert second is first
+
+    first._on_disconnected()
+    with pool.synthesizer(SONIA) as third:
+        assert third is not first
+
+    assert pool.idle_count(SONIA) == 1
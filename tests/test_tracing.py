@@ -0,0 +1,78 @@
+"""Tests for tracing the stages of requests."""
+
+import json
+
+import pytest
+
+from wyoming.tts import Synthesize, SynthesizeChunk, SynthesizeStart, SynthesizeStop
+
+from wyoming_microsoft_tts import tracing
+from wyoming_microsoft_tts.tracing import TraceExporter
+
+from .helpers import make_backend, run_handler
+
+
+@pytest.fixture
+def run_traced(tmp_path):
+    """Return a function that runs a handler with tracing and returns the traces."""
+
+    def run(events) -> list[dict]:
+        trace_path = tmp_path / "traces.jsonl"
+        tracing.configure(TraceExporter(str(trace_path)))
+        try:
+            run_handler(events, make_backend())
+        finally:
+            tracing.configure(None)
+
+        with open(trace_path, encoding="utf-8") as trace_file:
+            return [json.loads(line) for line in trace_file]
+
+    return run
+
+
+def test_tracing_is_off_by_default():
+    """Test that nothing is traced unless an exporter is configured."""
+    assert tracing.start_trace() is None
+    assert tracing.current_trace() is None
+    with tracing.span("test"), tracing.total("test"):
+        tracing.first_audio()
+
+
+def test_synthesize_is_traced(run_traced):
+    """Test that a synthesis is exported as one record with its stages."""
+    (trace,) = run_traced([Synthesize(text="Hello world").event()])
+
+    assert trace["kind"] == "synthesize"
+    assert trace["voice"] == "en-GB-SoniaNeural"
+    assert trace["completed"] is True
+    assert 0 <= trace["first_audio_ms"] <= trace["duration_ms"]
+    assert "socket_write" in trace["totals_ms"]
+
+    names = [span["name"] for span in trace["spans"]]
+    assert {"prepare", "cache_lookup", "queue_wait", "send"} <= set(names)
+    starts = [span["start_ms"] for span in trace["spans"]]
+    assert starts == sorted(starts)
+
+
+def test_text_stream_is_traced_once(run_traced):
+    """Test that all sentences of a text stream belong to one record."""
+    traces = run_traced(
+        [
+            SynthesizeStart().event(),
+            SynthesizeChunk(text="Hello world. How are").event(),
+            SynthesizeChunk(text=" you?").event(),
+            SynthesizeStop().event(),
+            # Sent for older clients after a stream, ignored
+            Synthesize(text="Hello world. How are you?").event(),
+        ]
+    )
+
+    (trace,) = traces
+    assert trace["kind"] == "stream"
+    assert "sentence_boundary" in trace["totals_ms"]
+
+    sends = [span for span in trace["spans"] if span["name"] == "send"]
+    assert [span["chars"] for span in sends] == [
+        len("Hello world."),
+        len("How are you?"),
+    ]
@@ -2,9 +2,14 @@
 
 import json
 from io import StringIO
+from unittest.mock import patch
 
-
-from wyoming_microsoft_tts.download import transform_voices_files
+from wyoming_microsoft_tts.countries import COUNTRY_NAMES
+from wyoming_microsoft_tts.download import (
+    Country,
+    _get_country,
+    transform_voices_files,
+)
 
 
 def test_voice_parsing_with_script_codes():
@@ -167,3 +172,17 @@ def test_voice_parsing_with_invalid_locales():
 
     assert voices["yy-ZZ-FAKE-TestNeural"]["language"]["region"] == "FAKE"
     assert voices["yy-ZZ-FAKE-TestNeural"]["language"]["country_english"] == "Unknown"
+
+
+def test_country_lookup_uses_shipped_table():
+    """Test that countries come from the shipped table, pycountry only as fallback."""
+    _get_country.cache_clear()
+    assert _get_country("CI") == Country("CI", "Côte d'Ivoire")
+    assert _get_country("sichuan") is None
+
+    _get_country.cache_clear()
+    with patch.dict(COUNTRY_NAMES, clear=True):
+        assert _get_country("us") == Country("US", "United States")
+        assert _get_country("XX") is None
+
+    _get_country.cache_clear()
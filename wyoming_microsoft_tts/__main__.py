@@ -5,13 +5,31 @@ import logging
 import os
 import signal
 from functools import partial
+from pathlib import Path
 from typing import Any
 
 from wyoming.info import Attribution, Info, TtsProgram, TtsVoice
 from wyoming.server import AsyncServer
 
+from wyoming_microsoft_tts import convert, tracing
+from wyoming_microsoft_tts.backend import (
+    DEFAULT_OUTPUT_FORMAT,
+    OUTPUT_FORMATS,
+    SynthesisBackend,
+)
+from wyoming_microsoft_tts.cache import AudioCache
+from wyoming_microsoft_tts.catalog import VoiceCatalog, refresh_voices
+from wyoming_microsoft_tts.coalesce import SynthesisCoalescer
 from wyoming_microsoft_tts.download import get_voices
-from wyoming_microsoft_tts.handler import MicrosoftEventHandler
+from wyoming_microsoft_tts.executor import SynthesisExecutor
+from wyoming_microsoft_tts.fake_backend import FakeBackend
+from wyoming_microsoft_tts.handler import MicrosoftEventHandler, prepare_text
+from wyoming_microsoft_tts.metrics import start_metrics_server
+from wyoming_microsoft_tts.microsoft_tts import MicrosoftTTS
+from wyoming_microsoft_tts.phrases import PhraseStore, load_phrases, warm_phrases
+from wyoming_microsoft_tts.profiles import VoiceProfiles
+from wyoming_microsoft_tts.ssml import Prosody
+from wyoming_microsoft_tts.tracing import TraceExporter
 from wyoming_microsoft_tts.version import __version__
 
 _LOGGER = logging.getLogger(__name__)
@@ -39,6 +57,36 @@ def parse_arguments():
         default=os.getenv("AZURE_SUBSCRIPTION_KEY"),
         help="Microsoft Azure subscription key",
     )
+    parser.add_argument(
+        "--backend",
+        choices=("microsoft", "fake"),
+        default="microsoft",
+        help="Synthesize with Azure, or offline with silence for load testing (default: microsoft)",
+    )
+    parser.add_argument(
+        "--fake-latency-ms",
+        type=float,
+        default=100.0,
+        help="Milliseconds the fake backend takes before audio is ready (default: 100)",
+    )
+    parser.add_argument(
+        "--fake-jitter-ms",
+        type=float,
+        default=0.0,
+        help="Milliseconds the fake backend's latency varies by, either way (default: 0)",
+    )
+    parser.add_argument(
+        "--fake-failure-rate",
+        type=float,
+        default=0.0,
+        help="Fraction of fake syntheses that fail, from 0 to 1 (default: 0)",
+    )
+    parser.add_argument(
+        "--fake-seed",
+        type=int,
+        default=0,
+        help="Seed for the fake backend's jitter and failures (default: 0)",
+    )
     parser.add_argument(
         "--voice",
         default="en-GB-SoniaNeural",
@@ -66,7 +114,99 @@ def parse_arguments():
         action="store_true",
         help="Disable audio streaming on sentence boundaries",
     )
+    parser.add_argument(
+        "--stream-audio",
+        action="store_true",
+        help="Send audio to the client while Azure is still synthesizing it",
+    )
+    parser.add_argument(
+        "--stream-prefetch",
+        type=int,
+        default=2,
+        help="Number of streamed sentences synthesized ahead of the one being sent (default: 2)",
+    )
+    parser.add_argument(
+        "--stream-batch-chars",
+        type=int,
+        default=0,
+        help="Merge streamed sentences into one synthesis of up to this many characters while earlier audio is still playing (default: 0, disabled)",
+    )
+    parser.add_argument(
+        "--first-clause-chars",
+        type=int,
+        default=0,
+        help="Send the first clause of a text stream on its own once this many characters are waiting (default: 0, disabled)",
+    )
+    parser.add_argument(
+        "--first-clause-ms",
+        type=float,
+        default=0.0,
+        help="Send the first clause of a text stream on its own once this many milliseconds passed since the stream started, checked whenever text arrives (default: 0, disabled)",
+    )
+    parser.add_argument(
+        "--output-format",
+        choices=sorted(OUTPUT_FORMATS),
+        default=DEFAULT_OUTPUT_FORMAT,
+        help=f"Raw PCM format requested from Azure and sent to clients (default: {DEFAULT_OUTPUT_FORMAT})",
+    )
     parser.add_argument("--samples-per-chunk", type=int, default=1024)
+    parser.add_argument(
+        "--max-concurrent-synthesis",
+        type=int,
+        default=4,
+        help="Maximum number of Azure synthesis requests running at the same time (default: 4)",
+    )
+    parser.add_argument(
+        "--max-queued-synthesis",
+        type=int,
+        default=16,
+        help="Maximum number of synthesis requests waiting for a free slot before new ones are rejected (default: 16)",
+    )
+    parser.add_argument(
+        "--synthesizer-pool-size",
+        type=int,
+        default=4,
+        help="Maximum number of idle Azure synthesizers kept per voice (default: 4)",
+    )
+    parser.add_argument(
+        "--synthesizer-idle-timeout",
+        type=float,
+        default=300.0,
+        help="Seconds before an idle Azure synthesizer is closed, checked this often (default: 300)",
+    )
+    parser.add_argument(
+        "--cache-size-mb",
+        type=float,
+        default=32.0,
+        help="Memory for caching synthesized audio in MB, 0 to disable (default: 32)",
+    )
+    parser.add_argument(
+        "--disk-cache-size-mb",
+        type=float,
+        default=0.0,
+        help="Disk space for caching synthesized audio under --download-dir in MB, 0 to disable (default: 0)",
+    )
+    parser.add_argument(
+        "--disk-cache-ttl",
+        type=float,
+        default=7 * 24 * 60 * 60,
+        help="Seconds before audio cached on disk expires (default: 604800, one week)",
+    )
+    parser.add_argument(
+        "--warm-phrases",
+        help="Text file (one phrase per line) or JSON file of phrases to pre-synthesize into a phrase store under --download-dir",
+    )
+    parser.add_argument(
+        "--warm-phrases-rate",
+        type=float,
+        default=1.0,
+        help="Maximum number of phrases pre-synthesized per second (default: 1)",
+    )
+    parser.add_argument(
+        "--prewarm",
+        action="store_true",
+        help="Open a connection for the default voice during startup",
+    )
     #
     parser.add_argument(
         "--rate",
@@ -93,24 +233,94 @@ def parse_arguments():
         type=float,
         help="Style intensity from 0.01 to 2 (default: 1)",
     )
+    parser.add_argument(
+        "--voice-profiles",
+        help="JSON (or YAML) file with prosody and style per voice, reloaded when changed",
+    )
     #
     parser.add_argument(
         "--update-voices",
         action="store_true",
         help="Download latest voices.json during startup",
     )
+    parser.add_argument(
+        "--voice-filter",
+        help="Comma-separated language families (en), locales (en-GB) or voice names to advertise to clients (default: all voices)",
+    )
+    parser.add_argument(
+        "--refresh-voices-interval",
+        type=float,
+        default=0.0,
+        help="Seconds between downloads of the voice list while running, 0 to disable (default: 0)",
+    )
     #
+    parser.add_argument(
+        "--metrics-uri",
+        help="Serve Prometheus metrics over HTTP at this address (e.g., http://0.0.0.0:9090)",
+    )
+    parser.add_argument(
+        "--trace",
+        action="store_true",
+        help="Log a JSON line with the timing of each stage of every request",
+    )
+    parser.add_argument(
+        "--trace-file",
+        help="Append the JSON lines of --trace to this file instead of logging them",
+    )
     parser.add_argument("--debug", action="store_true", help="Log DEBUG messages")
+    parser.add_argument(
+        "--debug-audio-dir",
+        help="Also write every synthesized sentence as a WAV file into this directory",
+    )
     return parser.parse_args()
 
 
 def validate_args(args):
     """Validate command-line arguments."""
-    if not args.service_region or not args.subscription_key:
+    if (args.backend == "microsoft") and (
+        not args.service_region or not args.subscription_key
+    ):
         raise ValueError(
             "Both --service-region and --subscription-key must be provided either as command-line arguments or environment variables."
         )
 
+    if args.max_concurrent_synthesis < 1:
+        raise ValueError("--max-concurrent-synthesis must be at least 1.")
+
+    if args.max_queued_synthesis < 0:
+        raise ValueError("--max-queued-synthesis must not be negative.")
+
+    if args.warm_phrases_rate <= 0:
+        raise ValueError("--warm-phrases-rate must be positive.")
+
+    if args.stream_prefetch < 0:
+        raise ValueError("--stream-prefetch must not be negative.")
+
+    if args.stream_batch_chars < 0:
+        raise ValueError("--stream-batch-chars must not be negative.")
+
+    if (args.first_clause_chars < 0) or (args.first_clause_ms < 0):
+        raise ValueError(
+            "--first-clause-chars and --first-clause-ms must not be negative."
+        )
+
+    if args.refresh_voices_interval < 0:
+        raise ValueError("--refresh-voices-interval must not be negative.")
+
+    if args.synthesizer_pool_size < 0:
+        raise ValueError("--synthesizer-pool-size must not be negative.")
+
+    validate_fake_args(args)
+
+
+def validate_fake_args(args):
+    """Validate command-line arguments of the fake backend."""
+    if (args.fake_latency_ms < 0) or (args.fake_jitter_ms < 0):
+        raise ValueError("--fake-latency-ms and --fake-jitter-ms must not be negative.")
+
+    if not 0 <= args.fake_failure_rate <= 1:
+        raise ValueError("--fake-failure-rate must be between 0 and 1.")
+
 
 async def main() -> None:
     """Start Wyoming Microsoft TTS server."""
@@ -135,11 +345,231 @@ async def main() -> None:
         _LOGGER.error(f"Failed to load voices: {e}")
         return
 
-    # Resolve aliases for backwards compatibility with old voice names
-    aliases_info: dict[str, Any] = {}
-    for voice_info in voices_info.values():
-        for voice_alias in voice_info.get("aliases", []):
-            aliases_info[voice_alias] = {"_is_alias": True, **voice_info}
+    voices_info, wyoming_info = prepare_voices(args, voices_info)
+    catalog = VoiceCatalog(voices_info, wyoming_info)
+
+    background_tasks: list[asyncio.Task] = []
+    profiles: VoiceProfiles | None = None
+    if args.voice_profiles:
+        profiles = VoiceProfiles(
+            args.voice_profiles, voices_info, Prosody.from_args(args)
+        )
+
+    # One engine is shared by all connections
+    microsoft_tts = create_backend(args, voices_info, profiles)
+
+    background_tasks.extend(
+        start_background_tasks(args, catalog, microsoft_tts, profiles)
+    )
+
+    audio_cache = create_audio_cache(args)
+    tracing.configure(create_trace_exporter(args))
+    coalescer = SynthesisCoalescer()
+
+    # Synthesis runs in a bounded thread pool so it never blocks the event loop
+    executor = SynthesisExecutor(
+        max_workers=args.max_concurrent_synthesis,
+        max_queued=args.max_queued_synthesis,
+    )
+
+    if args.prewarm:
+        await prewarm(args, microsoft_tts, executor)
+
+    phrase_store: PhraseStore | None = None
+    if args.warm_phrases:
+        phrase_store, warm_task = start_warming_phrases(args, microsoft_tts, executor)
+        background_tasks.append(warm_task)
+
+    metrics_server: asyncio.Server | None = None
+    if args.metrics_uri:
+        metrics_server = await start_metrics_server(args.metrics_uri)
+
+    # Start server
+    server = AsyncServer.from_uri(args.uri)
+
+    _LOGGER.info("Ready")
+    try:
+        await server.run(
+            partial(
+                MicrosoftEventHandler,
+                catalog,
+                args,
+                microsoft_tts,
+                executor,
+                audio_cache=audio_cache,
+                phrase_store=phrase_store,
+                coalescer=coalescer,
+            )
+        )
+    except Exception as e:
+        _LOGGER.error(f"An error occurred while running the server: {e}")
+    finally:
+        for task in background_tasks:
+            task.cancel()
+
+        if metrics_server is not None:
+            metrics_server.close()
+
+        executor.shutdown()
+        microsoft_tts.close()
+        _LOGGER.debug("Coalesced %s synthesis request(s)", coalescer.coalesced)
+        if audio_cache is not None:
+            _LOGGER.debug(
+                "Audio cache: %s hit(s), %s miss(es)",
+                audio_cache.hits,
+                audio_cache.misses,
+            )
+
+
+# -----------------------------------------------------------------------------
+
+
+def create_backend(
+    args: argparse.Namespace,
+    voices_info: dict[str, Any],
+    profiles: VoiceProfiles | None,
+) -> SynthesisBackend:
+    """Create the synthesis backend chosen with --backend."""
+    if not convert.is_available():
+        _LOGGER.info(
+            "NumPy is not installed, audio is always sent in %s", args.output_format
+        )
+
+    if args.backend == "fake":
+        _LOGGER.warning("Using the fake backend, clients will only hear silence")
+        return FakeBackend(
+            args,
+            voices=voices_info,
+            profiles=profiles,
+            output_format=args.output_format,
+            latency=args.fake_latency_ms / 1000,
+            jitter=args.fake_jitter_ms / 1000,
+            failure_rate=args.fake_failure_rate,
+            seed=args.fake_seed,
+        )
+
+    return MicrosoftTTS(
+        args,
+        voices=voices_info,
+        pool_size=args.synthesizer_pool_size,
+        pool_idle_timeout=args.synthesizer_idle_timeout,
+        debug_audio_dir=args.debug_audio_dir,
+        profiles=profiles,
+        output_format=args.output_format,
+    )
+
+
+async def prewarm(
+    args: argparse.Namespace,
+    microsoft_tts: SynthesisBackend,
+    executor: SynthesisExecutor,
+) -> None:
+    """Open a connection for the default voice."""
+    if await executor.run(microsoft_tts.prewarm):
+        _LOGGER.info("Pre-warmed synthesizer for %s", args.voice)
+    else:
+        _LOGGER.warning("Could not pre-warm synthesizer for %s", args.voice)
+
+
+def start_warming_phrases(
+    args: argparse.Namespace,
+    microsoft_tts: SynthesisBackend,
+    executor: SynthesisExecutor,
+) -> tuple[PhraseStore, asyncio.Task]:
+    """Start pre-synthesizing the phrases in args.warm_phrases."""
+    phrases = load_phrases(args.warm_phrases)
+    phrase_store = PhraseStore(Path(args.download_dir) / "phrases")
+    _LOGGER.info("Pre-synthesizing %s phrase(s) in the background", len(phrases))
+    warm_task = asyncio.create_task(
+        warm_phrases(
+            phrases,
+            partial(prepare_text, auto_punctuation=args.auto_punctuation),
+            phrase_store,
+            microsoft_tts,
+            executor,
+            phrases_per_second=args.warm_phrases_rate,
+        ),
+        name="warm phrases",
+    )
+
+    return phrase_store, warm_task
+
+
+def start_background_tasks(
+    args: argparse.Namespace,
+    catalog: VoiceCatalog,
+    microsoft_tts: SynthesisBackend,
+    profiles: VoiceProfiles | None,
+) -> list[asyncio.Task]:
+    """Start watching the voice profiles, refreshing the voice list and closing idle synthesizers."""
+    tasks: list[asyncio.Task] = []
+    if args.synthesizer_idle_timeout > 0:
+        tasks.append(
+            asyncio.create_task(
+                evict_idle(microsoft_tts, args.synthesizer_idle_timeout),
+                name="evict idle synthesizers",
+            )
+        )
+
+    if profiles is not None:
+        tasks.append(
+            asyncio.create_task(
+                profiles.watch(on_reload=microsoft_tts.prebuild_ssml),
+                name="watch voice profiles",
+            )
+        )
+
+    if args.refresh_voices_interval > 0:
+        tasks.append(start_refreshing_voices(args, catalog, microsoft_tts, profiles))
+
+    return tasks
+
+
+async def evict_idle(microsoft_tts: SynthesisBackend, interval: float) -> None:
+    """Close idle synthesizers every interval seconds, even without requests."""
+    while True:
+        await asyncio.sleep(interval)
+        await asyncio.to_thread(microsoft_tts.evict_idle)
+
+
+def start_refreshing_voices(
+    args: argparse.Namespace,
+    catalog: VoiceCatalog,
+    microsoft_tts: SynthesisBackend,
+    profiles: VoiceProfiles | None,
+) -> asyncio.Task:
+    """Start refreshing the voice list every args.refresh_voices_interval."""
+
+    def load() -> tuple[dict[str, Any], Info]:
+        return prepare_voices(args, get_voices(args.download_dir))
+
+    def on_update(voices_info: dict[str, Any]) -> None:
+        microsoft_tts.voices = voices_info
+        if profiles is not None:
+            profiles.voices = voices_info
+
+    return asyncio.create_task(
+        refresh_voices(
+            catalog,
+            args.download_dir,
+            region=args.service_region,
+            key=args.subscription_key,
+            load=load,
+            interval=args.refresh_voices_interval,
+            on_update=on_update,
+        ),
+        name="refresh voices",
+    )
+
+
+def prepare_voices(
+    args: argparse.Namespace, voices_info: dict[str, Any]
+) -> tuple[dict[str, Any], Info]:
+    """Add aliases to the voices and describe them.
+
+    Raises ValueError if the default voice is missing.
+    """
+    aliases_info = get_aliases(voices_info)
 
     # Make sure default voice is in the list
     if args.voice not in voices_info:
@@ -149,6 +579,46 @@ async def main() -> None:
         )
 
     voices_info.update(aliases_info)
+    return voices_info, get_wyoming_info(args, voices_info)
+
+
+def get_aliases(voices_info: dict[str, Any]) -> dict[str, Any]:
+    """Resolve aliases for backwards compatibility with old voice names."""
+    aliases_info: dict[str, Any] = {}
+    for voice_info in voices_info.values():
+        for voice_alias in voice_info.get("aliases", []):
+            aliases_info[voice_alias] = {"_is_alias": True, **voice_info}
+
+    return aliases_info
+
+
+def is_voice_advertised(
+    voice_name: str, voice_info: dict[str, Any], voice_filter: set[str]
+) -> bool:
+    """Return True if the voice matches the filter, or there is no filter."""
+    if not voice_filter:
+        return True
+
+    language = voice_info.get("language", {})
+    return not voice_filter.isdisjoint(
+        (
+            voice_name.lower(),
+            language.get("code", "").lower(),
+            language.get("family", "").lower(),
+        )
+    )
+
+
+def get_wyoming_info(args: argparse.Namespace, voices_info: dict[str, Any]) -> Info:
+    """Describe the server and all non-alias voices that pass --voice-filter.
+
+    The default voice is always described.
+    """
+    voice_filter = {
+        item.strip().lower()
+        for item in (args.voice_filter or "").split(",")
+        if item.strip()
+    }
     voices = [
         TtsVoice(
             name=voice_name,
@@ -175,7 +645,11 @@ async def main() -> None:
             # else None,
         )
         for voice_name, voice_info in voices_info.items()
-        if not voice_info.get("_is_alias", False)
+        if (not voice_info.get("_is_alias", False))
+        and (
+            (voice_name == args.voice)
+            or is_voice_advertised(voice_name, voice_info, voice_filter)
+        )
     ]
 
     wyoming_info = Info(
@@ -195,23 +669,29 @@ async def main() -> None:
         ],
     )
 
-    # Start server
-    server = AsyncServer.from_uri(args.uri)
+    return wyoming_info
 
-    _LOGGER.info("Ready")
-    try:
-        await server.run(
-            partial(
-                MicrosoftEventHandler,
-                wyoming_info,
-                args,
-            )
-        )
-    except Exception as e:
-        _LOGGER.error(f"An error occurred while running the server: {e}")
 
+def create_audio_cache(args: argparse.Namespace) -> AudioCache | None:
+    """Create the audio cache, if enabled."""
+    if (args.cache_size_mb <= 0) and (args.disk_cache_size_mb <= 0):
+        return None
 
-# -----------------------------------------------------------------------------
+    return AudioCache(
+        max_memory_bytes=int(args.cache_size_mb * 1024 * 1024),
+        disk_dir=Path(args.download_dir) / "audio_cache",
+        max_disk_bytes=int(args.disk_cache_size_mb * 1024 * 1024),
+        disk_ttl=args.disk_cache_ttl,
+    )
+
+
+def create_trace_exporter(args: argparse.Namespace) -> TraceExporter | None:
+    """Return the exporter for request traces, or None if tracing is off."""
+    if not (args.trace or args.trace_file):
+        return None
+
+    _LOGGER.debug("Tracing requests to %s", args.trace_file or "the log")
+    return TraceExporter(args.trace_file)
 
 
 def get_description(voice_info: dict[str, Any]):
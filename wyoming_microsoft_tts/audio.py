@@ -0,0 +1,78 @@
+"""Send raw audio to clients as Wyoming audio-chunk events."""
+
+import asyncio
+from collections.abc import Iterator
+
+from wyoming.audio import AudioChunk
+
+from .framing import encode_data, event_header
+
+# Number of chunks written before waiting for the socket to drain
+CHUNKS_PER_DRAIN = 16
+
+
+def iter_chunks(
+    audio: bytes | memoryview, bytes_per_chunk: int
+) -> Iterator[memoryview]:
+    """Split audio into chunks without copying it."""
+    audio = memoryview(audio)
+    for offset in range(0, len(audio), bytes_per_chunk):
+        yield audio[offset : offset + bytes_per_chunk]
+
+
+class AudioChunkWriter:
+    """Write audio to a stream as audio-chunk events.
+
+    All chunks share the same rate, width and channels, so the JSON header of
+    each event is only built once per chunk size. Audio is written as
+    memoryview slices of the original buffer and several chunks are written
+    before draining the stream.
+    """
+
+    def __init__(
+        self,
+        writer: asyncio.StreamWriter,
+        rate: int,
+        width: int,
+        channels: int,
+        samples_per_chunk: int,
+    ) -> None:
+        """Initialize."""
+        self.writer = writer
+        self.rate = rate
+        self.width = width
+        self.channels = channels
+        self.bytes_per_chunk = width * channels * samples_per_chunk
+
+        # Same data as AudioChunk(...).event() without a timestamp
+        chunk_event = AudioChunk(
+            rate=rate, width=width, channels=channels, audio=b""
+        ).event()
+        self._data = encode_data(chunk_event.data)
+        self._type = chunk_event.type
+        self._headers: dict[int, bytes] = {}
+
+    def _header(self, payload_length: int) -> bytes:
+        """Return the event header line for a chunk of payload_length bytes."""
+        header = self._headers.get(payload_length)
+        if header is None:
+            header = event_header(self._type, len(self._data), payload_length)
+            if payload_length == self.bytes_per_chunk:
+                # Only cache the common size, the last chunk is usually shorter
+                self._headers[payload_length] = header
+
+        return header
+
+    async def write(self, audio: bytes | memoryview) -> None:
+        """Write audio as one or more chunk events."""
+        pending: list[bytes | memoryview] = []
+        for chunk in iter_chunks(audio, self.bytes_per_chunk):
+            pending.extend((self._header(len(chunk)), self._data, chunk))
+            if len(pending) >= 3 * CHUNKS_PER_DRAIN:
+                self.writer.writelines(pending)
+                pending.clear()
+                await self.writer.drain()
+
+        if pending:
+            self.writer.writelines(pending)
+            await self.writer.drain()
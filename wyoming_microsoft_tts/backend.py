@@ -0,0 +1,157 @@
+"""Interface of the engines that synthesize speech for the server."""
+
+from abc import ABC, abstractmethod
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+import azure.cognitiveservices.speech as speechsdk
+
+from .cache import make_cache_key
+from .download import get_voices
+from .profiles import VoiceProfiles, apply_prosody
+from .ssml import Prosody
+
+
+@dataclass(frozen=True)
+class OutputFormat:
+    """Audio format requested from Azure."""
+
+    sdk_format: speechsdk.SpeechSynthesisOutputFormat
+    rate: int
+    width: int
+    channels: int
+
+
+# Raw PCM has no header, so audio can be used as is and streamed audio can be
+# forwarded as it arrives. Names are Azure's.
+OUTPUT_FORMATS = {
+    "raw-8khz-16bit-mono-pcm": OutputFormat(
+        speechsdk.SpeechSynthesisOutputFormat.Raw8Khz16BitMonoPcm, 8000, 2, 1
+    ),
+    "raw-16khz-16bit-mono-pcm": OutputFormat(
+        speechsdk.SpeechSynthesisOutputFormat.Raw16Khz16BitMonoPcm, 16000, 2, 1
+    ),
+    "raw-22050hz-16bit-mono-pcm": OutputFormat(
+        speechsdk.SpeechSynthesisOutputFormat.Raw22050Hz16BitMonoPcm, 22050, 2, 1
+    ),
+    "raw-24khz-16bit-mono-pcm": OutputFormat(
+        speechsdk.SpeechSynthesisOutputFormat.Raw24Khz16BitMonoPcm, 24000, 2, 1
+    ),
+    "raw-44100hz-16bit-mono-pcm": OutputFormat(
+        speechsdk.SpeechSynthesisOutputFormat.Raw44100Hz16BitMonoPcm, 44100, 2, 1
+    ),
+    "raw-48khz-16bit-mono-pcm": OutputFormat(
+        speechsdk.SpeechSynthesisOutputFormat.Raw48Khz16BitMonoPcm, 48000, 2, 1
+    ),
+}
+
+# Same rate, width and channels as Azure's default RIFF format
+DEFAULT_OUTPUT_FORMAT = "raw-24khz-16bit-mono-pcm"
+
+
+class SynthesisBackend(ABC):
+    """Synthesizes text to raw PCM for all connections.
+
+    A single instance is shared by all connections, so synthesize and
+    synthesize_stream may be called from several threads at once. Subclasses
+    implement both; choosing prosody and cache keys is shared.
+    """
+
+    # Added to every cache key, so backends never share cached audio
+    cache_params: tuple[Any, ...] = ()
+
+    def __init__(
+        self,
+        args,
+        voices: dict[str, Any] | None = None,
+        profiles: VoiceProfiles | None = None,
+        output_format: str = DEFAULT_OUTPUT_FORMAT,
+    ) -> None:
+        """Initialize."""
+        self.args = args
+        self.output_format = OUTPUT_FORMATS[output_format]
+
+        if voices is None:
+            voices = get_voices(args.download_dir)
+
+        self.voices = voices
+
+        self.prosody = Prosody.from_args(args)
+        self.profiles = profiles
+
+    def get_prosody(
+        self, voice=None, overrides: dict[str, Any] | None = None
+    ) -> Prosody:
+        """Return the prosody for voice with per-request overrides applied.
+
+        Raises ValueError if an override is invalid for the voice, or if there
+        are overrides for an unknown voice.
+        """
+        if voice is None:
+            voice = self.args.voice
+
+        if self.profiles is None:
+            prosody = self.prosody
+        else:
+            prosody = self.profiles.get(voice)
+
+        if overrides:
+            if voice not in self.voices:
+                raise ValueError(f"Unknown voice: {voice}")
+
+            prosody = apply_prosody(prosody, overrides, self.voices[voice])
+
+        return prosody
+
+    def cache_key(self, text, voice=None, prosody: Prosody | None = None) -> str:
+        """Return the audio cache key for synthesizing text with voice."""
+        if voice is None:
+            voice = self.args.voice
+
+        if prosody is None:
+            prosody = self.get_prosody(voice)
+
+        return make_cache_key(
+            text,
+            self.voices[voice]["key"],
+            *prosody.values,
+            self.output_format.sdk_format.name,
+            *self.cache_params,
+        )
+
+    def prebuild_ssml(self) -> None:
+        """Prepare for the default voice and all profiles, after they changed."""
+
+    def prewarm(self, voice=None, timeout: float = 5.0) -> bool:
+        """Get ready to synthesize with voice ahead of the first request."""
+        return True
+
+    def evict_idle(self) -> None:
+        """Release what was held for synthesizing but hasn't been used lately."""
+
+    def close(self) -> None:
+        """Release everything held for synthesizing."""
+
+    @abstractmethod
+    def synthesize(
+        self, text, voice=None, prosody: Prosody | None = None
+    ) -> bytes | None:
+        """Synthesize text to speech.
+
+        Returns raw PCM in output_format, or None if synthesis failed.
+        """
+
+    @abstractmethod
+    def synthesize_stream(
+        self,
+        text,
+        on_audio: Callable[[bytes], None],
+        voice=None,
+        prosody: Prosody | None = None,
+    ) -> bool:
+        """Synthesize text to speech, passing raw PCM to on_audio as it arrives.
+
+        The audio is in output_format. on_audio may be called from another
+        thread. Returns True if the synthesis completed.
+        """
@@ -0,0 +1,225 @@
+"""Cache of synthesized audio, in memory and optionally on disk."""
+
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from .metrics import METRICS
+
+_LOGGER = logging.getLogger(__name__)
+
+_SUFFIX = ".pcm"
+
+
+def make_cache_key(text: str, *params: Any) -> str:
+    """Return a content address for text synthesized with params.
+
+    Whitespace in text is normalized, so "Timer  done." and "Timer done."
+    share an entry.
+    """
+    normalized = " ".join(text.split())
+    key_parts = [normalized, *(repr(param) for param in params)]
+    return hashlib.sha256("\x1f".join(key_parts).encode("utf-8")).hexdigest()
+
+
+@dataclass
+class _DiskEntry:
+    size: int
+    created: float
+    last_used: float
+
+
+class AudioCache:
+    """Least recently used cache of synthesized audio.
+
+    The memory tier holds at most max_memory_bytes of audio and is only used
+    from the event loop. The optional disk tier keeps up to max_disk_bytes in
+    disk_dir, drops entries older than disk_ttl seconds and is read and
+    written in a worker thread.
+    """
+
+    def __init__(
+        self,
+        max_memory_bytes: int,
+        disk_dir: str | Path | None = None,
+        max_disk_bytes: int = 0,
+        disk_ttl: float | None = None,
+    ) -> None:
+        """Initialize."""
+        self.max_memory_bytes = max_memory_bytes
+        self.memory_bytes = 0
+        self._memory: OrderedDict[str, bytes] = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+
+        self.disk_dir: Path | None = None
+        self.max_disk_bytes = max_disk_bytes
+        self.disk_ttl = disk_ttl
+        self.disk_bytes = 0
+        self._disk: dict[str, _DiskEntry] = {}
+        self._disk_lock = threading.Lock()
+        self._background_tasks: set[asyncio.Future] = set()
+
+        if (disk_dir is not None) and (max_disk_bytes > 0):
+            self.disk_dir = Path(disk_dir)
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+            self._scan_disk()
+
+    async def get(self, key: str) -> bytes | None:
+        """Return cached audio for key, or None on a miss."""
+        audio = self._memory.get(key)
+        if (audio is None) and (self.disk_dir is not None):
+            audio = await asyncio.to_thread(self._load, key)
+            if audio is not None:
+                self._put_memory(key, audio)
+        elif audio is not None:
+            self._memory.move_to_end(key)
+
+        if audio is None:
+            self.misses += 1
+            METRICS.cache_misses.inc()
+            _LOGGER.debug("Audio cache miss: %s", key)
+        else:
+            self.hits += 1
+            METRICS.cache_hits.inc()
+            _LOGGER.debug("Audio cache hit: %s", key)
+
+        return audio
+
+    def put(self, key: str, audio: bytes) -> None:
+        """Store audio for key in memory and, in the background, on disk."""
+        self._put_memory(key, audio)
+
+        if self.disk_dir is not None:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(None, self._save, key, audio)
+            self._background_tasks.add(future)
+            future.add_done_callback(self._background_tasks.discard)
+
+    def _put_memory(self, key: str, audio: bytes) -> None:
+        if len(audio) > self.max_memory_bytes:
+            return
+
+        old_audio = self._memory.pop(key, None)
+        if old_audio is not None:
+            self.memory_bytes -= len(old_audio)
+
+        self._memory[key] = audio
+        self.memory_bytes += len(audio)
+
+        while self.memory_bytes > self.max_memory_bytes:
+            _evicted_key, evicted_audio = self._memory.popitem(last=False)
+            self.memory_bytes -= len(evicted_audio)
+
+    # -------------------------------------------------------------------------
+    # Disk tier, only called from worker threads (or during initialization)
+    # -------------------------------------------------------------------------
+
+    def _path(self, key: str) -> Path:
+        assert self.disk_dir is not None
+        return self.disk_dir / f"{key}{_SUFFIX}"
+
+    def _scan_disk(self) -> None:
+        """Index the files already in the disk tier."""
+        assert self.disk_dir is not None
+        for path in self.disk_dir.glob(f"*{_SUFFIX}"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+
+            self._disk[path.stem] = _DiskEntry(
+                size=stat.st_size, created=stat.st_mtime, last_used=stat.st_mtime
+            )
+            self.disk_bytes += stat.st_size
+
+        with self._disk_lock:
+            self._evict_disk()
+
+        _LOGGER.debug(
+            "Audio cache has %s file(s) (%s byte(s)) in %s",
+            len(self._disk),
+            self.disk_bytes,
+            self.disk_dir,
+        )
+
+    def _load(self, key: str) -> bytes | None:
+        with self._disk_lock:
+            entry = self._disk.get(key)
+            if entry is None:
+                return None
+
+            if self._is_expired(entry, time.time()):
+                self._remove_disk(key)
+                return None
+
+            entry.last_used = time.time()
+
+        try:
+            return self._path(key).read_bytes()
+        except OSError:
+            _LOGGER.exception("Failed to read cached audio %s", key)
+            with self._disk_lock:
+                self._remove_disk(key)
+
+            return None
+
+    def _save(self, key: str, audio: bytes) -> None:
+        if len(audio) > self.max_disk_bytes:
+            return
+
+        path = self._path(key)
+        temp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+        try:
+            temp_path.write_bytes(audio)
+            os.replace(temp_path, path)
+        except OSError:
+            _LOGGER.exception("Failed to write cached audio %s", key)
+            temp_path.unlink(missing_ok=True)
+            return
+
+        now = time.time()
+        with self._disk_lock:
+            old_entry = self._disk.pop(key, None)
+            if old_entry is not None:
+                self.disk_bytes -= old_entry.size
+
+            self._disk[key] = _DiskEntry(size=len(audio), created=now, last_used=now)
+            self.disk_bytes += len(audio)
+            self._evict_disk()
+
+    def _is_expired(self, entry: _DiskEntry, now: float) -> bool:
+        return (self.disk_ttl is not None) and (now - entry.created > self.disk_ttl)
+
+    def _evict_disk(self) -> None:
+        """Remove expired entries, then least recently used ones over the cap."""
+        now = time.time()
+        for key in [k for k, e in self._disk.items() if self._is_expired(e, now)]:
+            self._remove_disk(key)
+
+        if self.disk_bytes <= self.max_disk_bytes:
+            return
+
+        for key in sorted(self._disk, key=lambda k: self._disk[k].last_used):
+            self._remove_disk(key)
+            if self.disk_bytes <= self.max_disk_bytes:
+                break
+
+    def _remove_disk(self, key: str) -> None:
+        entry = self._disk.pop(key, None)
+        if entry is None:
+            return
+
+        self.disk_bytes -= entry.size
+        try:
+            self._path(key).unlink(missing_ok=True)
+        except OSError:
+            _LOGGER.debug("Failed to remove cached audio %s", key, exc_info=True)
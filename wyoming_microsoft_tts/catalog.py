@@ -0,0 +1,79 @@
+"""Voices offered by the server, swapped as a whole when the list is refreshed."""
+
+import asyncio
+import logging
+from collections.abc import Callable
+from typing import Any
+
+from wyoming.info import Info
+
+from .download import download_voices
+from .framing import serialize_event
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class UnknownVoiceError(Exception):
+    """Raised when a request asks for a voice the server doesn't offer."""
+
+    pass
+
+
+class VoiceCatalog:
+    """Voices by name (including aliases) and the info describing them.
+
+    Both are replaced together on the event loop, so handlers always see a
+    voice list and info that belong to each other. The info is serialized
+    once per voice list, so describing the server is a single write.
+    """
+
+    def __init__(self, voices: dict[str, Any], info: Info) -> None:
+        """Initialize."""
+        self.voices = voices
+        self.info = info
+        self.info_bytes = serialize_event(info.event())
+
+    def update(self, voices: dict[str, Any], info: Info) -> None:
+        """Use a new voice list and its info."""
+        info_bytes = serialize_event(info.event())
+        self.voices = voices
+        self.info = info
+        self.info_bytes = info_bytes
+
+
+async def refresh_voices(
+    catalog: VoiceCatalog,
+    download_dir: str,
+    region: str,
+    key: str,
+    load: Callable[[], tuple[dict[str, Any], Info]],
+    interval: float,
+    on_update: Callable[[dict[str, Any]], None] | None = None,
+) -> None:
+    """Download the voice list every interval seconds and swap in changes.
+
+    Downloading and loading run in a thread so the event loop keeps serving
+    clients. load returns the voices and info for the downloaded list and may
+    raise ValueError to keep the current voices.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            if not await asyncio.to_thread(
+                download_voices, download_dir, region=region, key=key
+            ):
+                continue
+
+            voices, info = await asyncio.to_thread(load)
+        except ValueError as err:
+            _LOGGER.warning("Keeping current voices: %s", err)
+            continue
+        except Exception:
+            _LOGGER.exception("Failed to refresh voices")
+            continue
+
+        catalog.update(voices, info)
+        if on_update is not None:
+            on_update(voices)
+
+        _LOGGER.info("Refreshed voice list")
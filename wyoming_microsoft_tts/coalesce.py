@@ -0,0 +1,83 @@
+"""Share one synthesis between identical requests that are in flight together."""
+
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+
+_LOGGER = logging.getLogger(__name__)
+
+AudioCallback = Callable[[bytes], None]
+
+
+class _Flight:
+    """Synthesis in progress and the audio queues waiting for it."""
+
+    def __init__(self) -> None:
+        self.parts: list[bytes] = []
+        self.queues: set[asyncio.Queue[bytes | None]] = set()
+        self.task: asyncio.Future[bool] | None = None
+
+    def add_audio(self, audio: bytes) -> None:
+        self.parts.append(audio)
+        for queue in self.queues:
+            queue.put_nowait(audio)
+
+    def subscribe(self, queue: "asyncio.Queue[bytes | None]") -> None:
+        # Late arrivals get the audio produced so far first
+        for audio in self.parts:
+            queue.put_nowait(audio)
+
+        self.queues.add(queue)
+
+
+class SynthesisCoalescer:
+    """Run at most one synthesis per key at a time.
+
+    Requests for a key that is already being synthesized attach to the running
+    synthesis and receive the same audio on their own queue. The synthesis is
+    not tied to any one request, so it keeps going for the others when a
+    client disconnects. Only used from the event loop.
+    """
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self._flights: dict[str, _Flight] = {}
+        self.coalesced = 0
+
+    def __contains__(self, key: str) -> bool:
+        """Return True if key is being synthesized."""
+        return key in self._flights
+
+    async def run(
+        self,
+        key: str,
+        audio_queue: "asyncio.Queue[bytes | None]",
+        synthesize: Callable[[AudioCallback], Awaitable[bool]],
+    ) -> bool:
+        """Put the audio for key on audio_queue and return True if completed.
+
+        synthesize is only called if key is not in flight. It must pass audio
+        to the callback from the event loop.
+        """
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight()
+            flight.task = asyncio.ensure_future(synthesize(flight.add_audio))
+            flight.task.add_done_callback(lambda task: self._finish(key, task))
+            self._flights[key] = flight
+        else:
+            self.coalesced += 1
+            _LOGGER.debug("Joining synthesis in flight: %s", key)
+
+        assert flight.task is not None
+        flight.subscribe(audio_queue)
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.queues.discard(audio_queue)
+
+    def _finish(self, key: str, task: "asyncio.Future[bool]") -> None:
+        self._flights.pop(key, None)
+        if not task.cancelled() and (task.exception() is not None):
+            # Also retrieves the exception if every request went away
+            _LOGGER.debug("Synthesis failed for %s: %s", key, task.exception())
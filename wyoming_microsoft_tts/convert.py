@@ -0,0 +1,193 @@
+"""Convert raw PCM to the rate, width and channels a client wants."""
+
+from typing import Any
+
+from wyoming.audio import AudioFormat
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Sample widths that can be converted, in bytes
+WIDTHS = (1, 2, 4)
+
+# Channels that can be converted to
+CHANNELS = (1, 2)
+
+# Sample rates that can be converted to
+RATE_RANGE = (8000, 192000)
+
+# Taps of the low-pass filter applied before lowering the rate
+LOWPASS_TAPS = 31
+
+
+def is_available() -> bool:
+    """Return True if NumPy is installed, which conversion needs."""
+    return np is not None
+
+
+def _lowpass(cutoff: float) -> Any:
+    """Return a windowed-sinc low-pass filter, cutoff relative to the rate."""
+    n = np.arange(LOWPASS_TAPS) - (LOWPASS_TAPS - 1) / 2
+    taps = 2 * cutoff * np.sinc(2 * cutoff * n) * np.hamming(LOWPASS_TAPS)
+    return (taps / taps.sum()).astype(np.float32)
+
+
+class AudioConverter:
+    """Convert a stream of raw PCM blocks from one format to another.
+
+    Blocks may end part way through a frame and resampling carries over from
+    one block to the next, so a stream can be converted as it arrives. Rates
+    are changed by linear interpolation, after a low-pass filter when the rate
+    is lowered. Call flush at the end of the stream for the last samples.
+    """
+
+    def __init__(self, source: AudioFormat, target: AudioFormat) -> None:
+        """Initialize."""
+        if np is None:
+            raise ValueError("NumPy is required to convert audio")
+
+        if (source.width not in WIDTHS) or (target.width not in WIDTHS):
+            raise ValueError(f"Sample width must be one of {WIDTHS}")
+
+        if target.channels not in CHANNELS:
+            raise ValueError(f"Channels must be one of {CHANNELS}")
+
+        if (source.channels != target.channels) and (
+            1 not in (source.channels, target.channels)
+        ):
+            raise ValueError(
+                f"Cannot convert {source.channels} channels to {target.channels}"
+            )
+
+        if not RATE_RANGE[0] <= target.rate <= RATE_RANGE[1]:
+            raise ValueError(
+                f"Rate must be between {RATE_RANGE[0]} and {RATE_RANGE[1]}"
+            )
+
+        self.source = source
+        self.target = target
+        self._bytes_per_frame = source.width * source.channels
+        self._remainder = b""
+
+        # Input frames per output frame, and where the next output frame is
+        # relative to the last input frame of the previous block
+        self._step = source.rate / target.rate
+        self._position = 0.0
+        self._last_frame: Any = None
+
+        self._taps: Any = None
+        self._history: Any = None
+        self._delay = 0
+        if target.rate < source.rate:
+            # Keep below the new Nyquist frequency to avoid aliasing
+            self._taps = _lowpass(0.45 * target.rate / source.rate)
+            self._history = np.zeros(
+                (LOWPASS_TAPS - 1, target.channels), dtype=np.float32
+            )
+            # Filtered frames lag behind by half the filter
+            self._delay = (LOWPASS_TAPS - 1) // 2
+
+    def convert(self, audio: bytes) -> bytes:
+        """Return the converted audio for the next block of the stream."""
+        audio = self._remainder + audio
+        num_bytes = len(audio) - (len(audio) % self._bytes_per_frame)
+        self._remainder = audio[num_bytes:]
+        if num_bytes == 0:
+            return b""
+
+        return self._convert_frames(self._decode(audio[:num_bytes]))
+
+    def flush(self) -> bytes:
+        """Return the audio still held back by the low-pass filter."""
+        self._remainder = b""
+        if self._taps is None:
+            return b""
+
+        # Push the delayed samples out with silence
+        silence = np.zeros(
+            ((LOWPASS_TAPS - 1) // 2, self.source.channels), dtype=np.float32
+        )
+        return self._convert_frames(silence)
+
+    def _convert_frames(self, frames: Any) -> bytes:
+        frames = self._mix(frames)
+        if self._taps is not None:
+            frames = self._filter(frames)
+
+        if self._step != 1.0:
+            frames = self._resample(frames)
+
+        return self._encode(frames)
+
+    def _decode(self, audio: bytes) -> Any:
+        """Return frames as float32 samples from -1 to 1."""
+        width = self.source.width
+        if width == 1:
+            samples = np.frombuffer(audio, dtype=np.uint8).astype(np.float32) - 128
+        else:
+            samples = np.frombuffer(audio, dtype=f"<i{width}").astype(np.float32)
+
+        samples *= 1 / (1 << (8 * width - 1))
+        return samples.reshape(-1, self.source.channels)
+
+    def _encode(self, frames: Any) -> bytes:
+        """Return frames as raw PCM in the target width."""
+        width = self.target.width
+        scale = 1 << (8 * width - 1)
+        if width == 4:
+            # float32 can't hold the largest 32-bit sample
+            frames = frames.astype(np.float64)
+
+        samples = np.clip(np.rint(frames * scale), -scale, scale - 1)
+        if width == 1:
+            return (samples + 128).astype(np.uint8).tobytes()
+
+        return samples.astype(f"<i{width}").tobytes()
+
+    def _mix(self, frames: Any) -> Any:
+        """Return frames with the target number of channels."""
+        if self.source.channels == self.target.channels:
+            return frames
+
+        if self.target.channels == 1:
+            return frames.mean(axis=1, keepdims=True)
+
+        return np.repeat(frames, self.target.channels, axis=1)
+
+    def _filter(self, frames: Any) -> Any:
+        """Low-pass filter frames, continuing from the previous block."""
+        padded = np.concatenate((self._history, frames))
+        self._history = padded[-(LOWPASS_TAPS - 1) :]
+        filtered = np.stack(
+            [
+                np.convolve(padded[:, channel], self._taps, mode="valid")
+                for channel in range(padded.shape[1])
+            ],
+            axis=1,
+        )
+        if self._delay > 0:
+            # Drop the frames from before the start of the stream
+            num_dropped = min(self._delay, len(filtered))
+            filtered = filtered[num_dropped:]
+            self._delay -= num_dropped
+
+        return filtered
+
+    def _resample(self, frames: Any) -> Any:
+        """Return frames at the target rate, continuing from the previous block."""
+        start = 0.0
+        if self._last_frame is not None:
+            frames = np.concatenate((self._last_frame, frames))
+            start = self._position
+
+        end = len(frames) - 1
+        positions = np.arange(start, end, self._step)
+        indexes = positions.astype(np.int64)
+        fractions = (positions - indexes).astype(np.float32)[:, np.newaxis]
+        resampled = frames[indexes] * (1 - fractions) + frames[indexes + 1] * fractions
+
+        self._last_frame = frames[-1:]
+        self._position = start + len(positions) * self._step - end
+        return resampled
@@ -2,22 +2,46 @@
 
 import json
 import logging
+import marshal
+import os
+import struct
+import sys
+from collections.abc import Callable
+from functools import cache
+from http import HTTPStatus
 from pathlib import Path
-from typing import Any
+from typing import Any, BinaryIO, NamedTuple
+from urllib.error import HTTPError
 from urllib.parse import quote, urlsplit, urlunsplit
 from urllib.request import Request, urlopen
 
-from pycountry import countries
+from .countries import COUNTRY_NAMES
 
 URL_FORMAT = "https://{region}.tts.speech.microsoft.com/cognitiveservices/voices/list"
 URL_HEADER = "Ocp-Apim-Subscription-Key"
 
+# Seconds to wait for the voice list to download
+DOWNLOAD_TIMEOUT = 30
+
 
 _DIR = Path(__file__).parent
 _LOGGER = logging.getLogger(__name__)
 
 _SKIP_FILES = {"MODEL_CARD"}
 
+# Bump when the voices stored in compiled catalogs change shape
+CATALOG_VERSION = 1
+
+# Compiled catalogs start with the size of their stamp
+_STAMP_SIZE = struct.Struct("<I")
+
+
+class Country(NamedTuple):
+    """Country of a locale."""
+
+    alpha_2: str
+    name: str
+
 
 class VoiceNotFoundError(Exception):
     """Raised when a voice is not found."""
@@ -32,7 +56,7 @@ def _quote_url(url: str) -> str:
     return urlunsplit(parts)
 
 
-def _get_country_from_locale(locale: str):
+def _get_country_from_locale(locale: str) -> Country | None:
     """Extract country information from a locale string.
 
     Handles both standard (lang-COUNTRY) and extended (lang-script-COUNTRY) locale formats.
@@ -47,7 +71,31 @@ def _get_country_from_locale(locale: str):
     else:
         return None
 
-    return countries.get(alpha_2=country_code)
+    return _get_country(country_code)
+
+
+@cache
+def _get_country(country_code: str) -> Country | None:
+    """Look up a country by its code once for all the voices using it.
+
+    pycountry is only imported for codes missing from the shipped table.
+    """
+    alpha_2 = country_code.upper()
+    name = COUNTRY_NAMES.get(alpha_2)
+    if name is not None:
+        return Country(alpha_2, name)
+
+    if len(country_code) != 2:
+        # Not a country code, e.g. the dialect in "zh-CN-sichuan"
+        return None
+
+    from pycountry import countries
+
+    country = countries.get(alpha_2=country_code)
+    if country is None:
+        return None
+
+    return Country(country.alpha_2, country.name)
 
 
 def transform_voices_files(response):
@@ -87,6 +135,7 @@ def transform_voices_files(response):
                 "num_speakers": 1,
                 "speaker_id_map": {},
                 "aliases": [],
+                "styles": entry.get("StyleList", []),
             }
             if "SecondaryLocaleList" in entry:
                 for secondary_locale in entry["SecondaryLocaleList"]:
@@ -121,6 +170,7 @@ def transform_voices_files(response):
                         "num_speakers": 1,
                         "speaker_id_map": {},
                         "aliases": [],
+                        "styles": entry.get("StyleList", []),
                     }
         except Exception as e:
             _LOGGER.exception(
@@ -143,30 +193,203 @@ def get_voices(
 
     if update_voices:
         # Download latest voices.json
-        try:
-            voices_url = URL_FORMAT.format(region=region)
-            voices_hdr = {URL_HEADER: key}
-            _LOGGER.debug("Downloading %s to %s", voices_url, voices_download)
-            req = Request(_quote_url(voices_url), headers=voices_hdr)
-            with urlopen(req) as response, open(voices_download, "w") as download_file:
-                json.dump(transform_voices_files(response), download_file, indent=4)
-        except Exception:
-            _LOGGER.exception("Failed to update voices list")
+        download_voices(download_dir, region=region, key=key)
 
     # Prefer downloaded file to embedded
     if voices_download.exists():
         try:
             _LOGGER.debug("Loading downloaded file: %s", voices_download)
-            with open(voices_download, encoding="utf-8") as voices_file:
-                return json.load(voices_file)
+            return _load_voices(
+                voices_download, download_dir / "voices.catalog", json.load
+            )
         except Exception:
             _LOGGER.exception("Failed to load %s", voices_download)
 
     # Fall back to embedded
     voices_embedded = _DIR / "voices.json"
     _LOGGER.debug("Loading embedded file: %s", voices_embedded)
-    with open(voices_embedded, encoding="utf-8") as voices_file:
-        return transform_voices_files(voices_file)
+    return _load_voices(
+        voices_embedded,
+        download_dir / "voices-embedded.catalog",
+        transform_voices_files,
+    )
+
+
+def download_voices(
+    download_dir: str | Path, region: str = "westus", key: str = ""
+) -> bool:
+    """Download voices.json into download_dir if the voice list changed.
+
+    The request is conditional on the ETag and Last-Modified of the previous
+    download, which are kept in voices.headers.json. voices.json is replaced
+    atomically, so a failed download never leaves a partial file behind.
+    Returns True if a new voices.json was written.
+    """
+    download_dir = Path(download_dir)
+    voices_download = download_dir / "voices.json"
+    headers_path = download_dir / "voices.headers.json"
+    try:
+        voices_url = URL_FORMAT.format(region=region)
+        voices_hdr = {URL_HEADER: key}
+        if voices_download.exists():
+            voices_hdr.update(_read_conditional_headers(headers_path))
+
+        _LOGGER.debug("Downloading %s to %s", voices_url, voices_download)
+        req = Request(_quote_url(voices_url), headers=voices_hdr)
+        try:
+            with urlopen(req, timeout=DOWNLOAD_TIMEOUT) as response:
+                voices_text = json.dumps(transform_voices_files(response), indent=4)
+                response_headers = {
+                    name: response.headers[name]
+                    for name in ("ETag", "Last-Modified")
+                    if response.headers.get(name)
+                }
+        except HTTPError as err:
+            if err.code == HTTPStatus.NOT_MODIFIED:
+                _LOGGER.debug("Voices list not modified")
+                return False
+
+            raise
+
+        is_changed = (not voices_download.exists()) or (
+            voices_download.read_text(encoding="utf-8") != voices_text
+        )
+        if is_changed:
+            _write_atomic(voices_download, voices_text)
+
+        _write_atomic(headers_path, json.dumps(response_headers))
+    except Exception:
+        _LOGGER.exception("Failed to update voices list")
+        return False
+
+    return is_changed
+
+
+def _read_conditional_headers(headers_path: Path) -> dict[str, str]:
+    """Return the headers asking for the voice list only if it changed."""
+    try:
+        with open(headers_path, encoding="utf-8") as headers_file:
+            response_headers = json.load(headers_file)
+    except (OSError, ValueError):
+        return {}
+
+    conditional_headers = {}
+    if response_headers.get("ETag"):
+        conditional_headers["If-None-Match"] = response_headers["ETag"]
+
+    if response_headers.get("Last-Modified"):
+        conditional_headers["If-Modified-Since"] = response_headers["Last-Modified"]
+
+    return conditional_headers
+
+
+def _write_atomic(path: Path, text: str) -> None:
+    """Replace the file at path with text, all at once."""
+    path_tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(path_tmp, "w", encoding="utf-8") as tmp_file:
+            tmp_file.write(text)
+
+        os.replace(path_tmp, path)
+    finally:
+        path_tmp.unlink(missing_ok=True)
+
+
+def _load_voices(
+    source: Path, catalog: Path, parse: Callable[[Any], dict[str, Any]]
+) -> dict[str, Any]:
+    """Load voices from a compiled catalog, compiling it from source if needed."""
+    voices = read_catalog(catalog, source)
+    if voices is not None:
+        _LOGGER.debug("Loaded compiled catalog: %s", catalog)
+        return voices
+
+    with open(source, encoding="utf-8") as voices_file:
+        voices = parse(voices_file)
+
+    write_catalog(catalog, source, voices)
+    return voices
+
+
+def _catalog_stamp(source: Path) -> tuple:
+    """Return what a compiled catalog of source must have been made from.
+
+    marshal's format may change between Python versions, so the version is
+    part of the stamp.
+    """
+    source_stat = source.stat()
+    return (
+        CATALOG_VERSION,
+        tuple(sys.version_info[:2]),
+        str(source.resolve()),
+        source_stat.st_mtime_ns,
+        source_stat.st_size,
+    )
+
+
+def _is_private(catalog_file: BinaryIO) -> bool:
+    """Return True if only the current user can have written the open file."""
+    if not hasattr(os, "getuid"):
+        # No owners to check (Windows)
+        return True
+
+    catalog_stat = os.fstat(catalog_file.fileno())
+    return (catalog_stat.st_uid == os.getuid()) and not (catalog_stat.st_mode & 0o077)
+
+
+def read_catalog(catalog: Path, source: Path) -> dict[str, Any] | None:
+    """Return the voices compiled from source, or None if catalog is missing or stale.
+
+    marshal must not read data from others, and download_dir may be shared
+    (like /tmp/), so catalogs that aren't private to the current user are
+    ignored.
+    """
+    try:
+        with open(catalog, "rb") as catalog_file:
+            if not _is_private(catalog_file):
+                _LOGGER.warning("Ignoring voice catalog of another user: %s", catalog)
+                return None
+
+            (stamp_size,) = _STAMP_SIZE.unpack(catalog_file.read(_STAMP_SIZE.size))
+            stamp = marshal.loads(catalog_file.read(stamp_size))
+            if stamp != _catalog_stamp(source):
+                return None
+
+            voices = marshal.loads(catalog_file.read())
+    except FileNotFoundError:
+        return None
+    except (OSError, EOFError, ValueError, TypeError, struct.error):
+        _LOGGER.warning("Ignoring unreadable voice catalog: %s", catalog)
+        return None
+
+    if not isinstance(voices, dict):
+        return None
+
+    return voices
+
+
+def write_catalog(catalog: Path, source: Path, voices: dict[str, Any]) -> None:
+    """Compile the voices from source into catalog for faster loading next time.
+
+    The catalog is replaced atomically, so other processes never read a
+    partial one. Only the current user can read or write it.
+    """
+    catalog_tmp = catalog.with_name(f"{catalog.name}.{os.getpid()}.tmp")
+    try:
+        stamp = marshal.dumps(_catalog_stamp(source))
+        catalog_tmp.unlink(missing_ok=True)
+
+        # Never follows a link someone else put in place of the file
+        catalog_fd = os.open(catalog_tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with open(catalog_fd, "wb") as catalog_file:
+            catalog_file.write(_STAMP_SIZE.pack(len(stamp)))
+            catalog_file.write(stamp)
+            marshal.dump(voices, catalog_file)
+
+        os.replace(catalog_tmp, catalog)
+    except (OSError, ValueError):
+        _LOGGER.warning("Failed to write voice catalog: %s", catalog, exc_info=True)
+        catalog_tmp.unlink(missing_ok=True)
 
 
 def find_voice(name: str, download_dir: str | Path) -> dict[str, Any]:
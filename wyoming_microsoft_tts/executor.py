@@ -0,0 +1,96 @@
+"""Bounded thread pool for running blocking synthesis calls."""
+
+import asyncio
+import logging
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from functools import partial
+from typing import Any, TypeVar
+
+from . import tracing
+from .metrics import METRICS
+
+_LOGGER = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
+
+class SynthesisQueueFullError(Exception):
+    """Raised when too many synthesis requests are already pending."""
+
+    pass
+
+
+class SynthesisExecutor:
+    """Run blocking synthesis calls off the event loop.
+
+    At most ``max_workers`` calls run at the same time and at most
+    ``max_queued`` further calls wait for a free worker. Anything beyond that
+    is rejected immediately with :class:`SynthesisQueueFullError`.
+    """
+
+    def __init__(self, max_workers: int, max_queued: int) -> None:
+        """Initialize."""
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+
+        if max_queued < 0:
+            raise ValueError("max_queued must not be negative")
+
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="synthesis"
+        )
+
+        # Only touched from the event loop thread, so no lock is needed
+        self._pending = 0
+
+    @property
+    def pending(self) -> int:
+        """Number of calls that are running or waiting for a worker."""
+        return self._pending
+
+    async def run(self, func: Callable[..., _T], *args: Any, **kwargs: Any) -> _T:
+        """Run func in the thread pool and wait for its result."""
+        if self._pending >= self.max_workers + self.max_queued:
+            raise SynthesisQueueFullError(
+                f"Too many pending synthesis requests ({self._pending})"
+            )
+
+        loop = asyncio.get_running_loop()
+
+        # Run in the caller's context, so the request is still traced
+        future = self._executor.submit(
+            copy_context().run, _timed, time.monotonic(), partial(func, *args, **kwargs)
+        )
+        self._pending += 1
+
+        # Release the slot when the worker is really done, even if the caller
+        # stopped waiting for the result (e.g. the client disconnected).
+        future.add_done_callback(
+            lambda _future: loop.call_soon_threadsafe(self._release)
+        )
+
+        return await asyncio.wrap_future(future)
+
+    def _release(self) -> None:
+        self._pending -= 1
+
+    def shutdown(self) -> None:
+        """Stop accepting work and release the worker threads."""
+        _LOGGER.debug("Shutting down synthesis executor")
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _timed(submit_time: float, func: Callable[[], Any]) -> Any:
+    """Record how long func waited for a worker, then call it."""
+    start_time = time.monotonic()
+    METRICS.queue_wait_seconds.observe(start_time - submit_time)
+    trace = tracing.current_trace()
+    if trace is not None:
+        trace.add_span("queue_wait", submit_time, start_time)
+
+    return func()
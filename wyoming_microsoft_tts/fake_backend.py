@@ -0,0 +1,138 @@
+"""Offline synthesis backend for load testing the server itself."""
+
+import logging
+import random
+import threading
+import time
+from collections.abc import Callable
+from typing import Any
+
+from . import tracing
+from .backend import DEFAULT_OUTPUT_FORMAT, SynthesisBackend
+from .metrics import METRICS
+from .profiles import VoiceProfiles
+from .ssml import Prosody
+
+_LOGGER = logging.getLogger(__name__)
+
+# Roughly how fast Azure voices speak
+CHARS_PER_SECOND = 15.0
+
+# Seconds of audio per block passed to on_audio while streaming
+STREAM_BLOCK_SECONDS = 0.1
+
+
+class FakeBackend(SynthesisBackend):
+    """Produce silence as long as the text would take to speak.
+
+    Each synthesis waits latency seconds, give or take up to jitter seconds,
+    before its audio is ready, and fails with probability failure_rate. Random
+    choices come from a generator seeded with seed, so a run that sends the
+    same requests in the same order gets the same delays and failures.
+    Streamed audio arrives in blocks, faster than real time like Azure's.
+    """
+
+    cache_params = ("fake",)
+
+    def __init__(
+        self,
+        args,
+        voices: dict[str, Any] | None = None,
+        profiles: VoiceProfiles | None = None,
+        output_format: str = DEFAULT_OUTPUT_FORMAT,
+        latency: float = 0.1,
+        jitter: float = 0.0,
+        failure_rate: float = 0.0,
+        seed: int = 0,
+        stream_speed: float = 10.0,
+    ) -> None:
+        """Initialize."""
+        if (latency < 0) or (jitter < 0):
+            raise ValueError("Latency and jitter must not be negative")
+
+        if not 0 <= failure_rate <= 1:
+            raise ValueError("Failure rate must be between 0 and 1")
+
+        if stream_speed <= 0:
+            raise ValueError("Stream speed must be positive")
+
+        super().__init__(args, voices, profiles=profiles, output_format=output_format)
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.stream_speed = stream_speed
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+        _LOGGER.debug(
+            "Fake synthesis: latency=%s, jitter=%s, failure_rate=%s",
+            latency,
+            jitter,
+            failure_rate,
+        )
+
+    def audio_size(self, text: str) -> int:
+        """Return the number of bytes of audio for text."""
+        output_format = self.output_format
+        num_frames = int(output_format.rate * len(text) / CHARS_PER_SECOND)
+        return num_frames * output_format.width * output_format.channels
+
+    def _draw(self) -> tuple[float, bool]:
+        """Return the delay of a synthesis and whether it fails."""
+        with self._random_lock:
+            delay = self.latency + self._random.uniform(-self.jitter, self.jitter)
+            fails = self._random.random() < self.failure_rate
+
+        return max(0.0, delay), fails
+
+    def synthesize(
+        self, text, voice=None, prosody: Prosody | None = None
+    ) -> bytes | None:
+        """Return silence for text after the latency, or None if it fails."""
+        delay, fails = self._draw()
+        start_time = time.monotonic()
+        try:
+            with tracing.span("fake", chars=len(text)):
+                time.sleep(delay)
+        finally:
+            METRICS.synthesis_seconds.observe(time.monotonic() - start_time)
+
+        if fails:
+            _LOGGER.debug("Fake synthesis failed for [%s]", text)
+            return None
+
+        return bytes(self.audio_size(text))
+
+    def synthesize_stream(
+        self,
+        text,
+        on_audio: Callable[[bytes], None],
+        voice=None,
+        prosody: Prosody | None = None,
+    ) -> bool:
+        """Pass silence for text to on_audio in blocks, after the latency."""
+        delay, fails = self._draw()
+        output_format = self.output_format
+        block_size = (
+            int(output_format.rate * STREAM_BLOCK_SECONDS)
+            * output_format.width
+            * output_format.channels
+        )
+        start_time = time.monotonic()
+        try:
+            with tracing.span("fake", chars=len(text)):
+                time.sleep(delay)
+                if fails:
+                    _LOGGER.debug("Fake synthesis failed for [%s]", text)
+                    return False
+
+                remaining = self.audio_size(text)
+                while remaining > 0:
+                    audio = bytes(min(block_size, remaining))
+                    on_audio(audio)
+                    remaining -= len(audio)
+                    if remaining > 0:
+                        time.sleep(STREAM_BLOCK_SECONDS / self.stream_speed)
+        finally:
+            METRICS.synthesis_seconds.observe(time.monotonic() - start_time)
+
+        return True
@@ -0,0 +1,33 @@
+"""Frame events the way wyoming writes them, so parts can be built ahead of time."""
+
+import json
+from typing import Any
+
+from wyoming import __version__ as wyoming_version
+from wyoming.event import Event
+
+
+def encode_data(data: dict[str, Any]) -> bytes:
+    """Return the data of an event as wyoming encodes it."""
+    return json.dumps(data, ensure_ascii=False).encode("utf-8")
+
+
+def event_header(
+    event_type: str, data_length: int = 0, payload_length: int = 0
+) -> bytes:
+    """Return the header line of an event with data and payload of these lengths."""
+    header: dict[str, Any] = {"type": event_type, "version": wyoming_version}
+    if data_length:
+        header["data_length"] = data_length
+
+    if payload_length:
+        header["payload_length"] = payload_length
+
+    return json.dumps(header, ensure_ascii=False).encode() + b"\n"
+
+
+def serialize_event(event: Event) -> bytes:
+    """Return the bytes wyoming writes for event."""
+    data = encode_data(event.data) if event.data else b""
+    payload = event.payload or b""
+    return event_header(event.type, len(data), len(payload)) + data + payload
@@ -1,15 +1,16 @@
 """Event handler for clients of the server."""
 
 import argparse
+import asyncio
 import logging
-import math
-import os
-import wave
+from collections.abc import Callable
+from functools import partial
+from typing import Any
 
-from wyoming.audio import AudioChunk, AudioStart, AudioStop
+from wyoming.audio import AudioFormat, AudioStart, AudioStop
 from wyoming.error import Error
 from wyoming.event import Event
-from wyoming.info import Describe, Info
+from wyoming.info import Describe
 from wyoming.server import AsyncEventHandler
 from wyoming.tts import (
     Synthesize,
@@ -17,38 +18,96 @@ from wyoming.tts import (
     SynthesizeStart,
     SynthesizeStop,
     SynthesizeStopped,
+    SynthesizeVoice,
 )
 
-from .microsoft_tts import MicrosoftTTS
-from .sentence_boundary import SentenceBoundaryDetector, remove_asterisks
+from . import tracing
+from .audio import AudioChunkWriter
+from .backend import SynthesisBackend
+from .cache import AudioCache
+from .catalog import UnknownVoiceError, VoiceCatalog
+from .coalesce import AudioCallback, SynthesisCoalescer
+from .convert import AudioConverter
+from .executor import SynthesisExecutor, SynthesisQueueFullError
+from .metrics import METRICS
+from .phrases import PhraseStore
+from .pipeline import SentencePipeline, SynthesisJob
+from .sentence_boundary import (
+    CLAUSE_END_CHARS,
+    SentenceBoundaryDetector,
+    remove_asterisks,
+)
+from .ssml import Prosody
 
 _LOGGER = logging.getLogger(__name__)
 
 
+def prepare_text(raw_text: str, auto_punctuation: str) -> str:
+    """Prepare text for synthesis the same way for every request.
+
+    Text ending in a clause (the first clause of a text stream) is not given
+    a full stop.
+    """
+    # Join multiple lines
+    text = " ".join(raw_text.strip().splitlines())
+
+    if auto_punctuation and text and (text[-1] not in CLAUSE_END_CHARS):
+        # Add automatic punctuation (important for some voices)
+        has_punctuation = False
+        for punc_char in auto_punctuation:
+            if text[-1] == punc_char:
+                has_punctuation = True
+                break
+
+        if not has_punctuation:
+            text = text + auto_punctuation[0]
+
+    return text
+
+
 class MicrosoftEventHandler(AsyncEventHandler):
     """Event handler for clients of the server."""
 
     def __init__(
         self,
-        wyoming_info: Info,
+        catalog: VoiceCatalog,
         cli_args: argparse.Namespace,
+        microsoft_tts: SynthesisBackend,
+        executor: SynthesisExecutor,
         *args,
+        audio_cache: AudioCache | None = None,
+        phrase_store: PhraseStore | None = None,
+        coalescer: SynthesisCoalescer | None = None,
         **kwargs,
     ) -> None:
-        """Initialize."""
+        """Initialize.
+
+        Clients are described the voices currently in catalog.
+        """
         super().__init__(*args, **kwargs)
 
         self.cli_args = cli_args
-        self.wyoming_info_event = wyoming_info.event()
-        self.microsoft_tts = MicrosoftTTS(cli_args)
-        self.sbd = SentenceBoundaryDetector()
+        self.catalog = catalog
+        self.executor = executor
+        self.microsoft_tts = microsoft_tts
+        self.audio_cache = audio_cache
+        self.phrase_store = phrase_store
+        self.coalescer = coalescer if coalescer is not None else SynthesisCoalescer()
+        self.sbd = self._sentence_boundary_detector()
         self.is_streaming: bool | None = None
         self._synthesize: Synthesize | None = None
+        self._pipeline: SentencePipeline | None = None
+
+        # Loop time of the request still waiting for its first audio
+        self._request_time: float | None = None
+        self._trace: tracing.RequestTrace | None = None
+        METRICS.active_connections.inc()
 
     async def handle_event(self, event: Event) -> bool:  # noqa: C901
         """Handle an event."""
         if Describe.is_type(event.type):
-            await self.write_event(self.wyoming_info_event)
+            self.writer.write(self.catalog.info_bytes)
+            await self.writer.drain()
             _LOGGER.debug("Sent info")
             return True
 
@@ -60,6 +119,7 @@ class MicrosoftEventHandler(AsyncEventHandler):
                 synthesize = Synthesize.from_event(event)
                 synthesize.text = remove_asterisks(synthesize.text)
                 await self._handle_synthesize(synthesize)
+                return True
 
             if self.cli_args.no_streaming:
                 return True
@@ -68,116 +128,407 @@ class MicrosoftEventHandler(AsyncEventHandler):
                 # Start of a stream
                 stream_start = SynthesizeStart.from_event(event)
                 self.is_streaming = True
-                self.sbd = SentenceBoundaryDetector()
-                self._synthesize = Synthesize(text="", voice=stream_start.voice)
+                self.sbd = self._sentence_boundary_detector()
+                self._synthesize = Synthesize(
+                    text="", voice=stream_start.voice, context=stream_start.context
+                )
+                # Traced from here on, including the tasks of the pipeline
+                self._start_request(stream_start.voice, "stream")
+                self._start_pipeline()
                 _LOGGER.debug("Text stream started: voice=%s", stream_start.voice)
                 return True
 
             if SynthesizeChunk.is_type(event.type):
-                assert self._synthesize is not None
+                assert self._pipeline is not None
                 stream_chunk = SynthesizeChunk.from_event(event)
-                for sentence in self.sbd.add_chunk(stream_chunk.text):
+                with tracing.total("sentence_boundary"):
+                    sentences = list(self.sbd.add_chunk(stream_chunk.text))
+
+                for sentence in sentences:
                     _LOGGER.debug("Synthesizing stream sentence: %s", sentence)
-                    self._synthesize.text = sentence
-                    await self._handle_synthesize(self._synthesize)
+                    await self._pipeline.add(sentence)
 
                 return True
 
             if SynthesizeStop.is_type(event.type):
-                assert self._synthesize is not None
-                self._synthesize.text = self.sbd.finish()
-                if self._synthesize.text:
+                assert self._pipeline is not None
+                with tracing.total("sentence_boundary"):
+                    final_text = self.sbd.finish()
+
+                if final_text:
                     # Final audio chunk(s)
-                    await self._handle_synthesize(self._synthesize)
+                    await self._pipeline.add(final_text)
+
+                pipeline, self._pipeline = self._pipeline, None
+                await pipeline.finish()
 
                 # End of audio
                 await self.write_event(SynthesizeStopped().event())
+                self._finish_request()
 
                 _LOGGER.debug("Text stream stopped")
                 return True
 
-            if not Synthesize.is_type(event.type):
-                return True
-
-            synthesize = Synthesize.from_event(event)
-            return await self._handle_synthesize(synthesize)
+            return True
         except Exception as err:
+            self._finish_request(error=err.__class__.__name__)
             await self.write_event(
                 Error(text=str(err), code=err.__class__.__name__).event()
             )
             raise err
 
-    async def _handle_synthesize(self, synthesize: Synthesize):
-        _LOGGER.debug(synthesize)
-        raw_text = synthesize.text
+    async def disconnect(self) -> None:
+        """Stop synthesizing for a client that went away."""
+        METRICS.active_connections.dec()
+        self._finish_request(outcome="disconnected")
+        if self._pipeline is not None:
+            self._pipeline.cancel()
+            self._pipeline = None
+
+    def _sentence_boundary_detector(self) -> SentenceBoundaryDetector:
+        """Return a detector for a new text stream."""
+        first_clause_ms = self.cli_args.first_clause_ms
+        return SentenceBoundaryDetector(
+            first_clause_chars=self.cli_args.first_clause_chars or None,
+            first_clause_seconds=(first_clause_ms / 1000) if first_clause_ms else None,
+        )
+
+    def _start_pipeline(self) -> None:
+        """Start a pipeline for the sentences of a text stream."""
+        if self._pipeline is not None:
+            # Previous stream was never stopped
+            self._pipeline.cancel()
+
+        def start(sentence: str) -> SynthesisJob:
+            assert self._synthesize is not None
+            return self._start_synthesis(
+                Synthesize(
+                    text=sentence,
+                    voice=self._synthesize.voice,
+                    context=self._synthesize.context,
+                )
+            )
 
-        # Join multiple lines
-        text = " ".join(raw_text.strip().splitlines())
+        assert self._synthesize is not None
+        self._pipeline = SentencePipeline(
+            start,
+            partial(
+                self._send_synthesis,
+                audio_format=self._get_audio_format(self._synthesize.context),
+            ),
+            prefetch=self.cli_args.stream_prefetch,
+            batch_chars=self.cli_args.stream_batch_chars,
+        )
+
+    def _start_request(self, voice: SynthesizeVoice | None, kind: str) -> None:
+        """Count a request, start tracing it and wait for its first audio."""
+        voice_name = (voice.name if voice is not None else None) or self.cli_args.voice
+
+        # Clients choose the name, so only known voices get their own series
+        label = voice_name if voice_name in self.catalog.voices else "unknown"
+        METRICS.requests.inc(labels=(label,))
+        self._request_time = asyncio.get_running_loop().time()
+
+        # A stream that was never stopped
+        self._finish_request(outcome="abandoned")
+        self._trace = tracing.start_trace(kind=kind, voice=voice_name)
+
+    def _finish_request(self, **attributes: Any) -> None:
+        """Export the trace of the current request, if it's traced."""
+        if self._trace is not None:
+            self._trace.finish(**attributes)
+            self._trace = None
+
+    def _record_sent(self, job: SynthesisJob, num_bytes: int) -> None:
+        """Record the audio sent for job."""
+        METRICS.audio_sent_bytes.observe(num_bytes)
+        if (self._request_time is not None) and (job.first_audio_time is not None):
+            METRICS.first_audio_seconds.observe(
+                job.first_audio_time - self._request_time
+            )
+            self._request_time = None
+
+    async def _handle_synthesize(self, synthesize: Synthesize) -> bool:
+        self._start_request(synthesize.voice, "synthesize")
+        is_completed = await self._send_synthesis(
+            self._start_synthesis(synthesize),
+            audio_format=self._get_audio_format(synthesize.context),
+        )
+        self._finish_request(completed=is_completed)
+        return is_completed
+
+    def _start_synthesis(self, synthesize: Synthesize) -> SynthesisJob:
+        """Start synthesizing in the background and return its job."""
+        _LOGGER.debug(synthesize)
+        with tracing.span("prepare"):
+            text = prepare_text(synthesize.text, self.cli_args.auto_punctuation)
 
-        if synthesize.voice is None:  # Use default voice if not specified
-            voice = self.cli_args.voice
-        else:
-            voice = synthesize.voice.name
+            if synthesize.voice is None:  # Use default voice if not specified
+                voice = self.cli_args.voice
+            else:
+                voice = synthesize.voice.name
 
-        if self.cli_args.auto_punctuation and text:
-            # Add automatic punctuation (important for some voices)
-            has_punctuation = False
-            for punc_char in self.cli_args.auto_punctuation:
-                if text[-1] == punc_char:
-                    has_punctuation = True
-                    break
+            audio_queue: asyncio.Queue[bytes | None] = asyncio.Queue()
+            if voice not in self.catalog.voices:
+                # Reported to the client like a full queue when it's sent
+                synthesis = asyncio.get_running_loop().create_future()
+                synthesis.set_exception(UnknownVoiceError(f"Unknown voice: {voice}"))
+                return SynthesisJob(text, audio_queue, synthesis)
 
-            if not has_punctuation:
-                text = text + self.cli_args.auto_punctuation[0]
+            prosody = self._get_prosody(voice, synthesize.context)
 
         _LOGGER.debug("Synthesizing: %s", text)
+        job = SynthesisJob(
+            text,
+            audio_queue,
+            asyncio.ensure_future(
+                self._synthesize_text(
+                    text,
+                    voice,
+                    prosody,
+                    audio_queue,
+                    # Only called once the synthesis runs, after job is set
+                    lambda latency: job.record_latency(latency),
+                )
+            ),
+        )
+        return job
+
+    def _get_prosody(self, voice: str, context: dict[str, Any] | None) -> Prosody:
+        """Return the prosody for voice with overrides from the request context."""
+        overrides = (context or {}).get("prosody")
+        if overrides is not None:
+            try:
+                if not isinstance(overrides, dict):
+                    raise TypeError("Expected prosody settings")
+
+                return self.microsoft_tts.get_prosody(voice, overrides)
+            except (TypeError, ValueError) as err:
+                _LOGGER.warning("Ignoring prosody %s: %s", overrides, err)
+
+        return self.microsoft_tts.get_prosody(voice)
+
+    def _get_audio_format(self, context: dict[str, Any] | None) -> AudioFormat | None:
+        """Return the audio format the request context asks for, if any.
+
+        Missing settings are taken from the output format. Returns None if no
+        conversion is needed or the format can't be converted to.
+        """
+        settings = (context or {}).get("audio_format")
+        if settings is None:
+            return None
+
+        output_format = self.microsoft_tts.output_format
         try:
-            output_path = self.microsoft_tts.synthesize(text=text, voice=voice)
-        except Exception as e:
-            _LOGGER.error("Failed to synthesize text: %s", e)
-            return False
+            if not isinstance(settings, dict):
+                raise TypeError("Expected audio format settings")
 
-        _LOGGER.debug("Synthesized text")
-        try:
-            wav_file: wave.Wave_read = wave.open(output_path, "rb")
-            with wav_file:
-                rate = wav_file.getframerate()
-                width = wav_file.getsampwidth()
-                channels = wav_file.getnchannels()
-
-                await self.write_event(
-                    AudioStart(
-                        rate=rate,
-                        width=width,
-                        channels=channels,
-                    ).event(),
+            audio_format = AudioFormat(
+                rate=int(settings.get("rate", output_format.rate)),
+                width=int(settings.get("width", output_format.width)),
+                channels=int(settings.get("channels", output_format.channels)),
+            )
+            if audio_format == self._output_audio_format():
+                return None
+
+            # Fail here rather than part way through sending audio
+            AudioConverter(self._output_audio_format(), audio_format)
+        except (TypeError, ValueError) as err:
+            _LOGGER.warning("Ignoring audio format %s: %s", settings, err)
+            return None
+
+        return audio_format
+
+    def _output_audio_format(self) -> AudioFormat:
+        """Return the format of the audio from Azure."""
+        output_format = self.microsoft_tts.output_format
+        return AudioFormat(
+            rate=output_format.rate,
+            width=output_format.width,
+            channels=output_format.channels,
+        )
+
+    async def _synthesize_text(
+        self,
+        text: str,
+        voice: str,
+        prosody: Prosody,
+        audio_queue: "asyncio.Queue[bytes | None]",
+        on_latency: Callable[[float], None],
+    ) -> bool:
+        """Queue the audio of text, synthesizing it if needed.
+
+        on_latency gets the seconds until the first audio if text is
+        synthesized for this request, not for cache hits or shared syntheses.
+        """
+        with tracing.span("cache_lookup"):
+            key = self.microsoft_tts.cache_key(text, voice, prosody)
+            audio = await self._get_cached(key, text)
+
+        if audio is not None:
+            audio_queue.put_nowait(audio)
+            return True
+
+        loop = asyncio.get_running_loop()
+
+        async def synthesize(on_audio: AudioCallback) -> bool:
+            audio_parts: list[bytes] = []
+            start_time = loop.time()
+
+            def add_audio(audio: bytes) -> None:
+                if not audio_parts:
+                    on_latency(loop.time() - start_time)
+
+                audio_parts.append(audio)
+                on_audio(audio)
+
+            if self.cli_args.stream_audio:
+                is_completed = await self._synthesize_streaming(
+                    text, voice, prosody, add_audio
+                )
+            else:
+                is_completed = await self._synthesize_whole(
+                    text, voice, prosody, add_audio
                 )
 
-                # Audio
-                audio_bytes = wav_file.readframes(wav_file.getnframes())
-                bytes_per_sample = width * channels
-                bytes_per_chunk = bytes_per_sample * self.cli_args.samples_per_chunk
-                num_chunks = int(math.ceil(len(audio_bytes) / bytes_per_chunk))
-
-                # Split into chunks
-                for i in range(num_chunks):
-                    offset = i * bytes_per_chunk
-                    chunk = audio_bytes[offset : offset + bytes_per_chunk]
-                    await self.write_event(
-                        AudioChunk(
-                            audio=chunk,
-                            rate=rate,
-                            width=width,
-                            channels=channels,
-                        ).event(),
-                    )
+            if is_completed and (self.audio_cache is not None):
+                self.audio_cache.put(key, b"".join(audio_parts))
+
+            return is_completed
+
+        # Identical requests from other clients share one synthesis
+        return await self.coalescer.run(key, audio_queue, synthesize)
+
+    async def _synthesize_whole(
+        self, text: str, voice: str, prosody: Prosody, on_audio: AudioCallback
+    ) -> bool:
+        """Synthesize the whole text, then pass on its audio."""
+        audio = await self.executor.run(
+            self.microsoft_tts.synthesize, text=text, voice=voice, prosody=prosody
+        )
+        if audio is None:
+            return False
+
+        on_audio(audio)
+        return True
+
+    async def _synthesize_streaming(
+        self, text: str, voice: str, prosody: Prosody, on_audio: AudioCallback
+    ) -> bool:
+        """Synthesize text, passing on audio as Azure produces it."""
+        loop = asyncio.get_running_loop()
+
+        def on_sdk_audio(audio: bytes) -> None:
+            # Called from an SDK thread
+            loop.call_soon_threadsafe(on_audio, audio)
+
+        # All audio callbacks are queued before the synthesis finishes
+        return await self.executor.run(
+            self.microsoft_tts.synthesize_stream,
+            text=text,
+            on_audio=on_sdk_audio,
+            voice=voice,
+            prosody=prosody,
+        )
+
+    async def _get_cached(self, key: str, text: str) -> bytes | None:
+        """Look up audio in the phrase store and audio cache."""
+        if self.phrase_store is not None:
+            audio = await self.phrase_store.get(key)
+            if audio is not None:
+                _LOGGER.debug("Using stored phrase: %s", text)
+                return audio
+
+        if self.audio_cache is None:
+            return None
+
+        return await self.audio_cache.get(key)
+
+    async def _send_synthesis(
+        self, job: SynthesisJob, audio_format: AudioFormat | None = None
+    ) -> bool:
+        """Send the audio of a synthesis to the client as it becomes available.
+
+        Audio is converted to audio_format if given, otherwise it's sent in
+        the output format.
+        """
+        converter: AudioConverter | None = None
+        if audio_format is None:
+            audio_format = self._output_audio_format()
+        else:
+            converter = AudioConverter(self._output_audio_format(), audio_format)
+
+        rate, width, channels = (
+            audio_format.rate,
+            audio_format.width,
+            audio_format.channels,
+        )
+        chunk_writer = self._chunk_writer(rate, width, channels)
+        bytes_per_second = rate * width * channels
+        is_started = False
+        num_bytes = 0
+        try:
+            with tracing.span("send", chars=len(job.text)):
+                while (audio := await job.audio.get()) is not None:
+                    if not is_started:
+                        await self.write_event(
+                            AudioStart(
+                                rate=rate, width=width, channels=channels
+                            ).event()
+                        )
+                        is_started = True
+                        tracing.first_audio()
+
+                    if converter is not None:
+                        with tracing.total("convert"):
+                            audio = converter.convert(audio)
+
+                    # Chunked without copying
+                    with tracing.total("socket_write"):
+                        await chunk_writer.write(audio)
+
+                    job.audio_sent(len(audio) / bytes_per_second)
+                    num_bytes += len(audio)
+
+                if is_started and (converter is not None):
+                    await chunk_writer.write(converter.flush())
         except Exception as e:
             _LOGGER.error("Failed to send audio: %s", e)
             return False
+        finally:
+            self._record_sent(job, num_bytes)
 
+        try:
+            is_completed = await job.synthesis
+        except (SynthesisQueueFullError, UnknownVoiceError) as e:
+            await self._reject(e)
+            return False
+        except Exception as e:
+            _LOGGER.error("Failed to synthesize text: %s", e)
+            is_completed = False
+
+        if not is_started:
+            return False
+
+        # Close the audio stream even if synthesis stopped part way
         await self.write_event(AudioStop().event())
         _LOGGER.debug("Completed request")
 
-        os.unlink(output_path)
-
-        return True
+        return is_completed
+
+    def _chunk_writer(self, rate: int, width: int, channels: int) -> AudioChunkWriter:
+        """Return a writer that sends audio in chunks of samples_per_chunk."""
+        return AudioChunkWriter(
+            self.writer,
+            rate=rate,
+            width=width,
+            channels=channels,
+            samples_per_chunk=self.cli_args.samples_per_chunk,
+        )
+
+    async def _reject(self, err: Exception) -> None:
+        """Tell the client its request was rejected, e.g. because the server is busy."""
+        _LOGGER.warning("Rejected synthesis request: %s", err)
+        await self.write_event(
+            Error(text=str(err), code=err.__class__.__name__).event()
+        )
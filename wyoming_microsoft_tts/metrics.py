@@ -0,0 +1,266 @@
+"""Metrics of the TTS pipeline in the Prometheus text format."""
+
+import asyncio
+import logging
+import threading
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from urllib.parse import urlsplit
+
+_LOGGER = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds to wait for a scraper to send its request
+REQUEST_TIMEOUT = 5.0
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.5, 5.0, 10.0)
+QUEUE_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+BYTES_BUCKETS = (1e4, 5e4, 1e5, 2.5e5, 5e5, 1e6, 2.5e6, 5e6, 1e7)
+CHARS_BUCKETS = (10, 25, 50, 100, 200, 400, 800, 1600)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labelnames: tuple[str, ...], labels: tuple[str, ...]) -> str:
+    if not labelnames:
+        return ""
+
+    pairs = (
+        f'{name}="{_escape(value)}"'
+        for name, value in zip(labelnames, labels, strict=True)
+    )
+    return "{" + ",".join(pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric(ABC):
+    """Base of all metrics.
+
+    Metrics are updated from the event loop and from synthesis threads, so
+    every update takes the metric's lock.
+    """
+
+    kind = ""
+
+    def __init__(self, name: str, help_text: str) -> None:
+        self.name = name
+        self.help_text = help_text
+        self._lock = threading.Lock()
+
+    def render(self) -> list[str]:
+        """Return the lines of this metric in the text format."""
+        with self._lock:
+            samples = self._samples()
+
+        return [
+            f"# HELP {self.name} {self.help_text}",
+            f"# TYPE {self.name} {self.kind}",
+            *samples,
+        ]
+
+    @abstractmethod
+    def _samples(self) -> list[str]:
+        """Return the sample lines, called with the lock held."""
+
+
+class Counter(_Metric):
+    """Value that only goes up, optionally per label values."""
+
+    kind = "counter"
+
+    def __init__(
+        self, name: str, help_text: str, labelnames: tuple[str, ...] = ()
+    ) -> None:
+        """Initialize."""
+        super().__init__(name, help_text)
+        self.labelnames = labelnames
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, labels: tuple[str, ...] = ()) -> None:
+        """Add amount to the value for labels."""
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def get(self, labels: tuple[str, ...] = ()) -> float:
+        """Return the value for labels."""
+        return self._values.get(labels, 0.0)
+
+    def _samples(self) -> list[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in sorted(self._values.items())
+        ]
+
+
+class Gauge(_Metric):
+    """Value that goes up and down."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str) -> None:
+        """Initialize."""
+        super().__init__(name, help_text)
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        """Add amount to the value."""
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        """Subtract amount from the value."""
+        self.inc(-amount)
+
+    def _samples(self) -> list[str]:
+        return [f"{self.name} {_format_value(self.value)}"]
+
+
+class Histogram(_Metric):
+    """Distribution of observed values over fixed buckets."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets: tuple[float, ...]) -> None:
+        """Initialize."""
+        super().__init__(name, help_text)
+        self.buckets = (*sorted(buckets), float("inf"))
+        self._counts = [0] * len(self.buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        """Add value to the distribution."""
+        # Upper bounds are inclusive
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def _samples(self) -> list[str]:
+        samples = []
+        cumulative = 0
+        for upper_bound, count in zip(self.buckets, self._counts, strict=True):
+            cumulative += count
+            samples.append(
+                f'{self.name}_bucket{{le="{_format_value(upper_bound)}"}} {cumulative}'
+            )
+
+        samples.append(f"{self.name}_sum {_format_value(self.sum)}")
+        samples.append(f"{self.name}_count {self.count}")
+        return samples
+
+
+class Metrics:
+    """All metrics of the server."""
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self.synthesis_seconds = Histogram(
+            "microsoft_tts_synthesis_seconds",
+            "Time Azure took to synthesize a text.",
+            LATENCY_BUCKETS,
+        )
+        self.first_audio_seconds = Histogram(
+            "microsoft_tts_first_audio_seconds",
+            "Time from a request to its first audio chunk.",
+            LATENCY_BUCKETS,
+        )
+        self.audio_sent_bytes = Histogram(
+            "microsoft_tts_audio_sent_bytes",
+            "Bytes of audio sent to a client per synthesis.",
+            BYTES_BUCKETS,
+        )
+        self.sentence_chars = Histogram(
+            "microsoft_tts_sentence_chars",
+            "Characters in sentences found in streamed text.",
+            CHARS_BUCKETS,
+        )
+        self.queue_wait_seconds = Histogram(
+            "microsoft_tts_queue_wait_seconds",
+            "Time a synthesis waited for a free worker.",
+            QUEUE_BUCKETS,
+        )
+        self.active_connections = Gauge(
+            "microsoft_tts_active_connections", "Clients connected to the server."
+        )
+        self.requests = Counter(
+            "microsoft_tts_requests_total",
+            "Synthesis requests and text streams per voice.",
+            labelnames=("voice",),
+        )
+        self.cache_hits = Counter(
+            "microsoft_tts_cache_hits_total",
+            "Lookups that found synthesized audio in the audio cache.",
+        )
+        self.cache_misses = Counter(
+            "microsoft_tts_cache_misses_total",
+            "Lookups that didn't find synthesized audio in the audio cache.",
+        )
+
+    def render(self) -> str:
+        """Return all metrics in the text format."""
+        lines = []
+        for metric in vars(self).values():
+            lines.extend(metric.render())
+
+        return "\n".join(lines) + "\n"
+
+
+# Shared by every part of the server, like the default registry of
+# prometheus_client
+METRICS = Metrics()
+
+
+async def start_metrics_server(uri: str, metrics: Metrics = METRICS) -> asyncio.Server:
+    """Serve metrics over HTTP at uri (http://host:port or tcp://host:port)."""
+    parts = urlsplit(uri)
+    if (parts.scheme not in ("http", "tcp")) or (parts.port is None):
+        raise ValueError(
+            f"Metrics URI must be http://host:port or tcp://host:port: {uri}"
+        )
+
+    async def handle_client(
+        reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            request = await asyncio.wait_for(
+                reader.readuntil(b"\r\n\r\n"), REQUEST_TIMEOUT
+            )
+            path = request.split(b" ", 2)[1].split(b"?")[0] if b" " in request else b""
+            if path in (b"/", b"/metrics"):
+                status, body = "200 OK", metrics.render().encode("utf-8")
+            else:
+                status, body = "404 Not Found", b"Not found\n"
+
+            writer.write(
+                (
+                    f"HTTP/1.1 {status}\r\n"
+                    f"Content-Type: {CONTENT_TYPE}\r\n"
+                    f"Content-Length: {len(body)}\r\n"
+                    "Connection: close\r\n\r\n"
+                ).encode()
+                + body
+            )
+            await writer.drain()
+        except (TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            pass
+        except ConnectionError:
+            _LOGGER.debug("Metrics client went away")
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(
+        handle_client, parts.hostname or "0.0.0.0", parts.port
+    )
+    _LOGGER.info("Serving metrics at %s", uri)
+    return server
@@ -1,115 +1,266 @@
 """Microsoft TTS."""
 
+import itertools
 import logging
-import tempfile
+import threading
 import time
+import wave
+from collections.abc import Callable
 from pathlib import Path
+from typing import Any
 
 import azure.cognitiveservices.speech as speechsdk
 
-from .download import get_voices
+from . import tracing
+from .backend import DEFAULT_OUTPUT_FORMAT, SynthesisBackend
+from .metrics import METRICS
+from .profiles import VoiceProfiles
+from .ssml import Prosody, ssml_template
+from .synthesizer_pool import SynthesizerPool
 
 _LOGGER = logging.getLogger(__name__)
 
 
-class MicrosoftTTS:
-    """Class to handle Microsoft TTS."""
+SynthesizerKey = tuple[str, speechsdk.SpeechSynthesisOutputFormat | None]
 
-    def __init__(self, args) -> None:
+
+class MicrosoftTTS(SynthesisBackend):
+    """Class to handle Microsoft TTS.
+
+    A single instance is shared by all connections, so synthesize may be
+    called from several threads at once.
+    """
+
+    def __init__(
+        self,
+        args,
+        voices: dict[str, Any] | None = None,
+        pool_size: int = 4,
+        pool_idle_timeout: float = 300.0,
+        debug_audio_dir: str | Path | None = None,
+        profiles: VoiceProfiles | None = None,
+        output_format: str = DEFAULT_OUTPUT_FORMAT,
+    ) -> None:
         """Initialize."""
         _LOGGER.debug("Initialize Microsoft TTS")
-        self.args = args
-        self.speech_config = speechsdk.SpeechConfig(
-            subscription=args.subscription_key, region=args.service_region
-        )
+        super().__init__(args, voices, profiles=profiles, output_format=output_format)
+        self.speech_config = self._create_speech_config()
 
-        output_dir = str(tempfile.TemporaryDirectory())
-        output_dir = Path(output_dir)
-        output_dir.mkdir(parents=True, exist_ok=True)
-        self.output_dir = output_dir
+        # One speech config per voice key and output format, so concurrent
+        # requests never change each other's configuration.
+        self._speech_configs: dict[SynthesizerKey, speechsdk.SpeechConfig] = {}
+        self._speech_configs_lock = threading.Lock()
 
-        self.voices = get_voices(args.download_dir)
+        # Only for debugging, audio is normally never written to disk
+        self.debug_audio_dir: Path | None = None
+        if debug_audio_dir is not None:
+            self.debug_audio_dir = Path(debug_audio_dir)
+            self.debug_audio_dir.mkdir(parents=True, exist_ok=True)
+            self._debug_file_ids = itertools.count()
 
-    def _build_ssml(self, text, voice):
-        """Build SSML with prosody and style parameters."""
-        voice_key = self.voices[voice]["key"]
-        voice_lang = self.voices[voice]["language"]["code"]
+        self.prebuild_ssml()
 
-        ssml_parts = [
-            '<?xml version="1.0" encoding="UTF-8"?>',
-            '<speak version="1.0" xmlns="http://www.w3.org/2001/10/synthesis"',
-        ]
+        self.synthesizers = SynthesizerPool(
+            self._create_synthesizer,
+            max_size=pool_size,
+            idle_timeout=pool_idle_timeout,
+        )
 
-        if self.args.style or self.args.style_degree:
-            ssml_parts.append(' xmlns:mstts="https://www.w3.org/2001/mstts"')
+    def _create_speech_config(self) -> speechsdk.SpeechConfig:
+        return speechsdk.SpeechConfig(
+            subscription=self.args.subscription_key, region=self.args.service_region
+        )
 
-        ssml_parts.append(f' xml:lang="{voice_lang}">')
-        ssml_parts.append(f'<voice name="{voice_key}">')
+    def _get_speech_config(
+        self,
+        voice_key: str,
+        output_format: speechsdk.SpeechSynthesisOutputFormat | None = None,
+    ) -> speechsdk.SpeechConfig:
+        """Return the speech config for a Microsoft voice key and output format."""
+        with self._speech_configs_lock:
+            speech_config = self._speech_configs.get((voice_key, output_format))
+            if speech_config is None:
+                speech_config = self._create_speech_config()
+                speech_config.speech_synthesis_voice_name = voice_key
+                if output_format is not None:
+                    speech_config.set_speech_synthesis_output_format(output_format)
 
-        has_style = self.args.style is not None
-        has_prosody = any([self.args.rate, self.args.pitch, self.args.volume])
+                self._speech_configs[(voice_key, output_format)] = speech_config
 
-        if has_style:
-            style_attrs = [f'style="{self.args.style}"']
-            if self.args.style_degree is not None:
-                style_attrs.append(f'styledegree="{self.args.style_degree}"')
-            ssml_parts.append(f'<mstts:express-as {" ".join(style_attrs)}>')
+            return speech_config
 
-        if has_prosody:
-            prosody_attrs = []
-            if self.args.rate:
-                prosody_attrs.append(f'rate="{self.args.rate}"')
-            if self.args.pitch:
-                prosody_attrs.append(f'pitch="{self.args.pitch}"')
-            if self.args.volume:
-                prosody_attrs.append(f'volume="{self.args.volume}"')
-            ssml_parts.append(f'<prosody {" ".join(prosody_attrs)}>')
+    def _create_synthesizer(self, key: SynthesizerKey) -> speechsdk.SpeechSynthesizer:
+        # Without an audio config the audio is kept in the result's audio_data,
+        # so the synthesizer isn't tied to a single output and can be reused.
+        return speechsdk.SpeechSynthesizer(
+            speech_config=self._get_speech_config(*key), audio_config=None
+        )
+
+    def _synthesizer_key(
+        self, voice, output_format: speechsdk.SpeechSynthesisOutputFormat | None
+    ) -> SynthesizerKey:
+        # Convert the requested voice to the key microsoft use.
+        return (self.voices[voice]["key"], output_format)
 
-        ssml_parts.append(text)
+    def prewarm(self, voice=None, timeout: float = 5.0) -> bool:
+        """Open a service connection for voice ahead of the first request."""
+        if voice is None:
+            voice = self.args.voice
 
-        if has_prosody:
-            ssml_parts.append('</prosody>')
+        key = self._synthesizer_key(voice, self.output_format.sdk_format)
+        _LOGGER.debug("Pre-warming synthesizer for %s", key)
+        return self.synthesizers.prewarm(key, timeout)
 
-        if has_style:
-            ssml_parts.append('</mstts:express-as>')
+    def evict_idle(self) -> None:
+        """Close pooled synthesizers that have been idle for too long."""
+        self.synthesizers.evict_idle()
 
-        ssml_parts.append('</voice>')
-        ssml_parts.append('</speak>')
+    def close(self) -> None:
+        """Close all pooled synthesizers."""
+        self.synthesizers.close()
 
-        return ''.join(ssml_parts)
+    def prebuild_ssml(self) -> None:
+        """Build the SSML envelopes of the default voice and all profiles."""
+        voices = [self.args.voice]
+        if self.profiles is not None:
+            voices.extend(self.profiles.voices_with_profiles())
 
-    def synthesize(self, text, voice=None):
-        """Synthesize text to speech."""
-        _LOGGER.debug(f"Requested TTS for [{text}]")
-        if voice is None:
-            voice = self.args.voice
+        for voice in voices:
+            if voice not in self.voices:
+                continue
 
-        # Convert the requested voice to the key microsoft use.
-        self.speech_config.speech_synthesis_voice_name = self.voices[voice]["key"]
+            prosody = self.get_prosody(voice)
+            if prosody.needs_ssml:
+                self._build_ssml("", voice, prosody)
 
-        file_name = self.output_dir / f"{time.monotonic_ns()}.wav"
-        audio_config = speechsdk.audio.AudioOutputConfig(filename=str(file_name))
+    def _build_ssml(self, text, voice, prosody: Prosody | None = None):
+        """Build SSML with prosody and style parameters."""
+        if prosody is None:
+            prosody = self.get_prosody(voice)
 
-        speech_synthesizer = speechsdk.SpeechSynthesizer(
-            speech_config=self.speech_config, audio_config=audio_config
+        template = ssml_template(
+            self.voices[voice]["key"], self.voices[voice]["language"]["code"], prosody
         )
+        return template.render(text)
+
+    def _speak(self, speech_synthesizer, text, voice, prosody: Prosody):
+        """Run a synthesis on speech_synthesizer and wait for its result."""
+        start_time = time.monotonic()
+        try:
+            if prosody.needs_ssml:
+                with tracing.span("ssml"):
+                    ssml = self._build_ssml(text, voice, prosody)
 
-        if any([self.args.rate, self.args.pitch, self.args.volume, self.args.style, self.args.style_degree]):
-            ssml = self._build_ssml(text, voice)
-            _LOGGER.debug(f"Using SSML: {ssml}")
-            speech_synthesis_result = speech_synthesizer.speak_ssml_async(ssml).get()
-        else:
-            speech_synthesis_result = speech_synthesizer.speak_text_async(text).get()
+                _LOGGER.debug(f"Using SSML: {ssml}")
+                with tracing.span("azure", chars=len(text)):
+                    return speech_synthesizer.speak_ssml_async(ssml).get()
 
+            with tracing.span("azure", chars=len(text)):
+                return speech_synthesizer.speak_text_async(text).get()
+        finally:
+            METRICS.synthesis_seconds.observe(time.monotonic() - start_time)
+
+    def _check_result(self, speech_synthesis_result, pooled, text) -> bool:
+        """Log a failed synthesis and return True if it completed."""
         if (
             speech_synthesis_result.reason
             == speechsdk.ResultReason.SynthesizingAudioCompleted
         ):
             _LOGGER.debug(f"Speech synthesized for text [{text}]")
-            return str(file_name)
+            return True
 
-        elif speech_synthesis_result.reason == speechsdk.ResultReason.Canceled:
+        if speech_synthesis_result.reason == speechsdk.ResultReason.Canceled:
             cancellation_details = speech_synthesis_result.cancellation_details
             _LOGGER.warning(f"Speech synthesis canceled: {cancellation_details.reason}")
             if cancellation_details.reason == speechsdk.CancellationReason.Error:
                 _LOGGER.warning(f"Error details: {cancellation_details.error_details}")
+                # Don't hand a broken connection to the next request
+                pooled.healthy = False
+
+        return False
+
+    def _save_debug_audio(self, audio: bytes) -> None:
+        """Write audio to a WAV file in debug_audio_dir."""
+        if self.debug_audio_dir is None:
+            return
+
+        file_name = (
+            self.debug_audio_dir
+            / f"{time.strftime('%Y%m%d-%H%M%S')}-{next(self._debug_file_ids)}.wav"
+        )
+        try:
+            wav_file: wave.Wave_write = wave.open(str(file_name), "wb")
+            with wav_file:
+                wav_file.setframerate(self.output_format.rate)
+                wav_file.setsampwidth(self.output_format.width)
+                wav_file.setnchannels(self.output_format.channels)
+                wav_file.writeframes(audio)
+
+            _LOGGER.debug("Saved audio to %s", file_name)
+        except Exception:
+            _LOGGER.exception("Failed to save audio to %s", file_name)
+
+    def synthesize(
+        self, text, voice=None, prosody: Prosody | None = None
+    ) -> bytes | None:
+        """Synthesize text to speech.
+
+        Returns raw PCM in output_format, or None if synthesis failed.
+        """
+        _LOGGER.debug(f"Requested TTS for [{text}]")
+        if voice is None:
+            voice = self.args.voice
+
+        if prosody is None:
+            prosody = self.get_prosody(voice)
+
+        key = self._synthesizer_key(voice, self.output_format.sdk_format)
+        with self.synthesizers.synthesizer(key) as pooled:
+            speech_synthesis_result = self._speak(
+                pooled.synthesizer, text, voice, prosody
+            )
+            if not self._check_result(speech_synthesis_result, pooled, text):
+                return None
+
+        audio = speech_synthesis_result.audio_data
+        self._save_debug_audio(audio)
+        return audio
+
+    def synthesize_stream(
+        self,
+        text,
+        on_audio: Callable[[bytes], None],
+        voice=None,
+        prosody: Prosody | None = None,
+    ) -> bool:
+        """Synthesize text to speech, passing raw PCM to on_audio as it arrives.
+
+        The audio is in output_format. on_audio is called from an SDK
+        thread. Returns True if the synthesis completed.
+        """
+        _LOGGER.debug(f"Requested streaming TTS for [{text}]")
+        if voice is None:
+            voice = self.args.voice
+
+        if prosody is None:
+            prosody = self.get_prosody(voice)
+
+        key = self._synthesizer_key(voice, self.output_format.sdk_format)
+        with self.synthesizers.synthesizer(key) as pooled:
+            speech_synthesizer = pooled.synthesizer
+            speech_synthesizer.synthesizing.connect(
+                lambda event: on_audio(event.result.audio_data)
+            )
+            try:
+                speech_synthesis_result = self._speak(
+                    speech_synthesizer, text, voice, prosody
+                )
+            finally:
+                # The synthesizer goes back to the pool, don't leak our callback
+                speech_synthesizer.synthesizing.disconnect_all()
+
+            if not self._check_result(speech_synthesis_result, pooled, text):
+                return False
+
+        self._save_debug_audio(speech_synthesis_result.audio_data)
+        return True
@@ -0,0 +1,160 @@
+"""Pre-synthesized phrases stored on disk."""
+
+import asyncio
+import json
+import logging
+import os
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+
+from .backend import SynthesisBackend
+from .executor import SynthesisExecutor, SynthesisQueueFullError
+
+_LOGGER = logging.getLogger(__name__)
+
+_SUFFIX = ".pcm"
+
+
+@dataclass
+class Phrase:
+    """Phrase to pre-synthesize."""
+
+    text: str
+    voice: str | None = None
+
+
+def load_phrases(path: str | Path) -> list[Phrase]:
+    """Load phrases from a text file (one per line) or a JSON file.
+
+    A JSON file contains a list of strings or of objects with "text" and an
+    optional "voice".
+    """
+    path = Path(path)
+    with open(path, encoding="utf-8") as phrases_file:
+        if path.suffix.lower() != ".json":
+            return [
+                Phrase(text=line.strip())
+                for line in phrases_file
+                if line.strip() and not line.lstrip().startswith("#")
+            ]
+
+        phrases = []
+        for entry in json.load(phrases_file):
+            if isinstance(entry, str):
+                phrases.append(Phrase(text=entry))
+            else:
+                phrases.append(Phrase(text=entry["text"], voice=entry.get("voice")))
+
+        return phrases
+
+
+class PhraseStore:
+    """Audio of known phrases, kept in store_dir across restarts.
+
+    Phrases are stored under the same key as the audio cache, so a change of
+    voice, prosody or output format never serves stale audio.
+    """
+
+    def __init__(self, store_dir: str | Path) -> None:
+        """Initialize."""
+        self.store_dir = Path(store_dir)
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        self._keys = {path.stem for path in self.store_dir.glob(f"*{_SUFFIX}")}
+        _LOGGER.debug("Phrase store has %s phrase(s)", len(self._keys))
+
+    def __contains__(self, key: str) -> bool:
+        """Return True if audio is stored for key."""
+        return key in self._keys
+
+    def __len__(self) -> int:
+        """Return the number of stored phrases."""
+        return len(self._keys)
+
+    async def get(self, key: str) -> bytes | None:
+        """Return the stored audio for key."""
+        if key not in self._keys:
+            return None
+
+        try:
+            return await asyncio.to_thread(self._path(key).read_bytes)
+        except OSError:
+            _LOGGER.exception("Failed to read stored phrase %s", key)
+            self._keys.discard(key)
+            return None
+
+    async def put(self, key: str, audio: bytes) -> None:
+        """Store audio for key."""
+        await asyncio.to_thread(self._write, key, audio)
+        self._keys.add(key)
+
+    async def retain(self, keys: set[str]) -> None:
+        """Remove all stored phrases that are not in keys."""
+        for key in self._keys - keys:
+            self._keys.discard(key)
+            await asyncio.to_thread(self._path(key).unlink, missing_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self.store_dir / f"{key}{_SUFFIX}"
+
+    def _write(self, key: str, audio: bytes) -> None:
+        path = self._path(key)
+        temp_path = path.with_suffix(".tmp")
+        temp_path.write_bytes(audio)
+        os.replace(temp_path, path)
+
+
+async def warm_phrases(
+    phrases: list[Phrase],
+    prepare_text: Callable[[str], str],
+    phrase_store: PhraseStore,
+    microsoft_tts: SynthesisBackend,
+    executor: SynthesisExecutor,
+    phrases_per_second: float,
+) -> None:
+    """Synthesize all phrases missing from the store, one at a time.
+
+    prepare_text turns a phrase into the text the handler would synthesize,
+    so stored phrases match incoming requests.
+    """
+    keys: set[str] = set()
+    num_synthesized = 0
+    for phrase in phrases:
+        voice = phrase.voice or microsoft_tts.args.voice
+        if voice not in microsoft_tts.voices:
+            _LOGGER.warning("Skipping phrase with unknown voice %s", voice)
+            continue
+
+        text = prepare_text(phrase.text)
+        key = microsoft_tts.cache_key(text, voice)
+        keys.add(key)
+        if key in phrase_store:
+            continue
+
+        audio: bytes | None = None
+        while True:
+            try:
+                audio = await executor.run(microsoft_tts.synthesize, text, voice)
+                break
+            except SynthesisQueueFullError:
+                # Clients come first
+                await asyncio.sleep(1.0)
+            except Exception:
+                _LOGGER.exception("Error while pre-synthesizing phrase: %s", text)
+                break
+
+        if audio is None:
+            _LOGGER.warning("Failed to pre-synthesize phrase: %s", text)
+        else:
+            await phrase_store.put(key, audio)
+            num_synthesized += 1
+
+        # Stay well within the Azure quota
+        await asyncio.sleep(1.0 / phrases_per_second)
+
+    await phrase_store.retain(keys)
+    _LOGGER.info(
+        "Phrase store ready: %s phrase(s), %s newly synthesized",
+        len(phrase_store),
+        num_synthesized,
+    )
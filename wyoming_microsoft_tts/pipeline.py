@@ -0,0 +1,195 @@
+"""Synthesize streamed sentences ahead of playback while keeping their order."""
+
+import asyncio
+import logging
+from collections import deque
+from collections.abc import Awaitable, Callable
+
+_LOGGER = logging.getLogger(__name__)
+
+# Seconds a synthesis is assumed to take to its first audio before any has
+# been measured
+INITIAL_LATENCY = 1.0
+
+# Weight of the latest synthesis in the latency estimate
+LATENCY_SMOOTHING = 0.3
+
+
+class SynthesisJob:
+    """Audio of one running synthesis, available while it is produced.
+
+    The audio queue receives blocks of raw PCM and then None once the
+    synthesis future is done. The future's result is True if the synthesis
+    completed. Whoever sends the audio records it with audio_sent, and whoever
+    runs a synthesis on the backend records how long its first audio took with
+    record_latency.
+    """
+
+    def __init__(
+        self,
+        text: str,
+        audio: "asyncio.Queue[bytes | None]",
+        synthesis: "asyncio.Future[bool]",
+    ) -> None:
+        """Initialize."""
+        self.text = text
+        self.audio = audio
+        self.synthesis = synthesis
+        synthesis.add_done_callback(lambda _future: audio.put_nowait(None))
+
+        self.first_audio_time: float | None = None
+        self.audio_seconds = 0.0
+        self.latency: float | None = None
+
+    def audio_sent(self, seconds: float) -> None:
+        """Record that seconds of audio were sent to the client."""
+        if self.first_audio_time is None:
+            self.first_audio_time = asyncio.get_running_loop().time()
+
+        self.audio_seconds += seconds
+
+    def record_latency(self, seconds: float) -> None:
+        """Record that the backend took seconds to produce the first audio."""
+        self.latency = seconds
+
+    def cancel(self) -> None:
+        """Stop waiting for the synthesis."""
+        self.synthesis.cancel()
+
+
+class SentencePipeline:
+    """Synthesize up to prefetch sentences ahead of the one being sent.
+
+    Sentences are started with start as soon as they are added (and a slot is
+    free) and handed to send strictly in the order they were added. If sending
+    fails, the remaining sentences are dropped and finish raises the error.
+
+    With batch_chars, consecutive sentences are merged into one synthesis of
+    up to batch_chars characters while the client still has enough audio to
+    play. A batch is started once it is long enough, or once the audio sent so
+    far would run out before a synthesis started now (taking as long as the
+    recent ones to produce its first audio) could start playing. Only jobs
+    that recorded a latency count, so cache hits and syntheses shared with
+    other requests don't skew the estimate.
+    """
+
+    def __init__(
+        self,
+        start: Callable[[str], SynthesisJob],
+        send: Callable[[SynthesisJob], Awaitable[bool]],
+        prefetch: int,
+        batch_chars: int = 0,
+    ) -> None:
+        """Initialize."""
+        self._start = start
+        self._send = send
+        self._slots = asyncio.Semaphore(prefetch + 1)
+        self._queue: asyncio.Queue[SynthesisJob | None] = asyncio.Queue()
+        self._jobs: deque[SynthesisJob] = deque()
+        self._error: Exception | None = None
+        self._sender = asyncio.create_task(self._send_jobs())
+
+        self.batch_chars = batch_chars
+        self.latency = INITIAL_LATENCY
+        self._batch: list[str] = []
+        self._batch_length = 0
+        self._batch_lock = asyncio.Lock()
+        self._batch_timer: asyncio.Task | None = None
+        self._batch_tasks: set[asyncio.Task] = set()
+
+        # Loop time at which the client will have played all audio sent
+        self._playback_end = 0.0
+
+    async def add(self, sentence: str) -> None:
+        """Add a sentence, waiting if too many are ahead."""
+        self._batch.append(sentence)
+        self._batch_length += len(sentence)
+
+        slack = self._slack()
+        if (self._batch_length >= self.batch_chars) or (slack <= 0):
+            self._cancel_batch_timer()
+            await self._start_batch()
+        elif self._batch_timer is None:
+            self._batch_timer = asyncio.create_task(self._start_batch_later(slack))
+            self._batch_tasks.add(self._batch_timer)
+            self._batch_timer.add_done_callback(self._batch_tasks.discard)
+
+    async def finish(self) -> None:
+        """Wait until all sentences have been sent."""
+        self._cancel_batch_timer()
+        await self._start_batch()
+        self._queue.put_nowait(None)
+        await self._sender
+        if self._error is not None:
+            raise self._error
+
+    def cancel(self) -> None:
+        """Stop sending and abandon all unsent sentences."""
+        self._batch_timer = None
+        for task in self._batch_tasks:
+            task.cancel()
+
+        self._sender.cancel()
+        for job in self._jobs:
+            job.cancel()
+
+    def _slack(self) -> float:
+        """Return how long a synthesis can wait before the audio runs out."""
+        loop = asyncio.get_running_loop()
+        return self._playback_end - loop.time() - self.latency
+
+    async def _start_batch_later(self, delay: float) -> None:
+        await asyncio.sleep(delay)
+        self._batch_timer = None
+        await self._start_batch()
+
+    def _cancel_batch_timer(self) -> None:
+        """Cancel the timer if it hasn't started its batch yet."""
+        if self._batch_timer is not None:
+            self._batch_timer.cancel()
+            self._batch_timer = None
+
+    async def _start_batch(self) -> None:
+        """Start synthesizing the sentences added so far as one text."""
+        # Batches are taken and started in order
+        async with self._batch_lock:
+            if not self._batch:
+                return
+
+            text = " ".join(self._batch)
+            self._batch.clear()
+            self._batch_length = 0
+
+            await self._slots.acquire()
+            job = self._start(text)
+            job.synthesis.add_done_callback(lambda _future: self._update_latency(job))
+            self._jobs.append(job)
+            self._queue.put_nowait(job)
+
+    def _update_latency(self, job: SynthesisJob) -> None:
+        synthesis = job.synthesis
+        if synthesis.cancelled() or (synthesis.exception() is not None):
+            return
+
+        if synthesis.result() and (job.latency is not None):
+            self.latency += LATENCY_SMOOTHING * (job.latency - self.latency)
+
+    async def _send_jobs(self) -> None:
+        while (job := await self._queue.get()) is not None:
+            try:
+                if self._error is None:
+                    await self._send(job)
+                else:
+                    job.cancel()
+            except Exception as err:
+                _LOGGER.debug("Dropping remaining sentences: %s", err)
+                self._error = err
+                job.cancel()
+            finally:
+                self._jobs.popleft()
+                self._slots.release()
+
+            if job.first_audio_time is not None:
+                # Client plays audio as it arrives, after what it already has
+                playback_start = max(self._playback_end, job.first_audio_time)
+                self._playback_end = playback_start + job.audio_seconds
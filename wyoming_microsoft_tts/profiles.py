@@ -0,0 +1,168 @@
+"""Prosody and speaking style per voice, from a profiles file."""
+
+import asyncio
+import json
+import logging
+from collections.abc import Callable
+from dataclasses import fields, replace
+from pathlib import Path
+from typing import Any
+
+from .ssml import Prosody
+
+_LOGGER = logging.getLogger(__name__)
+
+# Seconds between checks for a changed profiles file
+RELOAD_INTERVAL = 5.0
+
+# Range of styledegree accepted by Azure
+STYLE_DEGREE_RANGE = (0.01, 2.0)
+
+_PROSODY_FIELDS = {field.name for field in fields(Prosody)}
+
+
+def apply_prosody(
+    prosody: Prosody, settings: dict[str, Any], voice_info: dict[str, Any]
+) -> Prosody:
+    """Return prosody with settings applied, checked against the voice.
+
+    Raises ValueError if a setting is unknown or not supported by the voice.
+    """
+    unknown = set(settings) - _PROSODY_FIELDS
+    if unknown:
+        raise ValueError(f"Unknown prosody setting(s): {', '.join(sorted(unknown))}")
+
+    settings = {
+        name: (value if (value is None) or (name == "style_degree") else str(value))
+        for name, value in settings.items()
+    }
+    prosody = replace(prosody, **settings)
+
+    # Voices loaded from an older voices.json don't list their styles
+    styles = voice_info.get("styles")
+    if (prosody.style is not None) and (styles is not None):
+        if prosody.style not in styles:
+            raise ValueError(
+                f"Voice {voice_info['key']} has no style {prosody.style}"
+                f" (styles: {', '.join(styles) or 'none'})"
+            )
+
+    if prosody.style_degree is not None:
+        try:
+            style_degree = float(prosody.style_degree)
+        except (TypeError, ValueError) as err:
+            raise ValueError(f"Invalid style_degree: {prosody.style_degree}") from err
+
+        if not STYLE_DEGREE_RANGE[0] <= style_degree <= STYLE_DEGREE_RANGE[1]:
+            raise ValueError(
+                f"style_degree must be between {STYLE_DEGREE_RANGE[0]}"
+                f" and {STYLE_DEGREE_RANGE[1]}"
+            )
+
+    return prosody
+
+
+def _read_profiles_file(path: Path) -> Any:
+    with open(path, encoding="utf-8") as profiles_file:
+        if path.suffix.lower() in (".yaml", ".yml"):
+            try:
+                import yaml
+            except ImportError as err:
+                raise ValueError(
+                    "PyYAML is required for YAML voice profiles, use JSON instead"
+                ) from err
+
+            try:
+                return yaml.safe_load(profiles_file)
+            except yaml.YAMLError as err:
+                raise ValueError(f"Invalid YAML in {path}: {err}") from err
+
+        return json.load(profiles_file)
+
+
+def load_profiles(
+    path: str | Path, voices: dict[str, Any], default: Prosody
+) -> dict[str, Prosody]:
+    """Load a profiles file mapping voice names to prosody settings.
+
+    Settings missing from a profile are taken from default. Raises ValueError
+    if a voice is unknown or a setting is invalid for its voice, and TypeError
+    if the file isn't shaped like that.
+    """
+    path = Path(path)
+    data = _read_profiles_file(path)
+    if not isinstance(data, dict):
+        raise TypeError(f"Expected voice names mapped to settings in {path}")
+
+    profiles: dict[str, Prosody] = {}
+    for voice, settings in data.items():
+        if voice not in voices:
+            raise ValueError(f"Unknown voice in {path}: {voice}")
+
+        if not isinstance(settings, dict):
+            raise TypeError(f"Expected settings for {voice} in {path}")
+
+        try:
+            profiles[voice] = apply_prosody(default, settings, voices[voice])
+        except ValueError as err:
+            raise ValueError(f"Invalid profile for {voice} in {path}: {err}") from err
+
+    return profiles
+
+
+class VoiceProfiles:
+    """Prosody for each voice, reloaded when the profiles file changes.
+
+    Profiles are swapped as a whole, so readers in other threads always see
+    either the old or the new profiles.
+    """
+
+    def __init__(
+        self, path: str | Path, voices: dict[str, Any], default: Prosody
+    ) -> None:
+        """Initialize."""
+        self.path = Path(path)
+        self.voices = voices
+        self.default = default
+        self._mtime = self.path.stat().st_mtime
+        self._profiles = load_profiles(self.path, voices, default)
+        _LOGGER.debug("Loaded %s voice profile(s)", len(self._profiles))
+
+    def voices_with_profiles(self) -> list[str]:
+        """Return the names of all voices with a profile."""
+        return list(self._profiles)
+
+    def get(self, voice: str) -> Prosody:
+        """Return the prosody for voice."""
+        return self._profiles.get(voice, self.default)
+
+    def reload(self) -> bool:
+        """Load the profiles file again if it changed.
+
+        Returns True if new profiles are in use. Invalid profiles are logged
+        and the previous ones are kept.
+        """
+        try:
+            mtime = self.path.stat().st_mtime
+            if mtime == self._mtime:
+                return False
+
+            self._mtime = mtime
+            self._profiles = load_profiles(self.path, self.voices, self.default)
+        except (OSError, TypeError, ValueError):
+            _LOGGER.exception("Failed to reload voice profiles from %s", self.path)
+            return False
+
+        _LOGGER.info("Reloaded %s voice profile(s)", len(self._profiles))
+        return True
+
+    async def watch(
+        self,
+        interval: float = RELOAD_INTERVAL,
+        on_reload: Callable[[], None] | None = None,
+    ) -> None:
+        """Reload the profiles whenever the file changes."""
+        while True:
+            await asyncio.sleep(interval)
+            if await asyncio.to_thread(self.reload) and (on_reload is not None):
+                on_reload()
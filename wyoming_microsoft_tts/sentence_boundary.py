@@ -1,37 +1,120 @@
 """Guess the sentence boundaries in text."""
 
-from collections.abc import Iterable
+import time
+from collections.abc import Callable, Iterable
 
 import regex as re
 
+from .metrics import METRICS
+
 SENTENCE_END = r"[.!?…]|[。！？]|[؟]|[।॥]"
+SENTENCE_END_CHARS = frozenset(".!?…。！？؟।॥")
 ABBREVIATION_RE = re.compile(r"\b\p{L}{1,3}\.$", re.UNICODE)
 
 SENTENCE_BOUNDARY_RE = re.compile(
     rf"(.*?(?:{SENTENCE_END}+))(?=\s+[\p{{Lu}}\p{{Lt}}\p{{Lo}}]|(?:\s+\d+\.\s+))",
     re.DOTALL,
 )
+
+# Last character of the first sentence, where SENTENCE_BOUNDARY_RE stops
+SENTENCE_END_RE = re.compile(
+    rf"(?:{SENTENCE_END})(?=\s+[\p{{Lu}}\p{{Lt}}\p{{Lo}}]|(?:\s+\d+\.\s+))"
+)
+# End of a clause inside a sentence
+CLAUSE_END_CHARS = frozenset(",;，；、")
+CLAUSE_END_RE = re.compile(r"[,;](?=\s)|[，；、]")
 WORD_ASTERISKS = re.compile(r"\*+([^\*]+)\*+")
 LINE_ASTERICKS = re.compile(r"(?<=^|\n)\s*\*+")
 
 
 class SentenceBoundaryDetector:
-    """Detect sentence boundaries in text."""
-
-    def __init__(self) -> None:
+    """Detect sentence boundaries in text.
+
+    Text is scanned incrementally: only newly added text and the few
+    characters after a possible sentence end that could not be decided yet are
+    searched again, so feeding a long text in tiny chunks takes linear time.
+
+    To get audio started sooner, the first clause (up to a comma or semicolon)
+    can be emitted on its own once first_clause_chars characters are waiting
+    or first_clause_seconds have passed without a complete sentence. After
+    that, only whole sentences are emitted. Both limits are only checked when
+    a chunk is added, so a stream that stalls keeps its first clause until
+    the next chunk arrives.
+    """
+
+    def __init__(
+        self,
+        first_clause_chars: int | None = None,
+        first_clause_seconds: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
         """Initialize the sentence boundary detector."""
-        self.remaining_text = ""
         self.current_sentence = ""
 
+        self.first_clause_chars = first_clause_chars
+        self.first_clause_seconds = first_clause_seconds
+        self._clock = clock
+        self._start_time = clock()
+        self._is_first = (first_clause_chars is not None) or (
+            first_clause_seconds is not None
+        )
+
+        # Text added while waiting for the first clause, and where it ends
+        self._num_added = 0
+        self._last_char = ""
+        self._clause_end = 0
+
+        # Text known to contain no sentence end, and text still to be searched
+        self._scanned: list[str] = []
+        self._unscanned = ""
+
+    @property
+    def remaining_text(self) -> str:
+        """Text that is not part of a sentence yet."""
+        return "".join(self._scanned) + self._unscanned
+
     def add_chunk(self, chunk: str) -> Iterable[str]:
         """Add a chunk of text and yield complete sentences."""
-        self.remaining_text += chunk
-        while self.remaining_text:
-            match = SENTENCE_BOUNDARY_RE.search(self.remaining_text)
-            if not match:
+        for sentence in self._add_chunk(chunk):
+            METRICS.sentence_chars.observe(len(sentence))
+            yield sentence
+
+    def _add_chunk(self, chunk: str) -> Iterable[str]:
+        if not self._is_first:
+            yield from self._add_text(chunk)
+            return
+
+        self._find_clause_end(chunk)
+        for sentence in self._add_text(chunk):
+            self._is_first = False
+            yield sentence
+
+        if self._is_first and self._is_first_clause_due():
+            self._is_first = False
+            first_clause = self._split_first_clause()
+            if first_clause:
+                yield first_clause
+
+    def _add_text(self, chunk: str) -> Iterable[str]:
+        """Add a chunk of text and yield complete sentences."""
+        if (not self._unscanned) and SENTENCE_END_CHARS.isdisjoint(chunk):
+            # Fast path for most chunks of a stream
+            self._scanned.append(chunk)
+            return
+
+        self._unscanned += chunk
+        while self._unscanned:
+            match = SENTENCE_END_RE.search(self._unscanned, partial=True)
+            if (match is None) or match.partial:
+                # A partial match is a sentence end that depends on text which
+                # hasn't arrived yet, so it's searched again with the next chunk
+                self._skip(len(self._unscanned) if match is None else match.start())
                 break
 
-            match_text = match.group(0)
+            self._scanned.append(self._unscanned[: match.end()])
+            match_text = "".join(self._scanned)
+            self._scanned.clear()
+            self._unscanned = self._unscanned[match.end() :]
 
             if not self.current_sentence:
                 self.current_sentence = match_text
@@ -45,15 +128,58 @@ class SentenceBoundaryDetector:
                 yield remove_asterisks(self.current_sentence.strip())
                 self.current_sentence = ""
 
-            self.remaining_text = self.remaining_text[match.end() :]
-
     def finish(self) -> str:
         """Return the remaining text as a single item."""
         text = (self.current_sentence + self.remaining_text).strip()
-        self.remaining_text = ""
+        self._scanned.clear()
+        self._unscanned = ""
         self.current_sentence = ""
 
-        return remove_asterisks(text)
+        text = remove_asterisks(text)
+        if text:
+            METRICS.sentence_chars.observe(len(text))
+
+        return text
+
+    def _find_clause_end(self, chunk: str) -> None:
+        """Remember where the first clause of the text added so far ends."""
+        if self._clause_end <= 0:
+            offset = self._num_added - len(self._last_char)
+            match = CLAUSE_END_RE.search(self._last_char + chunk)
+            if match is not None:
+                self._clause_end = offset + match.end()
+
+        self._num_added += len(chunk)
+        self._last_char = chunk[-1:] or self._last_char
+
+    def _is_first_clause_due(self) -> bool:
+        if self._clause_end <= 0:
+            return False
+
+        if (self.first_clause_chars is not None) and (
+            self._num_added >= self.first_clause_chars
+        ):
+            return True
+
+        return (self.first_clause_seconds is not None) and (
+            self._clock() - self._start_time >= self.first_clause_seconds
+        )
+
+    def _split_first_clause(self) -> str:
+        """Return the first clause and keep the text after it."""
+        # Nothing has been emitted yet, so this is all the text added so far
+        text = self.current_sentence + self.remaining_text
+        self.current_sentence = ""
+        self._scanned.clear()
+        self._unscanned = text[self._clause_end :]
+
+        return remove_asterisks(text[: self._clause_end].strip())
+
+    def _skip(self, end: int) -> None:
+        """Stop searching the unscanned text before end."""
+        if end > 0:
+            self._scanned.append(self._unscanned[:end])
+            self._unscanned = self._unscanned[end:]
 
 
 def remove_asterisks(text: str) -> str:
@@ -0,0 +1,95 @@
+"""Build SSML for a voice from templates made once per voice and prosody."""
+
+from dataclasses import dataclass, fields
+from functools import cached_property, lru_cache
+from typing import Any
+from xml.sax.saxutils import escape, quoteattr
+
+
+@dataclass(frozen=True)
+class Prosody:
+    """Prosody and speaking style of a voice."""
+
+    rate: str | None = None
+    pitch: str | None = None
+    volume: str | None = None
+    style: str | None = None
+    style_degree: Any = None
+
+    @classmethod
+    def from_args(cls, args: Any) -> "Prosody":
+        """Return the prosody set on the command line."""
+        return cls(
+            rate=args.rate,
+            pitch=args.pitch,
+            volume=args.volume,
+            style=args.style,
+            style_degree=args.style_degree,
+        )
+
+    @cached_property
+    def values(self) -> tuple[Any, ...]:
+        """Return the settings in field order, computed once per prosody."""
+        return tuple(getattr(self, field.name) for field in fields(self))
+
+    @cached_property
+    def needs_ssml(self) -> bool:
+        """Return True if plain text can't express this prosody."""
+        return any(self.values)
+
+
+class SsmlTemplate:
+    """SSML envelope for one voice and prosody, with text going in the middle."""
+
+    def __init__(self, voice_key: str, language: str, prosody: Prosody) -> None:
+        """Initialize."""
+        prefix_parts = [
+            '<?xml version="1.0" encoding="UTF-8"?>',
+            '<speak version="1.0" xmlns="http://www.w3.org/2001/10/synthesis"',
+        ]
+        suffix_parts = []
+
+        if prosody.style or prosody.style_degree:
+            prefix_parts.append(' xmlns:mstts="https://www.w3.org/2001/mstts"')
+
+        prefix_parts.append(f" xml:lang={quoteattr(language)}>")
+        prefix_parts.append(f"<voice name={quoteattr(voice_key)}>")
+
+        if prosody.style is not None:
+            style_attrs = [f"style={quoteattr(prosody.style)}"]
+            if prosody.style_degree is not None:
+                style_attrs.append(
+                    f"styledegree={quoteattr(str(prosody.style_degree))}"
+                )
+
+            prefix_parts.append(f"<mstts:express-as {' '.join(style_attrs)}>")
+            suffix_parts.append("</mstts:express-as>")
+
+        prosody_attrs = [
+            f"{name}={quoteattr(value)}"
+            for name, value in (
+                ("rate", prosody.rate),
+                ("pitch", prosody.pitch),
+                ("volume", prosody.volume),
+            )
+            if value
+        ]
+        if prosody_attrs:
+            prefix_parts.append(f"<prosody {' '.join(prosody_attrs)}>")
+            suffix_parts.insert(0, "</prosody>")
+
+        suffix_parts.append("</voice>")
+        suffix_parts.append("</speak>")
+
+        self.prefix = "".join(prefix_parts)
+        self.suffix = "".join(suffix_parts)
+
+    def render(self, text: str) -> str:
+        """Return SSML that speaks text."""
+        return self.prefix + escape(text) + self.suffix
+
+
+@lru_cache(maxsize=256)
+def ssml_template(voice_key: str, language: str, prosody: Prosody) -> SsmlTemplate:
+    """Return the template for a voice and prosody, building it on first use."""
+    return SsmlTemplate(voice_key, language, prosody)
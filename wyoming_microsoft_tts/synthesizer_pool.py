@@ -0,0 +1,184 @@
+"""Pool of reusable Azure speech synthesizers."""
+
+import contextlib
+import logging
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Hashable, Iterator
+
+import azure.cognitiveservices.speech as speechsdk
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class PooledSynthesizer:
+    """A speech synthesizer together with its service connection.
+
+    The connection's events are raised on SDK threads, so its state is kept
+    in an Event.
+    """
+
+    def __init__(self, key: Hashable, synthesizer: speechsdk.SpeechSynthesizer):
+        """Initialize."""
+        self.key = key
+        self.synthesizer = synthesizer
+        self.healthy = True
+        self.last_used = time.monotonic()
+
+        self.connected = threading.Event()
+        self._was_connected = False
+        self.connection = speechsdk.Connection.from_speech_synthesizer(synthesizer)
+        self.connection.connected.connect(self._on_connected)
+        self.connection.disconnected.connect(self._on_disconnected)
+
+    def _on_connected(self, _event=None) -> None:
+        self._was_connected = True
+        self.connected.set()
+
+    def _on_disconnected(self, _event=None) -> None:
+        self.connected.clear()
+
+    @property
+    def lost_connection(self) -> bool:
+        """True if the service dropped the connection, e.g. while idle."""
+        return self._was_connected and not self.connected.is_set()
+
+    def open(self) -> None:
+        """Start connecting to the service in the background."""
+        self.connection.open(True)
+
+    def close(self) -> None:
+        """Close the service connection."""
+        try:
+            self.connection.close()
+        except Exception:
+            _LOGGER.debug("Failed to close synthesizer connection", exc_info=True)
+
+
+class SynthesizerPool:
+    """Keep idle speech synthesizers around so their connection can be reused.
+
+    Synthesizers are keyed (by voice and output format) and handed out to one
+    caller at a time. At most ``max_size`` idle synthesizers are kept per key.
+    Those idle for longer than ``idle_timeout`` seconds are closed by
+    evict_idle, which acquire also calls. Idle synthesizers whose connection
+    the service dropped are closed instead of being handed out.
+    """
+
+    def __init__(
+        self,
+        create_synthesizer: Callable[[Hashable], speechsdk.SpeechSynthesizer],
+        max_size: int,
+        idle_timeout: float,
+    ) -> None:
+        """Initialize."""
+        self.create_synthesizer = create_synthesizer
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+
+        self._idle: dict[Hashable, deque[PooledSynthesizer]] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, key: Hashable) -> PooledSynthesizer:
+        """Take an idle synthesizer for key or create a new one."""
+        discarded = self._evict_expired()
+        reused: PooledSynthesizer | None = None
+        with self._lock:
+            idle = self._idle.get(key)
+            while idle and (reused is None):
+                pooled = idle.pop()
+                if pooled.lost_connection:
+                    discarded.append(pooled)
+                else:
+                    reused = pooled
+
+        for pooled in discarded:
+            pooled.close()
+
+        if reused is not None:
+            _LOGGER.debug("Reusing synthesizer for %s", key)
+            return reused
+
+        _LOGGER.debug("Creating synthesizer for %s", key)
+        return PooledSynthesizer(key, self.create_synthesizer(key))
+
+    def release(self, pooled: PooledSynthesizer) -> None:
+        """Return a synthesizer to the pool, closing it if it can't be reused."""
+        if not pooled.healthy:
+            _LOGGER.debug("Discarding unhealthy synthesizer for %s", pooled.key)
+            pooled.close()
+            return
+
+        pooled.last_used = time.monotonic()
+        with self._lock:
+            idle = self._idle.setdefault(pooled.key, deque())
+            if len(idle) < self.max_size:
+                idle.append(pooled)
+                return
+
+        pooled.close()
+
+    @contextlib.contextmanager
+    def synthesizer(self, key: Hashable) -> Iterator[PooledSynthesizer]:
+        """Borrow a synthesizer for key for the duration of the block."""
+        pooled = self.acquire(key)
+        try:
+            yield pooled
+        except Exception:
+            pooled.healthy = False
+            raise
+        finally:
+            self.release(pooled)
+
+    def prewarm(self, key: Hashable, timeout: float) -> bool:
+        """Open a connection for key and keep the synthesizer in the pool.
+
+        Returns True if the connection was established within timeout.
+        """
+        pooled = self.acquire(key)
+        try:
+            pooled.open()
+            connected = pooled.connected.wait(timeout)
+        except Exception:
+            _LOGGER.exception("Failed to pre-warm synthesizer for %s", key)
+            pooled.healthy = False
+            connected = False
+
+        self.release(pooled)
+        return connected
+
+    def evict_idle(self) -> None:
+        """Close synthesizers that have been idle for longer than idle_timeout."""
+        for pooled in self._evict_expired():
+            _LOGGER.debug("Closing idle synthesizer for %s", pooled.key)
+            pooled.close()
+
+    def idle_count(self, key: Hashable) -> int:
+        """Return the number of idle synthesizers for key."""
+        with self._lock:
+            return len(self._idle.get(key, ()))
+
+    def close(self) -> None:
+        """Close all idle synthesizers."""
+        with self._lock:
+            idle = [pooled for queue in self._idle.values() for pooled in queue]
+            self._idle.clear()
+
+        for pooled in idle:
+            pooled.close()
+
+    def _evict_expired(self) -> list[PooledSynthesizer]:
+        """Remove synthesizers that have been idle for too long."""
+        deadline = time.monotonic() - self.idle_timeout
+        expired: list[PooledSynthesizer] = []
+        with self._lock:
+            for key, idle in list(self._idle.items()):
+                # Oldest synthesizers are at the left
+                while idle and idle[0].last_used < deadline:
+                    expired.append(idle.popleft())
+
+                if not idle:
+                    del self._idle[key]
+
+        return expired
@@ -0,0 +1,182 @@
+"""Opt-in timing of the stages of each request, written as JSON lines."""
+
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Any
+
+_LOGGER = logging.getLogger(__name__)
+
+# Trace of the request being handled, copied into its tasks and threads
+_CURRENT: ContextVar["RequestTrace | None"] = ContextVar("trace", default=None)
+
+# Returned by span while tracing is off, so disabled spans cost one lookup
+_NO_SPAN = nullcontext()
+
+
+class TraceExporter:
+    """Write finished traces as JSON lines to the log or a file."""
+
+    def __init__(self, path: str | None = None) -> None:
+        """Initialize.
+
+        Traces are appended to the file at path, or logged if path is None.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._prefix = f"{os.getpid():x}"
+
+    def next_id(self) -> str:
+        """Return an id for a new request."""
+        return f"{self._prefix}-{next(self._ids)}"
+
+    def export(self, record: dict[str, Any]) -> None:
+        """Write the record of a finished request."""
+        line = json.dumps(record, ensure_ascii=False)
+        if self.path is None:
+            _LOGGER.info(line)
+            return
+
+        try:
+            with self._lock, open(self.path, "a", encoding="utf-8") as trace_file:
+                trace_file.write(line + "\n")
+        except OSError:
+            _LOGGER.exception("Failed to write trace to %s", self.path)
+
+
+_exporter: TraceExporter | None = None
+
+
+def configure(exporter: TraceExporter | None) -> None:
+    """Trace every request to exporter, or stop tracing if it is None."""
+    global _exporter
+    _exporter = exporter
+
+
+class RequestTrace:
+    """Spans of the stages of one request.
+
+    Spans are added from the event loop and from synthesis threads. Times are
+    milliseconds since the request started. Stages that run once per text
+    chunk or audio chunk are summed into totals instead of getting a span each.
+    """
+
+    def __init__(self, exporter: TraceExporter, **attributes: Any) -> None:
+        """Initialize."""
+        self.exporter = exporter
+        self.request_id = exporter.next_id()
+        self.attributes = attributes
+        self.start_time = time.monotonic()
+        self.spans: list[dict[str, Any]] = []
+        self.totals: dict[str, float] = {}
+        self.first_audio_ms: float | None = None
+        self._is_finished = False
+
+    def _ms(self, monotonic_time: float) -> float:
+        return round((monotonic_time - self.start_time) * 1000, 3)
+
+    def add_span(
+        self, name: str, start_time: float, end_time: float, **attributes: Any
+    ) -> None:
+        """Add a span between two times from time.monotonic."""
+        start_ms = self._ms(start_time)
+        self.spans.append(
+            {
+                "name": name,
+                "start_ms": start_ms,
+                "duration_ms": round(self._ms(end_time) - start_ms, 3),
+                **attributes,
+            }
+        )
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any):
+        """Add a span for the code in the with block."""
+        start_time = time.monotonic()
+        try:
+            yield
+        finally:
+            self.add_span(name, start_time, time.monotonic(), **attributes)
+
+    @contextmanager
+    def total(self, name: str):
+        """Add the time spent in the with block to the total for name."""
+        start_time = time.monotonic()
+        try:
+            yield
+        finally:
+            self.totals[name] = (
+                self.totals.get(name, 0.0) + time.monotonic() - start_time
+            )
+
+    def first_audio(self) -> None:
+        """Record that the first audio was sent, if it wasn't already."""
+        if self.first_audio_ms is None:
+            self.first_audio_ms = self._ms(time.monotonic())
+
+    def finish(self, **attributes: Any) -> None:
+        """Export the trace once, with attributes of the outcome."""
+        if self._is_finished:
+            return
+
+        self._is_finished = True
+        self.exporter.export(
+            {
+                "request_id": self.request_id,
+                **self.attributes,
+                **attributes,
+                "duration_ms": self._ms(time.monotonic()),
+                "first_audio_ms": self.first_audio_ms,
+                "totals_ms": {
+                    name: round(seconds * 1000, 3)
+                    for name, seconds in self.totals.items()
+                },
+                "spans": sorted(self.spans, key=lambda span: span["start_ms"]),
+            }
+        )
+
+
+def start_trace(**attributes: Any) -> RequestTrace | None:
+    """Start tracing a request in the current context, if tracing is on."""
+    if _exporter is None:
+        return None
+
+    trace = RequestTrace(_exporter, **attributes)
+    _CURRENT.set(trace)
+    return trace
+
+
+def current_trace() -> RequestTrace | None:
+    """Return the trace of the request being handled, if any."""
+    return _CURRENT.get()
+
+
+def span(name: str, **attributes: Any):
+    """Return a context manager adding a span to the current trace, if any."""
+    trace = _CURRENT.get()
+    if trace is None:
+        return _NO_SPAN
+
+    return trace.span(name, **attributes)
+
+
+def total(name: str):
+    """Return a context manager adding to a total of the current trace, if any."""
+    trace = _CURRENT.get()
+    if trace is None:
+        return _NO_SPAN
+
+    return trace.total(name)
+
+
+def first_audio() -> None:
+    """Record the first audio of the current trace, if any."""
+    trace = _CURRENT.get()
+    if trace is not None:
+        trace.first_audio()